@@ -0,0 +1,110 @@
+import json
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+REPORT_CACHE_ALIAS = getattr(settings, 'REPORT_CACHE_ALIAS', 'reports')
+
+CENT = Decimal('0.01')
+
+# (key, label, newest age in days, oldest age in days or None)
+BUCKETS = [
+    ('days_0_30', '0-30', 0, 30),
+    ('days_31_60', '31-60', 31, 60),
+    ('days_61_90', '61-90', 61, 90),
+    ('days_90_plus', '90+', 91, None),
+]
+
+
+def report_cache():
+    return caches[REPORT_CACHE_ALIAS]
+
+
+def _cache_key(client_id, version, today):
+    return f'receivables-aging:{client_id}:{version}:{today}'
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def aging_queryset(client_id, today):
+    """
+    Outstanding Bill.due_amount per member split into BUCKETS by days since
+    bill_date, with one conditionally aggregated query grouped by member.
+    Bucket edges are local midnights, so a bill is 0 days old on its own day;
+    future-dated bills count as 0-30.
+    """
+    from adminapp.models import Bill
+    from adminapp.receivables import ZERO
+
+    sums = {}
+    for key, _, newest, oldest in BUCKETS:
+        condition = Q()
+        if newest:
+            condition &= Q(bill_date__lt=_start_of_day(today - timedelta(days=newest - 1)))
+        if oldest is not None:
+            condition &= Q(bill_date__gte=_start_of_day(today - timedelta(days=oldest)))
+        sums[key] = Coalesce(Sum('due_amount', filter=condition), ZERO)
+
+    return (
+        Bill.objects.filter(member__client_id=client_id, due_amount__gt=0)
+        .values('member_id', 'member__full_name')
+        .annotate(**sums, total=Sum('due_amount'))
+        .order_by('member_id')
+    )
+
+
+def aging_report(client_id, today=None):
+    today = today or timezone.localdate()
+    rows = aging_queryset(client_id, today)
+
+    totals = dict.fromkeys([key for key, *_ in BUCKETS] + ['total'], CENT * 0)
+    members = []
+    for row in rows:
+        # SQLite sums decimals as floats
+        amounts = {key: row[key].quantize(CENT) for key in totals}
+        for key, amount in amounts.items():
+            totals[key] += amount
+        members.append({'member': row['member_id'], 'full_name': row['member__full_name'], **amounts})
+
+    return {
+        'as_of': today.isoformat(),
+        'buckets': {key: label for key, label, *_ in BUCKETS},
+        'totals': totals,
+        'members': members,
+    }
+
+
+def cached_aging_report(client_id):
+    """
+    aging_report() for today rendered as JSON, kept in the report cache
+    under the client's members_version. Every write to the client's bills,
+    payments or members bumps that version in the same transaction, so the
+    next read in any worker misses, whatever the cache backend; entries
+    for older versions just age out. The version is read before the report
+    is built, so a report can only be cached under a version at least as
+    old as its data. The rendered bytes are cached rather than the report
+    so a hit skips both the query and serialization. Returns (body, hit).
+    """
+    from adminapp.models import Client
+
+    cache = report_cache()
+    version = Client.objects.filter(pk=client_id).values_list('members_version', flat=True).first()
+    key = _cache_key(client_id, version, timezone.localdate().isoformat())
+    cached = cache.get(key)
+    if cached is not None:
+        return cached, True
+
+    report = aging_report(client_id)
+    # DjangoJSONEncoder writes decimals as strings, like the serializers' DecimalFields
+    body = json.dumps(report, cls=DjangoJSONEncoder).encode()
+    cache.set(key, body)
+    return body, False
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class AdminappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'adminapp'
+
+    def ready(self):
+        from adminapp.currency import load_dataset
+
+        # Load the bundled currency dataset once at startup
+        load_dataset()
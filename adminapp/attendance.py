@@ -0,0 +1,186 @@
+from calendar import monthrange
+
+from django.db.models import ExpressionWrapper, F, OuterRef, PositiveIntegerField, Subquery
+from django.db.models.functions import Coalesce
+
+from adminapp.models import Attendance, AttendanceMonth
+
+
+ALL_DAYS = (1 << 31) - 1
+
+REBUILD_CHUNK_SIZE = 5000
+
+
+def day_bit(day):
+    return 1 << (day.day - 1)
+
+
+def mark_bitmaps(batch, day, present_ids, absent_ids):
+    """
+    Fold one roll call into the monthly bitmaps: three statements however
+    many members were marked. Call inside the roll call's transaction.
+    """
+    bit = day_bit(day)
+    key = {'batch': batch, 'year': day.year, 'month': day.month}
+
+    AttendanceMonth.objects.bulk_create(
+        [
+            AttendanceMonth(client_id=batch.client_id, member_id=member_id, **key)
+            for member_id in sorted(set(present_ids) | set(absent_ids))
+        ],
+        ignore_conflicts=True,
+    )
+
+    if present_ids:
+        AttendanceMonth.objects.filter(member_id__in=present_ids, **key).update(
+            present_bits=F('present_bits').bitor(bit),
+            marked_bits=F('marked_bits').bitor(bit),
+        )
+    if absent_ids:
+        AttendanceMonth.objects.filter(member_id__in=absent_ids, **key).update(
+            present_bits=F('present_bits').bitand(ALL_DAYS ^ bit),
+            marked_bits=F('marked_bits').bitor(bit),
+        )
+
+
+# -------- Bitmap analytics --------
+
+def attendance_percentage(present_bits, marked_bits):
+    marked = marked_bits.bit_count()
+    if not marked:
+        return None
+    return round(present_bits.bit_count() * 100 / marked, 1)
+
+
+def longest_present_streak(present_bits, marked_bits):
+    """
+    Longest run of present days, ignoring days without a roll call.
+    """
+    longest = current = 0
+    while marked_bits:
+        low = marked_bits & -marked_bits
+        if present_bits & low:
+            current += 1
+            longest = max(longest, current)
+        else:
+            current = 0
+        marked_bits ^= low
+    return longest
+
+
+def _absent_bits():
+    # present_bits is always a subset of marked_bits
+    return ExpressionWrapper(F('marked_bits') - F('present_bits'), output_field=PositiveIntegerField())
+
+
+def _carried_absences(year, month, days):
+    """
+    The absent bits of the last days-1 days of the member's previous-month
+    row (one unique-index lookup), as bits 0..days-2: shifted in below day 1
+    they let a run across the month boundary count.
+    """
+    previous_year, previous_month = (year - 1, 12) if month == 1 else (year, month - 1)
+    previous = (
+        AttendanceMonth.objects.filter(
+            batch_id=OuterRef('batch_id'), member_id=OuterRef('member_id'),
+            year=previous_year, month=previous_month,
+        )
+        .annotate(absent_bits=_absent_bits())
+        .values('absent_bits')[:1]
+    )
+    return Coalesce(Subquery(previous), 0, output_field=PositiveIntegerField()).bitrightshift(
+        monthrange(previous_year, previous_month)[1] - (days - 1)
+    )
+
+
+def has_absent_run(absent_bits, carried, days):
+    """
+    Whether the month's absent bitmap, with the previous month's carried
+    bits below day 1, holds `days` consecutive absences.
+    """
+    bits = absent_bits << (days - 1) | carried
+    run = bits
+    for shift in range(1, days):
+        run &= bits >> shift
+    return run != 0
+
+
+def consecutive_absences(queryset, year, month, days=3):
+    """
+    Rows of (year, month) with `days` consecutively recorded calendar days
+    of absence ending in that month, found in SQL with shifts and ANDs on
+    the absent bitmap, the previous month's last days included.
+    """
+    queryset = queryset.filter(year=year, month=month).annotate(absent_bits=ExpressionWrapper(
+        _absent_bits().bitleftshift(days - 1).bitor(_carried_absences(year, month, days)),
+        output_field=PositiveIntegerField(),
+    ))
+    run = F('absent_bits')
+    for shift in range(1, days):
+        run = run.bitand(F('absent_bits').bitrightshift(shift))
+    return queryset.annotate(absent_run=ExpressionWrapper(run, output_field=PositiveIntegerField())).filter(absent_run__gt=0)
+
+
+def batch_month_summary(batch, year, month, absent_run=3):
+    # One query: the carried bits are selected alongside each row and the
+    # run is checked here, rather than in a WHERE that repeats the subquery
+    rows = (
+        AttendanceMonth.objects.filter(batch=batch, year=year, month=month)
+        .annotate(carried=_carried_absences(year, month, absent_run))
+        .order_by('member_id')
+        .values_list('member_id', 'present_bits', 'marked_bits', 'carried')
+    )
+
+    return [
+        {
+            'member': member_id,
+            'days_marked': marked.bit_count(),
+            'days_present': present.bit_count(),
+            'percentage': attendance_percentage(present, marked),
+            'longest_streak': longest_present_streak(present, marked),
+            f'absent_{absent_run}_in_a_row': has_absent_run(marked - present, carried, absent_run),
+        }
+        for member_id, present, marked, carried in rows
+    ]
+
+
+# -------- Rebuild --------
+
+def rebuild_bitmaps(chunk_size=REBUILD_CHUNK_SIZE):
+    """
+    Recompute every AttendanceMonth row from the raw Attendance table,
+    streaming it in (batch, member, date) order. Returns the row count.
+    """
+    AttendanceMonth.objects.all().delete()
+
+    rows = Attendance.objects.order_by('batch_id', 'member_id', 'date').values_list(
+        'client_id', 'batch_id', 'member_id', 'date', 'present'
+    )
+
+    pending = []
+    current = None
+    written = 0
+
+    for client_id, batch_id, member_id, day, present in rows.iterator(chunk_size=chunk_size):
+        key = (batch_id, member_id, day.year, day.month)
+        if current is None or current.key != key:
+            current = AttendanceMonth(
+                client_id=client_id, batch_id=batch_id, member_id=member_id,
+                year=day.year, month=day.month,
+            )
+            current.key = key
+            pending.append(current)
+
+        bit = day_bit(day)
+        current.marked_bits |= bit
+        if present:
+            current.present_bits |= bit
+
+        if len(pending) > chunk_size:
+            # Everything but the row still being filled is complete
+            AttendanceMonth.objects.bulk_create(pending[:-1])
+            written += len(pending) - 1
+            pending = pending[-1:]
+
+    AttendanceMonth.objects.bulk_create(pending)
+    return written + len(pending)
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import authentication, exceptions
+
+
+TOKEN_CACHE_ALIAS = getattr(settings, 'TOKEN_CACHE_ALIAS', 'tokens')
+
+
+def token_cache():
+    return caches[TOKEN_CACHE_ALIAS]
+
+
+def _cache_key(key):
+    return f'auth-token:{key}'
+
+
+class CachedTokenAuthentication(authentication.TokenAuthentication):
+    """
+    TokenAuthentication that keeps token -> user lookups in a bounded cache
+    (TTL from the cache alias) instead of joining Token and Client on every
+    request. Entries are dropped by invalidate_user_tokens() whenever the
+    client's password, active state or existence changes.
+
+    Invalidation only reaches the cache it runs against: with the default
+    per-process LocMem 'tokens' cache, other workers keep serving their
+    copy of request.user until it expires, so the alias' TIMEOUT is the
+    staleness bound there. Point the alias at a shared cache (Redis,
+    Memcached) to make invalidation immediate everywhere.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = token_cache()
+        token = cache.get(_cache_key(key))
+
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            # token.user is already loaded (select_related), so it is cached with it
+            cache.set(_cache_key(key), token)
+            return user, token
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+
+        return token.user, token
+
+
+def invalidate_user_tokens(user_id):
+    from rest_framework.authtoken.models import Token
+
+    keys = Token.objects.filter(user_id=user_id).values_list('key', flat=True)
+    invalidate_token_keys(keys)
+
+
+def invalidate_token_keys(keys):
+    token_cache().delete_many([_cache_key(key) for key in keys])
@@ -0,0 +1,60 @@
+from adminapp.models import Attendance, Bill, Change, Member, Payment
+from adminapp.serializers import AttendanceSerializer, BillSerializer, MemberSerializer, PaymentSerializer
+
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 2000
+
+# kind -> (response key, model, serializer)
+FEEDS = {
+    Change.MEMBER: ('members', Member, MemberSerializer),
+    Change.BILL: ('bills', Bill, BillSerializer),
+    Change.PAYMENT: ('payments', Payment, PaymentSerializer),
+    Change.ATTENDANCE: ('attendance', Attendance, AttendanceSerializer),
+}
+
+
+def changes_since(client, since, limit=DEFAULT_LIMIT):
+    """
+    One page of a client's changes after the cursor since: up to limit log
+    entries, read with a seek on the (client, id) index. Entries for the same
+    row collapse to its current state, fetched with one pk__in query per
+    kind, or to a tombstone (its id under "deleted") when the row is gone.
+    Deleting a member also deletes its bills, payments and attendance.
+
+    The cost follows the number of entries read, not the size of the data
+    set. Sequence ids are handed out in commit order because SQLite has a
+    single writer, so a cursor never skips a later commit.
+    """
+    entries = list(
+        Change.objects.filter(client=client, id__gt=since)
+        .order_by('id')
+        .values_list('id', 'kind', 'object_id', 'deleted')[:limit + 1]
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # Last entry per row wins
+    latest = {(kind, object_id): deleted for _, kind, object_id, deleted in entries}
+
+    changes = {}
+    for kind, (name, model, serializer_class) in FEEDS.items():
+        deleted = {object_id for (k, object_id), gone in latest.items() if k == kind and gone}
+        wanted = [object_id for (k, object_id), gone in latest.items() if k == kind and not gone]
+
+        # Plain pk lookups: the ids come from the client's own entries, and a
+        # tenant filter here makes SQLite walk all of the client's members
+        rows = list(model.objects.filter(pk__in=wanted).order_by('pk')) if wanted else []
+        # Rows removed since the entry was written (e.g. by a cascade) count as deleted
+        deleted.update(set(wanted) - {row.pk for row in rows})
+
+        changes[name] = {
+            'updated': serializer_class(rows, many=True).data,
+            'deleted': sorted(deleted),
+        }
+
+    return {
+        'cursor': str(entries[-1][0] if entries else since),
+        'has_more': has_more,
+        'changes': changes,
+    }
@@ -0,0 +1,45 @@
+import hashlib
+
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from adminapp.models import VERSION_FIELDS, Client
+
+
+def collection_version(client_id, collection):
+    return Client.objects.filter(pk=client_id).values_list(VERSION_FIELDS[collection], flat=True).first()
+
+
+def etag_matches(etag, header):
+    # Weak comparison (RFC 9110 13.1.2): compression may have weakened the tag
+    return any(tag == '*' or tag.removeprefix('W/') == etag for tag in parse_etags(header or ''))
+
+
+class CollectionETagMixin:
+    """
+    Conditional GET for a tenant-scoped list view. The ETag is derived from
+    the client's version of etag_collection (bumped on every write, see
+    bump_versions) and the full request path, so filters and cursors get
+    their own tags. A matching If-None-Match is answered with 304 after a
+    single version lookup, before the list queryset or serializer run.
+    """
+    etag_collection = None
+
+    def list_etag(self, request):
+        version = collection_version(request.user.pk, self.etag_collection)
+        key = f'{request.user.pk}:{self.etag_collection}:{version}:{request.get_full_path()}:{request.accepted_media_type}'
+        return quote_etag(hashlib.md5(key.encode(), usedforsecurity=False).hexdigest())
+
+    def list(self, request, *args, **kwargs):
+        etag = self.list_etag(request)
+
+        if etag_matches(etag, request.headers.get('If-None-Match')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = super().list(request, *args, **kwargs)
+
+        response['ETag'] = etag
+        # Per-client data: keep shared caches out and make clients revalidate
+        response['Cache-Control'] = 'private, no-cache'
+        return response
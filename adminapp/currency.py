@@ -0,0 +1,102 @@
+import json
+import logging
+from functools import lru_cache
+from pathlib import Path
+
+import requests
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+DATA_FILE = Path(__file__).resolve().parent / 'data' / 'currencies.json'
+
+REMOTE_URL = "https://restcountries.com/v3.1/alpha/{code}"
+REMOTE_TIMEOUT = 5
+
+DEFAULT_CURRENCY = "INR"
+
+
+@lru_cache(maxsize=1)
+def load_dataset():
+    """
+    Bundled country -> currency and currency -> symbol tables.
+    Loaded once per process (AdminappConfig.ready warms it at startup).
+    """
+    with open(DATA_FILE, encoding='utf-8') as f:
+        data = json.load(f)
+
+    # Index alpha-3 codes too, as the old restcountries lookup accepted both
+    by_code = {}
+    for alpha2, country in data['countries'].items():
+        by_code[alpha2] = country['currency']
+        by_code[country['alpha3']] = country['currency']
+    data['by_code'] = by_code
+    return data
+
+
+def dataset_version():
+    return load_dataset()['version']
+
+
+# Successful remote lookups only: a failure is retried on the next call
+_remote_currencies = {}
+
+
+def _remote_currency(code):
+    # Optional refresh path for codes missing from the bundle; never raises
+    if code in _remote_currencies:
+        return _remote_currencies[code]
+    try:
+        response = requests.get(REMOTE_URL.format(code=code), timeout=REMOTE_TIMEOUT)
+        if response.status_code == 200:
+            currency = next(iter(response.json()[0]["currencies"]))
+            _remote_currencies[code] = currency
+            return currency
+        logger.warning("Currency lookup for %s returned HTTP %s", code, response.status_code)
+    except Exception:
+        logger.warning("Currency lookup for %s failed", code, exc_info=True)
+    return None
+
+
+def currency_for_country(country_code, default=DEFAULT_CURRENCY):
+    code = (country_code or '').strip().upper()
+    currency = load_dataset()['by_code'].get(code)
+
+    if currency is None and code and getattr(settings, 'CURRENCY_REMOTE_LOOKUP', False):
+        currency = _remote_currency(code)
+
+    return currency or default
+
+
+def currency_symbol(currency_code):
+    currency = load_dataset()['currencies'].get((currency_code or '').upper())
+    return currency['symbol'] if currency else None
+
+
+def write_dataset(data, path=DATA_FILE):
+    """
+    Write the dataset one entry per line so refreshes diff cleanly.
+    """
+    def block(name, entries, last):
+        lines = [f'  "{name}": {{']
+        items = sorted(entries.items())
+        for i, (key, value) in enumerate(items):
+            comma = ',' if i < len(items) - 1 else ''
+            lines.append(f'    {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)}{comma}')
+        lines.append('  }' + ('' if last else ','))
+        return lines
+
+    lines = [
+        '{',
+        f'  "version": {json.dumps(data["version"])},',
+        f'  "source": {json.dumps(data["source"])},',
+        *block('countries', data['countries'], last=False),
+        *block('currencies', data['currencies'], last=True),
+        '}',
+    ]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+    load_dataset.cache_clear()
+    _remote_currencies.clear()
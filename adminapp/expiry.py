@@ -0,0 +1,57 @@
+import time
+from datetime import date
+
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+
+from adminapp.authentication import invalidate_token_keys
+from adminapp.models import Client
+
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def expired_clients(today=None):
+    """
+    Active clients whose subscription_end has passed.
+    Served by the partial subscription_end index on Client.
+    """
+    today = today or date.today()
+    return Client.objects.filter(is_active=True, subscription_end__lt=today)
+
+
+def expire_subscriptions(today=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Deactivate every expired client and revoke their tokens with set-based
+    statements, one short transaction per chunk of ids.
+    Returns a summary dict.
+    """
+    today = today or date.today()
+    started = time.perf_counter()
+
+    deactivated = 0
+    tokens_revoked = 0
+
+    while True:
+        ids = list(expired_clients(today).order_by('id').values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            break
+
+        with transaction.atomic():
+            # Re-check the predicate so a client renewed since the select keeps
+            # both its active state and its tokens
+            expired = list(
+                expired_clients(today).filter(id__in=ids).select_for_update().values_list('id', flat=True)
+            )
+            deactivated += Client.objects.filter(id__in=expired).update(is_active=False)
+            keys = list(Token.objects.filter(user_id__in=expired).values_list('key', flat=True))
+            revoked, _ = Token.objects.filter(key__in=keys).delete()
+
+        invalidate_token_keys(keys)
+        tokens_revoked += revoked
+
+    return {
+        "clients_deactivated": deactivated,
+        "tokens_revoked": tokens_revoked,
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+    }
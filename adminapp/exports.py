@@ -0,0 +1,123 @@
+import csv
+import io
+from datetime import datetime
+
+from django.utils import timezone
+
+from adminapp.models import Bill, Member, Payment
+
+
+DEFAULT_CHUNK_SIZE = 2000
+
+# Rows written per yielded piece of the response
+ROWS_PER_WRITE = 500
+
+
+class Export:
+    """
+    One CSV export: a tenant-scoped queryset, the DateTimeField the date
+    range applies to, and (header, lookup) columns read with values_list.
+    """
+
+    def __init__(self, scope, date_field, columns):
+        self.scope = scope
+        self.date_field = date_field
+        self.columns = columns
+
+    def queryset(self, client):
+        return self.scope(client).order_by(self.date_field, 'id').values_list(
+            *(lookup for _, lookup in self.columns)
+        )
+
+
+EXPORTS = {
+    'bills': Export(
+        lambda client: Bill.objects.filter(client=client),
+        'bill_date',
+        [
+            ('bill_id', 'id'),
+            ('member_id', 'member_id'),
+            ('member_name', 'member__full_name'),
+            ('subscription', 'subscription__name'),
+            ('total_amount', 'total_amount'),
+            ('paid_amount', 'paid_amount'),
+            ('due_amount', 'due_amount'),
+            ('bill_date', 'bill_date'),
+            ('recurring_date', 'recurring_date'),
+            ('is_recurring', 'is_recurring'),
+        ],
+    ),
+    'payments': Export(
+        lambda client: Payment.objects.filter(client=client),
+        'payment_date',
+        [
+            ('payment_id', 'id'),
+            ('bill_id', 'bill_id'),
+            ('member_id', 'bill__member_id'),
+            ('member_name', 'bill__member__full_name'),
+            ('amount', 'amount'),
+            ('payment_method', 'payment_method'),
+            ('payment_date', 'payment_date'),
+        ],
+    ),
+    'members': Export(
+        lambda client: Member.objects.filter(client=client),
+        'created_at',
+        [
+            ('member_id', 'id'),
+            ('full_name', 'full_name'),
+            ('gender', 'gender'),
+            ('contact_number', 'contact_number'),
+            ('email', 'email'),
+            ('subscription', 'subscription__name'),
+            ('batch', 'batch_group__name'),
+            ('recurring_date', 'recurring_date'),
+            ('outstanding_fee', 'outstanding_fee'),
+            ('is_active', 'is_active'),
+            ('created_at', 'created_at'),
+        ],
+    ),
+}
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, datetime):
+        return timezone.localtime(value).isoformat()
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@'):
+        # Keep spreadsheet apps from evaluating member-entered text as a formula
+        return "'" + value
+    return value
+
+
+def stream_csv(export, queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield the CSV in pieces: the header straight away, then ROWS_PER_WRITE
+    rows at a time read from a chunked iterator, so memory use doesn't
+    depend on the number of rows.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    writer.writerow([header for header, _ in export.columns])
+    yield flush()
+
+    pending = 0
+    for row in queryset.iterator(chunk_size=chunk_size):
+        writer.writerow([_cell(value) for value in row])
+        pending += 1
+        if pending == ROWS_PER_WRITE:
+            yield flush()
+            pending = 0
+
+    if pending:
+        yield flush()
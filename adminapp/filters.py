@@ -0,0 +1,75 @@
+from datetime import datetime, time, timedelta
+from datetime import timezone as dt_timezone
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+
+TRUE_VALUES = {'true', '1', 'yes'}
+FALSE_VALUES = {'false', '0', 'no'}
+
+
+def parse_bool(params, name):
+    value = params.get(name)
+    if value is None or value == '':
+        return None
+    value = value.lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValidationError({name: "Expected true or false."})
+
+
+def parse_id(params, name):
+    value = params.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: "Expected an integer id."})
+
+
+def _start_of_day(value, name, days=0):
+    """
+    Local midnight of the YYYY-MM-DD date value, shifted by days. Dates that
+    don't exist (2024-02-30) or fall outside what a datetime can hold once
+    shifted or converted to UTC for the query are rejected like malformed ones.
+    """
+    try:
+        parsed = parse_date(value) if value else None
+        if parsed is not None:
+            start = timezone.make_aware(datetime.combine(parsed + timedelta(days=days), time.min))
+            start.astimezone(dt_timezone.utc)
+            return start
+    except (ValueError, OverflowError):
+        pass
+    raise ValidationError({name: "Expected a date in YYYY-MM-DD format."})
+
+
+def filter_date_range(queryset, params, field):
+    """
+    Apply ?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD (both inclusive) to a
+    DateTimeField as a plain range so the column's index can be used.
+    """
+    date_from = params.get('date_from')
+    date_to = params.get('date_to')
+
+    if date_from:
+        queryset = queryset.filter(**{f'{field}__gte': _start_of_day(date_from, 'date_from')})
+    if date_to:
+        queryset = queryset.filter(**{f'{field}__lt': _start_of_day(date_to, 'date_to', days=1)})
+    return queryset
+
+
+def filter_exact(queryset, params, lookups):
+    """
+    Apply the {param: (field, parser)} filters that are present in params.
+    """
+    for name, (field, parser) in lookups.items():
+        value = parser(params, name)
+        if value is not None:
+            queryset = queryset.filter(**{field: value})
+    return queryset
@@ -0,0 +1,43 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password, verify_password
+
+
+# hashlib's PBKDF2 releases the GIL, so these threads hash in parallel; the
+# bound keeps a login burst from starving everything else of CPU.
+_pool = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'PASSWORD_HASH_WORKERS', None) or os.cpu_count() or 1,
+    thread_name_prefix='password-hash',
+)
+
+
+async def _hash(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_pool, func, *args)
+
+
+async def aauthenticate(username, password):
+    """
+    Async ModelBackend.authenticate() for the login view that verifies the
+    password on the bounded hashing pool. Django's own aauthenticate()
+    hashes on the event loop thread, stalling every other connection.
+    """
+    UserModel = get_user_model()
+    try:
+        user = await UserModel._default_manager.aget_by_natural_key(username)
+    except UserModel.DoesNotExist:
+        # Hash anyway so unknown usernames take as long as wrong passwords
+        await _hash(make_password, password)
+        return None
+
+    is_correct, must_update = await _hash(verify_password, password, user.password)
+    if not is_correct or not user.is_active:
+        return None
+
+    if must_update:
+        user.password = await _hash(make_password, password)
+        await user.asave(update_fields=['password'])
+    return user
@@ -0,0 +1,127 @@
+import time
+from datetime import datetime
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import Case, CharField, Count, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from adminapp.models import Member, Payment, PaymentRecord
+from adminapp.receivables import TOLERANCE, ZERO
+
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def month_bounds(year, month):
+    """
+    [start, end) of a calendar month in the current time zone.
+    """
+    start = timezone.make_aware(datetime(year, month, 1))
+    return start, timezone.make_aware(datetime(year, month, 1) + relativedelta(months=1))
+
+
+def ledger_rows(year, month):
+    """
+    (member_id, amount_due) for every active member in id order, from one
+    query grouped by member: the total of the bills dated in the month.
+    """
+    start, end = month_bounds(year, month)
+    in_month = Q(bills__bill_date__gte=start, bills__bill_date__lt=end)
+
+    return (
+        Member.objects.filter(is_active=True)
+        .values('id')
+        .annotate(amount_due=Coalesce(Sum('bills__total_amount', filter=in_month), ZERO))
+        .order_by('id')
+        .values_list('id', 'amount_due')
+    )
+
+
+def payments_by_member(year, month, member_ids):
+    """
+    {member_id: amount} paid in the month by member_ids, from one query
+    grouped through bill__member. Payments made after the month ended
+    don't count, so closing a past month again gives the same ledger.
+    Kept apart from ledger_rows so neither sum is multiplied by the other's
+    join.
+    """
+    start, end = month_bounds(year, month)
+    return dict(
+        Payment.objects.filter(bill__member_id__in=member_ids, payment_date__gte=start, payment_date__lt=end)
+        .values('bill__member_id')
+        .annotate(paid=Sum('amount'))
+        .values_list('bill__member_id', 'paid')
+    )
+
+
+def ledger_status():
+    """
+    PaymentRecord.save()'s status rule as an SQL expression over the row.
+    """
+    return Case(
+        # SQLite sums decimals as floats, so allow for rounding noise
+        When(amount_paid__gte=F('amount_due') - TOLERANCE, then=Value('Paid')),
+        When(amount_paid__gt=0, then=Value('Partial')),
+        default=Value('Due'),
+        output_field=CharField(),
+    )
+
+
+def close_month(year, month, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Write one PaymentRecord per active member for the month, walking
+    members in id order. Each chunk is one bills and one payments grouped
+    select, a single bulk_create(update_conflicts=True) on (customer,
+    month, year), and one UPDATE setting status with ledger_status().
+    Running it again refreshes the rows in place. Returns a summary dict.
+    """
+    started = time.perf_counter()
+    rows = ledger_rows(year, month)
+
+    written = 0
+    chunks = 0
+    statuses = dict.fromkeys((status for status, _ in PaymentRecord.STATUS_CHOICES), 0)
+    last_id = 0
+
+    while True:
+        chunk = list(rows.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            break
+        member_ids = [member_id for member_id, _ in chunk]
+        paid = payments_by_member(year, month, member_ids)
+
+        with transaction.atomic():
+            # bulk_create skips PaymentRecord.save(), so status is set in SQL after it
+            PaymentRecord.objects.bulk_create(
+                [
+                    PaymentRecord(customer_id=member_id, year=year, month=month,
+                                  amount_due=due, amount_paid=paid.get(member_id, Decimal('0.00')))
+                    for member_id, due in chunk
+                ],
+                update_conflicts=True,
+                unique_fields=['customer', 'month', 'year'],
+                update_fields=['amount_due', 'amount_paid'],
+            )
+            chunk_records = PaymentRecord.objects.filter(year=year, month=month, customer_id__in=member_ids)
+            chunk_records.update(status=ledger_status())
+            for status, count in chunk_records.values_list('status').annotate(count=Count('id')).order_by():
+                statuses[status] += count
+
+        written += len(chunk)
+        chunks += 1
+        last_id = member_ids[-1]
+
+    elapsed = time.perf_counter() - started
+
+    return {
+        'year': year,
+        'month': month,
+        'records': written,
+        'statuses': statuses,
+        'chunks': chunks,
+        'elapsed_seconds': round(elapsed, 3),
+        'records_per_second': round(written / elapsed, 1) if elapsed else 0.0,
+    }
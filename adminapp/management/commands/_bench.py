@@ -0,0 +1,50 @@
+"""
+Shared helpers for the bench_* management commands.
+"""
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from adminapp.models import Client, Member
+
+
+@contextmanager
+def throwaway_client(keep=False):
+    """
+    Create a uniquely named client for a benchmark run and remove it (with
+    everything it owns) afterwards unless keep is set.
+    """
+    tag = uuid.uuid4().hex[:8]
+    client = Client.objects.create(username=f"bench-{tag}", email=f"bench-{tag}@example.com")
+    try:
+        # APIClient requests are sent with Host: testserver
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            yield client
+    finally:
+        if not keep:
+            # Members (and their bills) first: Subscription is a protected FK
+            Member.objects.filter(client=client).delete()
+            client.delete()
+
+
+def token_for(client):
+    token, _ = Token.objects.get_or_create(user=client)
+    return token.key
+
+
+def api_client(token_key):
+    # One APIClient per thread: it keeps per-instance cookie state
+    api = APIClient()
+    api.credentials(HTTP_AUTHORIZATION=f"Token {token_key}")
+    return api
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
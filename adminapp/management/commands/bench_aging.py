@@ -0,0 +1,57 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from adminapp import synthetic
+from adminapp.aging import REPORT_CACHE_ALIAS
+from adminapp.management.commands._bench import api_client
+
+
+class Command(BaseCommand):
+    help = (
+        "Time GET /receivables/aging/ cold (report rebuilt) and warm (cached) for "
+        "one synthetic client with --members x --bills bills. Generates (and removes) "
+        "its own data set."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--members", type=int, default=50_000)
+        parser.add_argument("--bills", type=int, default=20, help="Monthly bills per member")
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        summary = synthetic.generate(synthetic.Spec(
+            clients=1, members=options["members"], bills=options["bills"], attendance_days=0,
+        ))
+        self.stdout.write(f"generated {summary['rows']['bills']} bills in {time.perf_counter() - started:.0f} s")
+
+        cache = caches[REPORT_CACHE_ALIAS]
+        try:
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"], DEBUG=False):
+                api = api_client(summary["tokens"][0])
+                api.get("/feezy/receivables/aging/")
+
+                cold, warm = [], []
+                for _ in range(options["repeat"]):
+                    cache.clear()
+                    cold.append(self._time(api, "MISS"))
+                    warm.append(self._time(api, "HIT"))
+        finally:
+            synthetic.delete(summary["tag"])
+
+        for name, samples in (("cold", cold), ("warm", warm)):
+            self.stdout.write(
+                f"{name}: median {statistics.median(samples):8.2f} ms  max {max(samples):8.2f} ms"
+            )
+
+    def _time(self, api, expected):
+        started = time.perf_counter()
+        response = api.get("/feezy/receivables/aging/")
+        elapsed = (time.perf_counter() - started) * 1000
+        assert response.status_code == 200 and response["X-Cache"] == expected, response
+        return elapsed
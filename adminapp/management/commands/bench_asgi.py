@@ -0,0 +1,171 @@
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from adminapp import synthetic
+from adminapp.management.commands._bench import percentile
+from adminapp.models import Member
+
+
+# server -> (command, login path, recurring bill path)
+SERVERS = {
+    "wsgi": (
+        ["-m", "gunicorn", "feezy.wsgi:application", "--workers", "{workers}", "--threads", "{threads}"],
+        "/feezy/token/",
+        "/feezy/recurring-bill/{member_id}/",
+    ),
+    "asgi": (
+        ["-m", "uvicorn", "feezy.asgi:application", "--workers", "{workers}", "--no-access-log"],
+        "/feezy/async/token/",
+        "/feezy/async/recurring-bill/{member_id}/",
+    ),
+}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _post(port, path, body, timeout):
+    # Minimal HTTP/1.1 client: one connection per request, read to EOF
+    payload = json.dumps(body).encode()
+    request = (
+        f"POST {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n"
+    ).encode() + payload
+
+    async def exchange():
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            writer.write(request)
+            await writer.drain()
+            response = await reader.read()
+        finally:
+            writer.close()
+        return int(response.split(b" ", 2)[1])
+
+    return await asyncio.wait_for(exchange(), timeout)
+
+
+class Command(BaseCommand):
+    help = (
+        "Start gunicorn (WSGI, sync views) and uvicorn (ASGI, async views) on the "
+        "current database and compare login and recurring-bill throughput and "
+        "latency at rising numbers of concurrent connections."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+        parser.add_argument("--requests", type=int, default=64, help="Requests per endpoint and level")
+        parser.add_argument("--workers", type=int, default=1, help="Server processes (default: %(default)s)")
+        parser.add_argument("--threads", type=int, default=4, help="gunicorn threads per worker (default: %(default)s)")
+        parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+        parser.add_argument("--servers", nargs="+", choices=sorted(SERVERS), default=list(SERVERS))
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+
+    def handle(self, *args, **options):
+        summary = synthetic.generate(synthetic.Spec(clients=1, members=200, bills=0, attendance_days=0))
+        try:
+            username = f"{synthetic.PREFIX}-{summary['tag']}-0"
+            members = Member.objects.filter(client__username=username)
+            # Far enough in the past that every request bills another cycle
+            members.update(recurring_date=timezone.now() - timedelta(days=365 * 20))
+            member_ids = list(members.values_list("id", flat=True))
+
+            results = {}
+            for server in options["servers"]:
+                results[server] = self._bench_server(server, username, member_ids, options)
+        finally:
+            synthetic.delete(summary["tag"])
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2, sort_keys=True))
+            return
+
+        for server, endpoints in results.items():
+            for endpoint, levels in endpoints.items():
+                for concurrency, row in levels.items():
+                    self.stdout.write(
+                        f"{server:<5} {endpoint:<15} c={concurrency:<4} {row['rps']:>8} req/s  "
+                        f"p50 {row['p50_ms']:>9} ms  p99 {row['p99_ms']:>9} ms  errors {row['errors']}"
+                    )
+
+    def _bench_server(self, server, username, member_ids, options):
+        args, login_path, bill_path = SERVERS[server]
+        port = _free_port()
+        command = [sys.executable, *[a.format(**options) for a in args]]
+        command += ["--bind", f"127.0.0.1:{port}"] if server == "wsgi" else ["--port", str(port)]
+
+        process = subprocess.Popen(command, cwd=settings.BASE_DIR,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            self._wait_for(port, process)
+            rng = random.Random(0)
+            requests = {
+                "login": lambda: (login_path, {"username": username, "password": synthetic.PASSWORD}),
+                "recurring_bill": lambda: (bill_path.format(member_id=rng.choice(member_ids)), {}),
+            }
+            return {
+                endpoint: {
+                    concurrency: asyncio.run(self._load(port, make, concurrency, options["requests"], options["timeout"]))
+                    for concurrency in options["concurrency"]
+                }
+                for endpoint, make in requests.items()
+            }
+        finally:
+            process.terminate()
+            process.wait()
+
+    def _wait_for(self, port, process, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f"Server exited with {process.returncode}: {' '.join(process.args)}")
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"Server did not start listening on port {port}")
+
+    async def _load(self, port, make_request, concurrency, total, timeout):
+        latencies = []
+        errors = 0
+        remaining = total
+
+        async def worker():
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                path, body = make_request()
+                started = time.perf_counter()
+                try:
+                    status = await _post(port, path, body, timeout)
+                    if status >= 400:
+                        errors += 1
+                except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        }
@@ -0,0 +1,112 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from adminapp.attendance import batch_month_summary, rebuild_bitmaps
+from adminapp.management.commands._bench import throwaway_client
+from adminapp.models import Attendance, Batch, Member, Subscription
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare monthly attendance analytics (percentage, longest streak, "
+        "3-day absence alerts) from the raw Attendance table against the "
+        "AttendanceMonth bitmaps. Seeds (and removes) a throwaway client."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--members", type=int, default=60)
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with throwaway_client() as client:
+            batch, months = self._seed(client, options["members"], options["days"])
+            rebuild_bitmaps()
+
+            raw_time, raw = self._time(lambda: [self._raw_summary(batch, y, m) for y, m in months], options["repeat"])
+            bit_time, bits = self._time(lambda: [batch_month_summary(batch, y, m) for y, m in months], options["repeat"])
+
+        if raw != bits:
+            raise CommandError("Bitmap results differ from the raw-table results")
+
+        self.stdout.write(f"raw Attendance rows : {raw_time * 1000:8.1f} ms for {len(months)} months")
+        self.stdout.write(f"monthly bitmaps     : {bit_time * 1000:8.1f} ms for {len(months)} months")
+        self.stdout.write(self.style.SUCCESS(f"Speed-up: {raw_time / bit_time:.1f}x, results identical"))
+
+    def _seed(self, client, members, days):
+        subscription = Subscription.objects.create(client=client, name="bench")
+        batch = Batch.objects.create(client=client, name="bench")
+        member_objs = Member.objects.bulk_create(
+            Member(client=client, full_name=f"Member {i}", subscription=subscription, batch_group=batch)
+            for i in range(members)
+        )
+
+        rng = random.Random(42)
+        start = date.today() - timedelta(days=days - 1)
+        Attendance.objects.bulk_create(
+            (
+                Attendance(client=client, batch=batch, member=member, date=start + timedelta(days=d),
+                           present=rng.random() < 0.8)
+                for member in member_objs
+                for d in range(days)
+            ),
+            batch_size=5000,
+        )
+
+        months = sorted({((start + timedelta(days=d)).year, (start + timedelta(days=d)).month) for d in range(days)})
+        return batch, months
+
+    def _time(self, fn, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    def _raw_summary(self, batch, year, month):
+        # The pre-bitmap approach: one row per member per day, folded in Python.
+        # The two days before the 1st only carry an absence run into the month.
+        first = date(year, month, 1)
+        rows = (
+            Attendance.objects.filter(batch=batch, date__gte=first - timedelta(days=2),
+                                      date__lt=(first + timedelta(days=31)).replace(day=1))
+            .order_by("member_id", "date")
+            .values_list("member_id", "date", "present")
+        )
+
+        stats, runs = {}, {}
+        for member_id, day, present in rows:
+            run = runs.setdefault(member_id, {"absent_run": 0, "last_absent": None})
+            if not present:
+                consecutive = run["last_absent"] is not None and day - run["last_absent"] == timedelta(days=1)
+                run["absent_run"] = run["absent_run"] + 1 if consecutive else 1
+                run["last_absent"] = day
+            if day < first:
+                continue
+
+            s = stats.setdefault(member_id, {"marked": 0, "present": 0, "streak": 0, "longest": 0, "alert": False})
+            s["marked"] += 1
+            if present:
+                s["present"] += 1
+                s["streak"] += 1
+                s["longest"] = max(s["longest"], s["streak"])
+            else:
+                s["streak"] = 0
+                s["alert"] = s["alert"] or run["absent_run"] >= 3
+
+        return [
+            {
+                "member": member_id,
+                "days_marked": s["marked"],
+                "days_present": s["present"],
+                "percentage": round(s["present"] * 100 / s["marked"], 1),
+                "longest_streak": s["longest"],
+                "absent_3_in_a_row": s["alert"],
+            }
+            for member_id, s in sorted(stats.items())
+        ]
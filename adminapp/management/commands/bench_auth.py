@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+
+from adminapp.authentication import CachedTokenAuthentication
+from adminapp.management.commands._bench import api_client, throwaway_client, token_for
+from adminapp.models import Batch
+from adminapp.views import BatchCreateListApiView
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare authenticated GET /batch/ throughput with DRF TokenAuthentication "
+        "and CachedTokenAuthentication."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        with throwaway_client() as client:
+            Batch.objects.create(client=client, name="Morning")
+            api = api_client(token_for(client))
+
+            results = {}
+            original = BatchCreateListApiView.authentication_classes
+            try:
+                for auth_class in (TokenAuthentication, CachedTokenAuthentication):
+                    BatchCreateListApiView.authentication_classes = [auth_class]
+                    results[auth_class.__name__] = self._measure(api, options["requests"])
+            finally:
+                BatchCreateListApiView.authentication_classes = original
+
+        baseline = results["TokenAuthentication"][0]
+        for name, (rps, queries) in results.items():
+            self.stdout.write(f"{name:<28} {rps:8.1f} req/s  {queries} queries/request")
+        self.stdout.write(self.style.SUCCESS(
+            f"Speed-up: {results['CachedTokenAuthentication'][0] / baseline:.2f}x"
+        ))
+
+    def _measure(self, api, count):
+        # Warm up (fills the token cache for the cached variant)
+        api.get("/feezy/batch/")
+
+        with CaptureQueriesContext(connection) as queries:
+            api.get("/feezy/batch/")
+        per_request = len(queries)
+
+        started = time.perf_counter()
+        for _ in range(count):
+            api.get("/feezy/batch/")
+        elapsed = time.perf_counter() - started
+
+        return count / elapsed, per_request
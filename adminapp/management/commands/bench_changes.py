@@ -0,0 +1,59 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from adminapp import synthetic
+from adminapp.management.commands._bench import api_client
+from adminapp.models import Bill
+
+
+class Command(BaseCommand):
+    help = (
+        "Time a full initial sync through GET /changes/ for synthetic clients of "
+        "increasing size, then an incremental sync after a fixed number of payments. "
+        "Generates (and removes) its own data sets."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--members", type=int, nargs="+", default=[1000, 10000])
+        parser.add_argument("--changes", type=int, default=50, help="Payments made before the incremental sync")
+        parser.add_argument("--limit", type=int, default=500, help="Entries per page")
+
+    def handle(self, *args, **options):
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"], DEBUG=False):
+            for members in options["members"]:
+                summary = synthetic.generate(synthetic.Spec(clients=1, members=members, bills=3, attendance_days=10))
+                try:
+                    api = api_client(summary["tokens"][0])
+
+                    cursor, pages, rows, elapsed = self._sync(api, 0, options["limit"])
+                    self.stdout.write(
+                        f"{members:>7} members  initial: {rows:>8} rows in {pages:>5} pages  "
+                        f"{elapsed * 1000:9.1f} ms  {rows / elapsed:>8.0f} rows/s"
+                    )
+
+                    bills = Bill.objects.filter(member__client__username__startswith=f"synthetic-{summary['tag']}-")
+                    for bill_id in bills.values_list("id", flat=True)[:options["changes"]]:
+                        api.post("/feezy/payments/", {"bill": bill_id, "amount": "1.00", "payment_method": "CASH"},
+                                 format="json")
+
+                    _, pages, rows, elapsed = self._sync(api, cursor, options["limit"])
+                    self.stdout.write(
+                        f"{'':>15} after {options['changes']} payments: {rows:>5} rows in {pages} pages  "
+                        f"{elapsed * 1000:9.1f} ms"
+                    )
+                finally:
+                    synthetic.delete(summary["tag"])
+
+    def _sync(self, api, cursor, limit):
+        pages = rows = 0
+        started = time.perf_counter()
+        while True:
+            data = api.get("/feezy/changes/", {"since": cursor, "limit": limit}).json()
+            pages += 1
+            rows += sum(len(feed["updated"]) + len(feed["deleted"]) for feed in data["changes"].values())
+            cursor = data["cursor"]
+            if not data["has_more"]:
+                return cursor, pages, rows, time.perf_counter() - started
@@ -0,0 +1,170 @@
+import json
+import random
+import subprocess
+import threading
+import time
+from dataclasses import fields
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from adminapp import synthetic
+from adminapp.management.commands._bench import api_client, percentile
+from adminapp.models import Batch, Bill
+
+
+API = "/feezy/"
+
+# Version of the JSON layout below; bump it when fields change meaning
+SCHEMA = 1
+
+
+def _payment(api, ctx, rng):
+    return api.post(API + "payments/", {
+        "bill": rng.choice(ctx["bills"]),
+        "amount": "1.00",
+        "payment_method": "CASH",
+    }, format="json")
+
+
+# name -> request(api, ctx, rng); ctx holds the calling client's ids
+ENDPOINTS = {
+    "member_list": lambda api, ctx, rng: api.get(API + "members/"),
+    "member_list_active": lambda api, ctx, rng: api.get(API + "members/?is_active=true"),
+    "batch_list": lambda api, ctx, rng: api.get(API + "batch/"),
+    "subscription_list": lambda api, ctx, rng: api.get(API + "subscriptions/"),
+    "bill_list": lambda api, ctx, rng: api.get(API + "bills/"),
+    "payment_list": lambda api, ctx, rng: api.get(API + "payments/"),
+    "receivables": lambda api, ctx, rng: api.get(API + "receivables/"),
+    "attendance_summary": lambda api, ctx, rng: api.get(
+        API + f"attendance/summary/?batch={rng.choice(ctx['batches'])}"
+    ),
+    "payment_create": _payment,
+    "login": lambda api, ctx, rng: api.post(API + "token/", {
+        "username": ctx["username"], "password": synthetic.PASSWORD,
+    }, format="json"),
+}
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic data set, then drive the real /feezy/ routes with N "
+        "concurrent token-authenticated clients and report per-endpoint "
+        "p50/p95/p99 latency and requests per second as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=4, help="Threads per endpoint (default: %(default)s)")
+        parser.add_argument("--requests", type=int, default=200,
+                            help="Requests per endpoint, split across threads (default: %(default)s)")
+        parser.add_argument("--endpoints", nargs="+", choices=sorted(ENDPOINTS), default=list(ENDPOINTS))
+        parser.add_argument("--output", help="Also write the JSON report to this file")
+        parser.add_argument("--keep", action="store_true", help="Keep the generated data set")
+        for field in fields(synthetic.Spec):
+            parser.add_argument(f"--{field.name.replace('_', '-')}", type=int, default=field.default)
+
+    def handle(self, *args, **options):
+        spec = synthetic.Spec(**{field.name: options[field.name] for field in fields(synthetic.Spec)})
+        if options["concurrency"] < 1 or options["requests"] < 1:
+            raise CommandError("--concurrency and --requests must be positive")
+
+        summary = synthetic.generate(spec)
+        try:
+            contexts = self._contexts(summary)
+            # APIClient requests are sent with Host: testserver
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+                results = {
+                    name: self._run(ENDPOINTS[name], contexts, options["concurrency"], options["requests"], spec.seed)
+                    for name in options["endpoints"]
+                }
+        finally:
+            if not options["keep"]:
+                synthetic.delete(summary["tag"])
+
+        report = {
+            "schema": SCHEMA,
+            "revision": git_revision(),
+            "date": date.today().isoformat(),
+            "database": connection.vendor,
+            "config": {
+                "concurrency": options["concurrency"],
+                "requests": options["requests"],
+                "spec": summary["spec"],
+            },
+            "rows": summary["rows"],
+            "endpoints": results,
+        }
+        output = json.dumps(report, indent=2, sort_keys=True)
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+        self.stdout.write(output)
+
+    def _contexts(self, summary):
+        contexts = []
+        for c, key in enumerate(summary["tokens"]):
+            username = f"{synthetic.PREFIX}-{summary['tag']}-{c}"
+            contexts.append({
+                "token": key,
+                "username": username,
+                "batches": list(Batch.objects.filter(client__username=username).values_list("id", flat=True)),
+                "bills": list(Bill.objects.filter(member__client__username=username).values_list("id", flat=True)[:500]),
+            })
+        return contexts
+
+    def _run(self, request, contexts, concurrency, total, seed):
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+
+        def worker(index, count):
+            rng = random.Random(seed + index)
+            ctx = contexts[index % len(contexts)]
+            api = api_client(ctx["token"])
+            mine, failed = [], 0
+            try:
+                for _ in range(count):
+                    started = time.perf_counter()
+                    response = request(api, ctx, rng)
+                    mine.append(time.perf_counter() - started)
+                    if response.status_code >= 400:
+                        failed += 1
+            finally:
+                # Each thread opened its own connection
+                connection.close()
+            with lock:
+                latencies.extend(mine)
+                errors.append(failed)
+
+        shares = [total // concurrency + (i < total % concurrency) for i in range(concurrency)]
+        threads = [threading.Thread(target=worker, args=(i, n)) for i, n in enumerate(shares) if n]
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        return {
+            "requests": len(latencies),
+            "errors": sum(errors),
+            "rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        }
@@ -0,0 +1,67 @@
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from adminapp import synthetic
+from adminapp.exports import EXPORTS
+from adminapp.management.commands._bench import api_client
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream each CSV export for synthetic clients of increasing size and report "
+        "time to first byte, rows/s and peak traced memory. Generates (and removes) "
+        "its own data sets."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--members", type=int, nargs="+", default=[1000, 10000],
+                            help="Members per run; each gets --bills bills and payments")
+        parser.add_argument("--bills", type=int, default=12)
+
+    def handle(self, *args, **options):
+        # APIClient requests are sent with Host: testserver; DEBUG would log every query
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"], DEBUG=False):
+            for members in options["members"]:
+                summary = synthetic.generate(synthetic.Spec(
+                    clients=1, members=members, bills=options["bills"], attendance_days=0,
+                ))
+                try:
+                    api = api_client(summary["tokens"][0])
+                    for kind in EXPORTS:
+                        first_byte, rows, size, elapsed = self._stream(api, kind)
+                        # Separate pass: tracing slows Python down too much to time it
+                        tracemalloc.start()
+                        try:
+                            self._stream(api, kind)
+                            peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+                        finally:
+                            tracemalloc.stop()
+
+                        self.stdout.write(
+                            f"{members:>7} members  {kind:<9} {rows:>8} rows  "
+                            f"first byte {first_byte * 1000:7.2f} ms  {rows / elapsed:>9.0f} rows/s  "
+                            f"{size / 2 ** 20:6.1f} MB  peak traced {peak:5.1f} MB"
+                        )
+                finally:
+                    synthetic.delete(summary["tag"])
+
+    def _stream(self, api, kind):
+        started = time.perf_counter()
+        response = api.get(f"/feezy/export/{kind}/")
+        chunks = iter(response.streaming_content)
+
+        first = next(chunks)
+        first_byte = time.perf_counter() - started
+
+        size = len(first)
+        lines = first.count(b"\n")
+        for chunk in chunks:
+            size += len(chunk)
+            lines += chunk.count(b"\n")
+        response.close()
+
+        return first_byte, lines - 1, size, time.perf_counter() - started
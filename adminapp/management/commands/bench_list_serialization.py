@@ -0,0 +1,78 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from adminapp import synthetic
+from adminapp.management.commands._bench import api_client
+from adminapp.models import Client, Member
+from adminapp.serializers import MemberSerializer
+from adminapp.sparse import RowSerializer, values_plan
+
+
+class Command(BaseCommand):
+    help = (
+        "Rows/s for a synthetic client's member list: MemberSerializer over model "
+        "instances (before) against RowSerializer over .values() rows (after), with "
+        "all fields and with a sparse ?fields= set, plus a paged walk through "
+        "GET /members/. Generates (and removes) its own data set."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--members", type=int, default=10_000)
+        parser.add_argument("--fields", default="id,full_name,outstanding_fee,recurring_date")
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        summary = synthetic.generate(synthetic.Spec(
+            clients=1, members=options["members"], bills=0, attendance_days=0,
+        ))
+        try:
+            client = Client.objects.get(username__startswith=f"{synthetic.PREFIX}-{summary['tag']}-")
+            queryset = Member.objects.filter(client=client).order_by("-created_at", "-id")
+            sparse = tuple(options["fields"].split(","))
+
+            runs = {
+                "ModelSerializer, all fields": lambda: MemberSerializer(list(queryset), many=True).data,
+                f"ModelSerializer, fields={options['fields']}": lambda: self._model_sparse(queryset, sparse),
+                "RowSerializer, all fields": lambda: self._rows(queryset, None),
+                f"RowSerializer, fields={options['fields']}": lambda: self._rows(queryset, sparse),
+            }
+            for label, run in runs.items():
+                self._report(label, run, options["repeat"])
+
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"], DEBUG=False):
+                api = api_client(summary["tokens"][0])
+                for params in ({}, {"fields": options["fields"]}):
+                    self._report(f"GET /members/ pages of 500 {params}", lambda: self._walk(api, params), options["repeat"])
+        finally:
+            synthetic.delete(summary["tag"])
+
+    def _model_sparse(self, queryset, names):
+        # A sparse fieldset without the row path: fewer fields, same instances and per-field dispatch
+        meta = type("Meta", (MemberSerializer.Meta,), {"fields": names})
+        serializer_class = type("SparseMemberSerializer", (MemberSerializer,), {"Meta": meta})
+        return serializer_class(list(queryset), many=True).data
+
+    def _rows(self, queryset, names):
+        plan = values_plan(MemberSerializer, names)
+        return RowSerializer(list(queryset.values(*{column for _, column, _ in plan})), many=True, plan=plan).data
+
+    def _walk(self, api, params):
+        rows, cursor_url = [], "/feezy/members/"
+        query = {"page_size": 500, **params}
+        while cursor_url:
+            data = api.get(cursor_url, query).json()
+            rows.extend(data["results"])
+            cursor_url, query = data["next"], {}
+        return rows
+
+    def _report(self, label, run, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            rows = len(run())
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        self.stdout.write(f"{label:<70} {rows:>7} rows  {best * 1000:8.1f} ms  {rows / best:>9.0f} rows/s")
@@ -0,0 +1,110 @@
+import csv
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from adminapp.management.commands._bench import api_client, throwaway_client, token_for
+from adminapp.member_import import import_members
+from adminapp.models import Batch, Subscription
+
+
+COLUMNS = ["full_name", "gender", "contact_number", "email", "subscription", "batch_group", "recurring_date"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Import generated member CSVs of increasing size and report rows/s and peak "
+        "traced memory, plus the per-row POST /members/ rate for comparison. "
+        "Seeds (and removes) throwaway clients."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+        parser.add_argument("--today-ratio", type=float, default=0.1,
+                            help="Share of rows whose recurring_date is today (get a joining bill)")
+        parser.add_argument("--error-ratio", type=float, default=0.01, help="Share of invalid rows")
+        parser.add_argument("--per-row-sample", type=int, default=300,
+                            help="Members created one request at a time for the baseline")
+
+    def handle(self, *args, **options):
+        for rows in options["rows"]:
+            with tempfile.NamedTemporaryFile("w+", suffix=".csv", newline="") as f:
+                self._write_csv(f, rows, options["today_ratio"], options["error_ratio"])
+                f.flush()
+
+                summary = self._import(f.name, traced=False)
+                self.stdout.write(
+                    f"{rows:>7} rows: {summary['rows_per_second']:>9} rows/s  "
+                    f"{summary['members_created']} members, {summary['bills_created']} bills, "
+                    f"{summary['error_count']} errors"
+                )
+                peak = self._import(f.name, traced=True)["peak_mb"]
+                self.stdout.write(f"{'':>13} peak traced memory {peak:.1f} MB")
+
+        baseline = self._per_row(options["per_row_sample"])
+        self.stdout.write(self.style.SUCCESS(f"per-row POST /members/ baseline: {baseline:.1f} rows/s"))
+
+    def _write_csv(self, f, rows, today_ratio, error_ratio):
+        rng = random.Random(42)
+        today = timezone.now()
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for i in range(rows):
+            if rng.random() < today_ratio:
+                recurring = today
+            else:
+                recurring = today + timedelta(days=rng.randrange(1, 28))
+            writer.writerow([
+                f"Member {i}", rng.choice("MFO"), f"9{rng.randrange(10 ** 9):09d}", f"member{i}@example.com",
+                # Unknown plans make the invalid rows
+                "Monthly" if rng.random() >= error_ratio else "Missing plan",
+                rng.choice(("Morning", "Evening", "")),
+                recurring.isoformat(),
+            ])
+
+    def _import(self, path, traced):
+        # DEBUG keeps every executed statement in connection.queries
+        with throwaway_client() as client, override_settings(DEBUG=False):
+            self._plans(client)
+            if traced:
+                tracemalloc.start()
+            try:
+                with open(path, "rb") as stream:
+                    summary = import_members(client, stream)
+                if traced:
+                    summary["peak_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            finally:
+                if traced:
+                    tracemalloc.stop()
+        return summary
+
+    def _plans(self, client):
+        subscription = Subscription.objects.create(
+            client=client, name="Monthly", admission_fee=500,
+            custom_fees=[{"name": "Tuition", "value": 1500, "recurring": True}],
+        )
+        Batch.objects.bulk_create([Batch(client=client, name="Morning"), Batch(client=client, name="Evening")])
+        return subscription
+
+    def _per_row(self, count):
+        with throwaway_client() as client:
+            subscription = self._plans(client)
+            api = api_client(token_for(client))
+            now = timezone.now().isoformat()
+
+            started = time.perf_counter()
+            for i in range(count):
+                api.post("/feezy/members/", {
+                    "client": client.id, "full_name": f"Member {i}", "subscription": subscription.id,
+                    "recurring_date": now,
+                }, format="json")
+            elapsed = time.perf_counter() - started
+            connection.close()
+        return count / elapsed
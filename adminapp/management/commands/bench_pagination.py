@@ -0,0 +1,81 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from adminapp.management.commands._bench import api_client, throwaway_client, token_for
+from adminapp.models import Bill, Member, Payment, Subscription
+
+
+CHECKPOINTS = (1, 10, 100, 250, 500, 1000)
+
+
+class Command(BaseCommand):
+    help = (
+        "Walk the /members/, /bills/ and /payments/ cursor pages from page 1 to "
+        "page 1000 and report the latency at each checkpoint. Seeds (and removes) "
+        "a throwaway client with one payment and one bill per member, all bills "
+        "from one recurring run (one shared bill_date)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=50)
+        parser.add_argument("--pages", type=int, default=1000)
+        parser.add_argument("--keep", action="store_true", help="Keep the generated rows")
+
+    def handle(self, *args, **options):
+        page_size = options["page_size"]
+        pages = options["pages"]
+
+        with throwaway_client(keep=options["keep"]) as client:
+            subscription = Subscription.objects.create(client=client, name="bench")
+            members = Member.objects.bulk_create(
+                (Member(client=client, full_name=f"Member {i}", subscription=subscription)
+                 for i in range(page_size * pages)),
+                batch_size=5000,
+            )
+            # one recurring run: every bill shares its bill_date
+            run_date = timezone.now()
+            bills = Bill.objects.bulk_create(
+                (Bill(member=member, client=client, subscription=subscription, bill_date=run_date)
+                 for member in members),
+                batch_size=5000,
+            )
+            Payment.objects.bulk_create(
+                (Payment(bill=bill, client=client, amount=0, payment_method="CASH") for bill in bills),
+                batch_size=5000,
+            )
+
+            api = api_client(token_for(client))
+            results = {
+                name: self._walk(api, f"/feezy/{name}/?page_size={page_size}", pages)
+                for name in ("members", "bills", "payments")
+            }
+
+            connection.close()
+
+        for name, latencies in results.items():
+            self.stdout.write(f"/{name}/")
+            for page, elapsed in latencies.items():
+                self.stdout.write(f"  page {page:>5}: {elapsed * 1000:7.2f} ms")
+
+            first = latencies[min(latencies)]
+            last = latencies[max(latencies)]
+            self.stdout.write(self.style.SUCCESS(
+                f"  page {max(latencies)} / page 1 latency ratio: {last / first:.2f}x"
+            ))
+
+    def _walk(self, api, url, pages):
+        latencies = {}
+        for page in range(1, pages + 1):
+            started = time.perf_counter()
+            response = api.get(url)
+            elapsed = time.perf_counter() - started
+
+            if page in CHECKPOINTS:
+                latencies[page] = elapsed
+            url = response.json()["next"]
+            if not url:
+                break
+        return latencies
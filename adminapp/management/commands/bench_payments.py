@@ -0,0 +1,81 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+
+from adminapp.management.commands._bench import api_client, percentile, throwaway_client, token_for
+from adminapp.models import Bill, Member, Payment, Subscription
+
+
+class Command(BaseCommand):
+    help = (
+        "Post concurrent payments to PaymentListCreateView and check throughput "
+        "and that the final bill totals are exact. Creates (and removes) its own "
+        "throwaway client in the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--payments", type=int, default=2000)
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--bills", type=int, default=4, help="Bills the payments are spread across")
+        parser.add_argument("--amount", type=Decimal, default=Decimal("1.25"))
+        parser.add_argument("--keep", action="store_true", help="Keep the generated rows")
+
+    def handle(self, *args, **options):
+        with throwaway_client(keep=options["keep"]) as client:
+            bill_ids = self._seed(client, options["bills"], options["payments"], options["amount"])
+            self._run(client, bill_ids, options)
+
+    def _seed(self, client, bills, payments, amount):
+        subscription = Subscription.objects.create(client=client, name="bench")
+        member = Member.objects.create(client=client, full_name="bench", subscription=subscription)
+        total = amount * payments
+        return [
+            Bill.objects.create(member=member, subscription=subscription, total_amount=total).id
+            for _ in range(bills)
+        ]
+
+    def _run(self, client, bill_ids, options):
+        payments = options["payments"]
+        amount = options["amount"]
+        token_key = token_for(client)
+
+        def post(i):
+            api = api_client(token_key)
+            started = time.perf_counter()
+            response = api.post(
+                "/feezy/payments/",
+                {"bill": bill_ids[i % len(bill_ids)], "amount": str(amount), "payment_method": "CASH"},
+                format="json",
+            )
+            elapsed = time.perf_counter() - started
+            connection.close()
+            return response.status_code, elapsed
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["threads"]) as pool:
+            results = list(pool.map(post, range(payments)))
+        wall = time.perf_counter() - started
+
+        ok = sum(1 for code, _ in results if code == 201)
+        p99 = percentile([elapsed for _, elapsed in results], 99)
+
+        self.stdout.write(
+            f"{ok}/{payments} payments accepted in {wall:.2f}s "
+            f"({ok / wall:.1f} payments/s, p99 {p99 * 1000:.1f} ms, {options['threads']} threads)"
+        )
+
+        # Every accepted payment must be reflected exactly once on its bill
+        mismatches = []
+        for bill in Bill.objects.filter(id__in=bill_ids):
+            paid = Payment.objects.filter(bill=bill).aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
+            if bill.paid_amount != paid or bill.due_amount != bill.total_amount - paid:
+                mismatches.append(f"bill {bill.id}: paid {bill.paid_amount} vs {paid}, due {bill.due_amount}")
+
+        if mismatches:
+            raise CommandError("Bill totals drifted:\n" + "\n".join(mismatches))
+
+        self.stdout.write(self.style.SUCCESS("Bill totals are exact"))
@@ -0,0 +1,148 @@
+import json
+import multiprocessing
+import random
+import tempfile
+import time
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections
+
+from adminapp.management.commands._bench import percentile
+from adminapp.models import Bill, Client, Member, Payment, Subscription
+
+
+# "default" is what Django does with no OPTIONS: rollback journal, deferred
+# transactions and a 5 second busy timeout.
+MODES = {
+    "default": {"OPTIONS": {}, "CONN_MAX_AGE": 0},
+    "concurrent": {"OPTIONS": settings.SQLITE_OPTIONS, "CONN_MAX_AGE": 600},
+}
+
+MEMBERS = 500
+BILLS = 200
+
+
+def _use_database(path, mode):
+    # Runs in a forked child: point the default alias at the scratch file
+    connections.close_all()
+    settings_dict = connections["default"].settings_dict
+    settings_dict["NAME"] = str(path)
+    settings_dict.update(MODES[mode])
+
+
+def _seed(path, mode):
+    _use_database(path, mode)
+    call_command("migrate", verbosity=0)
+
+    client = Client.objects.create(username="bench", email="bench@example.com")
+    subscription = Subscription.objects.create(client=client, name="bench")
+    members = Member.objects.bulk_create(
+        Member(client=client, full_name=f"Member {i}", subscription=subscription) for i in range(MEMBERS)
+    )
+    Bill.objects.bulk_create(
+        Bill(member=members[i % MEMBERS], client_id=members[i % MEMBERS].client_id, subscription=subscription,
+             total_amount=Decimal("1000.00"), due_amount=Decimal("1000.00"))
+        for i in range(BILLS)
+    )
+    connections.close_all()
+
+
+def _worker(args):
+    path, mode, seconds, write_ratio, seed = args
+    _use_database(path, mode)
+
+    rng = random.Random(seed)
+    client_id = Client.objects.values_list("id", flat=True).get()
+    bill_ids = list(Bill.objects.values_list("id", flat=True))
+
+    latencies = []
+    lock_errors = 0
+    reads = writes = 0
+    deadline = time.perf_counter() + seconds
+
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            roll = rng.random()
+            if roll < write_ratio / 2:
+                # insert + F() update
+                Payment(bill_id=rng.choice(bill_ids), amount=Decimal("1.00"), payment_method="CASH").save()
+                writes += 1
+            elif roll < write_ratio:
+                # read-then-write transaction (Bill.save reads the previous due first)
+                bill = Bill.objects.get(pk=rng.choice(bill_ids))
+                bill.total_amount += 1
+                bill.save()
+                writes += 1
+            else:
+                list(Member.objects.filter(client_id=client_id).order_by("-created_at")[:50])
+                reads += 1
+        except OperationalError as e:
+            if "locked" not in str(e):
+                raise
+            lock_errors += 1
+        latencies.append(time.perf_counter() - started)
+
+    connections.close_all()
+    return {"reads": reads, "writes": writes, "lock_errors": lock_errors, "latencies": latencies}
+
+
+class Command(BaseCommand):
+    help = (
+        "Run N processes of mixed reads and payment writes against a scratch SQLite "
+        "database, with Django's default SQLite settings and with SQLITE_OPTIONS "
+        "(WAL, busy timeout, IMMEDIATE transactions). Reports lock errors and latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=8)
+        parser.add_argument("--seconds", type=float, default=10.0)
+        parser.add_argument("--write-ratio", type=float, default=0.3)
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+
+    def handle(self, *args, **options):
+        ctx = multiprocessing.get_context("fork")
+        connections.close_all()
+        results = {}
+
+        with tempfile.TemporaryDirectory() as tmp:
+            for mode in MODES:
+                path = Path(tmp) / f"{mode}.sqlite3"
+
+                seeder = ctx.Process(target=_seed, args=(path, mode))
+                seeder.start()
+                seeder.join()
+
+                jobs = [
+                    (path, mode, options["seconds"], options["write_ratio"], seed)
+                    for seed in range(options["processes"])
+                ]
+                with ctx.Pool(options["processes"]) as pool:
+                    runs = pool.map(_worker, jobs)
+
+                latencies = [value for run in runs for value in run["latencies"]]
+                ops = sum(run["reads"] + run["writes"] for run in runs)
+                results[mode] = {
+                    "processes": options["processes"],
+                    "reads": sum(run["reads"] for run in runs),
+                    "writes": sum(run["writes"] for run in runs),
+                    "lock_errors": sum(run["lock_errors"] for run in runs),
+                    "ops_per_second": round(ops / options["seconds"], 1),
+                    "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+                    "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+                }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        for mode, row in results.items():
+            self.stdout.write(
+                f"{mode:<11} {row['ops_per_second']:>9} ops/s  reads {row['reads']:>7}  "
+                f"writes {row['writes']:>6}  lock errors {row['lock_errors']:>5}  "
+                f"p50 {row['p50_ms']:>7} ms  p99 {row['p99_ms']:>8} ms"
+            )
@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from dateutil.relativedelta import relativedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from adminapp.ledger import DEFAULT_CHUNK_SIZE, close_month
+
+
+class Command(BaseCommand):
+    help = "Build (or refresh) the PaymentRecord ledger row of every active member for one month."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--month",
+            help="Month to close as YYYY-MM (default: the previous month)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Members written per upsert (default: %(default)s)",
+        )
+
+    def handle(self, *args, **options):
+        if options["month"]:
+            try:
+                month = datetime.strptime(options["month"], "%Y-%m").date()
+            except ValueError:
+                raise CommandError("--month must look like YYYY-MM")
+        else:
+            month = timezone.localdate().replace(day=1) - relativedelta(months=1)
+
+        summary = close_month(month.year, month.month, chunk_size=options["chunk_size"])
+
+        statuses = ", ".join(f"{count} {status}" for status, count in summary["statuses"].items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Closed {summary['year']}-{summary['month']:02d}: {summary['records']} records ({statuses}) "
+            f"in {summary['elapsed_seconds']}s over {summary['chunks']} chunks "
+            f"- {summary['records_per_second']} records/s"
+        ))
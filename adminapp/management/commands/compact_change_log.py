@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from adminapp.models import Change
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete change log entries superseded by a later entry for the same row. "
+        "Every cursor still sees each row's latest change, so syncs stay correct."
+    )
+
+    def handle(self, *args, **options):
+        latest = Change.objects.values('kind', 'object_id').annotate(latest=Max('id')).values('latest')
+        deleted, _ = Change.objects.exclude(id__in=latest).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} superseded change log entries"))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from adminapp.expiry import DEFAULT_CHUNK_SIZE, expire_subscriptions
+
+
+class Command(BaseCommand):
+    help = "Deactivate clients past subscription_end and revoke their API tokens."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Clients deactivated per transaction (default: %(default)s)",
+        )
+
+    def handle(self, *args, **options):
+        summary = expire_subscriptions(chunk_size=options["chunk_size"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Deactivated {summary['clients_deactivated']} clients and revoked "
+            f"{summary['tokens_revoked']} tokens in {summary['elapsed_seconds']}s"
+        ))
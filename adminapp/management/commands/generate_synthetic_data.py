@@ -0,0 +1,44 @@
+import time
+from dataclasses import fields
+
+from django.core.management.base import BaseCommand
+
+from adminapp import synthetic
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-insert synthetic clients, subscriptions (with custom_fees), batches, "
+        "members, bills, payments and attendance for load testing. Client usernames "
+        f"start with '{synthetic.PREFIX}-<tag>-' and share the password '{synthetic.PASSWORD}'."
+    )
+
+    def add_arguments(self, parser):
+        for field in fields(synthetic.Spec):
+            parser.add_argument(
+                f"--{field.name.replace('_', '-')}",
+                type=int,
+                default=field.default,
+                help="(default: %(default)s)",
+            )
+        parser.add_argument("--tag", help="Name for this data set (default: random)")
+        parser.add_argument("--delete", action="store_true",
+                            help="Remove synthetic data (the --tag set, or all of it) instead of generating")
+
+    def handle(self, *args, **options):
+        if options["delete"]:
+            count = synthetic.delete(options["tag"])
+            self.stdout.write(self.style.SUCCESS(f"Deleted {count} synthetic clients"))
+            return
+
+        spec = synthetic.Spec(**{field.name: options[field.name] for field in fields(synthetic.Spec)})
+
+        started = time.perf_counter()
+        summary = synthetic.generate(spec, tag=options["tag"])
+        elapsed = time.perf_counter() - started
+
+        rows = summary["rows"]
+        self.stdout.write(", ".join(f"{count} {name}" for name, count in rows.items()))
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated data set '{summary['tag']}': {sum(rows.values())} rows in {elapsed:.1f}s"
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from adminapp.attendance import REBUILD_CHUNK_SIZE, rebuild_bitmaps
+
+
+class Command(BaseCommand):
+    help = "Rebuild the monthly attendance bitmaps (AttendanceMonth) from the Attendance table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=REBUILD_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = rebuild_bitmaps(chunk_size=options["chunk_size"])
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} monthly attendance rows"))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from adminapp.receivables import client_drift, member_drift, recompute
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Member.outstanding_fee and Client.outstanding_receivables from "
+        "Bill.due_amount and report any drift from the incrementally kept values."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Overwrite drifted rows with the recomputed values")
+        parser.add_argument("--show", type=int, default=20, help="Drifted rows to list per table")
+
+    def handle(self, *args, **options):
+        members = list(member_drift().values_list("id", "outstanding_fee", "expected"))
+        clients = list(client_drift().values_list("id", "outstanding_receivables", "expected"))
+
+        for label, rows in (("member", members), ("client", clients)):
+            for pk, stored, expected in rows[:options["show"]]:
+                self.stdout.write(f"{label} {pk}: stored {stored}, expected {expected}")
+
+        if options["fix"] and (members or clients):
+            with transaction.atomic():
+                recompute(
+                    member_ids=[pk for pk, _, _ in members],
+                    client_ids=[pk for pk, _, _ in clients],
+                )
+
+        style = self.style.WARNING if members or clients else self.style.SUCCESS
+        self.stdout.write(style(
+            f"{len(members)} members and {len(clients)} clients drifted"
+            + (" (fixed)" if options["fix"] and (members or clients) else "")
+        ))
@@ -0,0 +1,51 @@
+from datetime import date
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from adminapp.currency import load_dataset, write_dataset
+
+
+ALL_COUNTRIES_URL = "https://restcountries.com/v3.1/all?fields=cca2,cca3,currencies"
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the bundled country/currency dataset from restcountries.com. "
+        "Run by hand and commit the result; registration never calls the API."
+    )
+
+    def handle(self, *args, **options):
+        try:
+            response = requests.get(ALL_COUNTRIES_URL, timeout=30)
+            response.raise_for_status()
+            countries_json = response.json()
+        except Exception as e:
+            raise CommandError(f"Could not fetch country data: {e}")
+
+        current = load_dataset()
+        countries = {}
+        currencies = {code: dict(value) for code, value in current['currencies'].items()}
+
+        for country in countries_json:
+            country_currencies = country.get("currencies") or {}
+            if not country_currencies:
+                continue
+
+            code = next(iter(country_currencies))
+            countries[country["cca2"]] = {"alpha3": country["cca3"], "currency": code}
+
+            # Keep curated symbols; only fill in currencies we have never seen
+            symbol = country_currencies[code].get("symbol") or code
+            currencies.setdefault(code, {"symbol": symbol[:5]})
+
+        write_dataset({
+            "version": date.today().strftime("%Y.%m"),
+            "source": ALL_COUNTRIES_URL,
+            "countries": countries,
+            "currencies": currencies,
+        })
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {len(countries)} countries and {len(currencies)} currencies"
+        ))
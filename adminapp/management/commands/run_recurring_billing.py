@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from adminapp.billing import DEFAULT_CHUNK_SIZE, run_recurring_billing
+
+
+class Command(BaseCommand):
+    help = "Generate recurring bills for every due member across all clients."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Members billed per transaction (default: %(default)s)",
+        )
+
+    def handle(self, *args, **options):
+        summary = run_recurring_billing(chunk_size=options["chunk_size"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Billed {summary['bills_created']} of {summary['members_due']} due members "
+            f"({summary['skipped_already_billed']} already billed) in "
+            f"{summary['elapsed_seconds']}s over {summary['chunks']} chunks "
+            f"- {summary['bills_per_second']} bills/s"
+        ))
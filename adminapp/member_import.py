@@ -0,0 +1,133 @@
+import csv
+import io
+import time
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import serializers
+
+from adminapp.models import Batch, Bill, Change, Client, Member, Subscription, change_entries, version_bumps
+from adminapp.serializers import KOLKATA, MemberImportSerializer
+
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Rows listed in the response; the total error count is always reported
+MAX_REPORTED_ERRORS = 1000
+
+REQUIRED_COLUMNS = {'full_name', 'subscription'}
+
+
+class MemberImportError(ValueError):
+    """
+    The file as a whole can't be read (encoding, missing columns). Chunks
+    saved before the failing line stay saved.
+    """
+
+
+def _lookups(objects):
+    lookups = {}
+    for obj in objects:
+        if obj.name:
+            lookups.setdefault(obj.name.strip().lower(), obj)
+        lookups[str(obj.id)] = obj
+    return lookups
+
+
+def import_members(client, stream, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False):
+    """
+    Create members for client from a CSV byte stream, reading and writing
+    chunk_size rows at a time so memory stays flat however long the file is.
+
+    Rows are validated with one reused MemberImportSerializer against the
+    client's subscriptions and batches, loaded once. Valid rows are saved
+    with bulk_create, one transaction per chunk, together with the joining
+    bill for members whose recurring_date is today (the rule in
+    MemberSerializer.create). Invalid rows are skipped and reported by line.
+    """
+    started = time.perf_counter()
+    try:
+        reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+        columns = set(reader.fieldnames or ())
+    except UnicodeDecodeError:
+        raise MemberImportError("The file must be UTF-8 encoded CSV.")
+
+    missing = REQUIRED_COLUMNS - columns
+    if missing:
+        raise MemberImportError(f"Missing required columns: {', '.join(sorted(missing))}.")
+
+    validator = MemberImportSerializer(context={
+        'subscriptions': _lookups(Subscription.objects.filter(client=client)),
+        'batches': _lookups(Batch.objects.filter(client=client)),
+    })
+
+    summary = {'rows': 0, 'members_created': 0, 'bills_created': 0, 'error_count': 0, 'errors': []}
+    chunk = []
+
+    try:
+        for row in reader:
+            summary['rows'] += 1
+            # Blank cells mean "not given", not an empty value
+            data = {key: value for key, value in row.items() if key and value not in (None, '')}
+            try:
+                chunk.append(validator.run_validation(data))
+            except serializers.ValidationError as e:
+                summary['error_count'] += 1
+                if len(summary['errors']) < MAX_REPORTED_ERRORS:
+                    summary['errors'].append({'line': reader.line_num, 'errors': e.detail})
+
+            if len(chunk) >= chunk_size:
+                _save_chunk(client, chunk, summary, dry_run)
+                chunk = []
+    except UnicodeDecodeError:
+        raise MemberImportError(f"Line {reader.line_num + 1} is not valid UTF-8.")
+    except csv.Error as e:
+        raise MemberImportError(f"Line {reader.line_num}: {e}")
+
+    if chunk:
+        _save_chunk(client, chunk, summary, dry_run)
+
+    elapsed = time.perf_counter() - started
+    summary['elapsed_seconds'] = round(elapsed, 3)
+    summary['rows_per_second'] = round(summary['rows'] / elapsed, 1) if elapsed else None
+    return summary
+
+
+def _save_chunk(client, rows, summary, dry_run):
+    today = timezone.now().astimezone(KOLKATA).date()
+
+    members, joining_bills = [], []
+    for data in rows:
+        member = Member(client=client, outstanding_fee=Decimal('0.00'), **data)
+        recurring_date = member.recurring_date
+
+        if recurring_date and recurring_date.astimezone(KOLKATA).date() == today:
+            subscription = member.subscription
+            total = subscription.recurring_total + subscription.joining_total
+            member.outstanding_fee = total
+            joining_bills.append(Bill(
+                member=member, client=client, subscription=subscription, total_amount=total, due_amount=total,
+                bill_date=recurring_date, recurring_date=recurring_date, is_recurring=False,
+            ))
+        members.append(member)
+
+    if not dry_run:
+        with transaction.atomic():
+            Member.objects.bulk_create(members)
+            Bill.objects.bulk_create(joining_bills)
+            # bulk_create skips Bill.save() and Member.save(), so add the new dues
+            # to receivables and bump the members version here
+            receivable = sum((bill.due_amount for bill in joining_bills), Decimal('0.00'))
+            Client.objects.filter(pk=client.pk).update(
+                outstanding_receivables=F('outstanding_receivables') + receivable,
+                **version_bumps('members'),
+            )
+            Change.objects.bulk_create(
+                change_entries(Change.MEMBER, [(client.pk, member.pk) for member in members])
+                + change_entries(Change.BILL, [(client.pk, bill.pk) for bill in joining_bills])
+            )
+
+    summary['members_created'] += len(members)
+    summary['bills_created'] += len(joining_bills)
@@ -0,0 +1,192 @@
+"""
+In-process request metrics: per-request timings (wall, DB, serializer) and
+per-route aggregates rendered in the Prometheus text format.
+
+The registry is per process; with several workers, scrape each one (or
+put them behind one address per worker).
+"""
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework import serializers
+
+
+# Upper bounds in seconds; +Inf is implicit
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# "IN (%s, %s, %s)" from different-sized id lists is still the same query
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+
+
+def normalize_sql(sql):
+    return _IN_LIST.sub('IN (...)', sql)
+
+
+class RequestTimings:
+    __slots__ = ('started', 'queries', 'db_seconds', 'serializer_seconds', 'serializer_depth', 'statements')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.serializer_depth = 0
+        # Counter of normalized SQL, only kept when something asks for it
+        self.statements = None
+
+
+# Set for the duration of a request. Context variables follow the request
+# into sync_to_async threads, so queries from async views are counted too.
+current_timings = ContextVar('current_timings', default=None)
+
+
+def _time_query(execute, sql, params, many, context):
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db_seconds += time.perf_counter() - started
+        timings.queries += 1
+        if timings.statements is not None:
+            timings.statements[normalize_sql(sql)] += 1
+
+
+def _install_query_timer(sender, connection, **kwargs):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _time_query)
+
+
+class _Histogram:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class Registry:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.duration = defaultdict(_Histogram)      # (route, method)
+        self.db_duration = defaultdict(_Histogram)   # (route, method)
+        self.requests = defaultdict(int)             # (route, method, status)
+        self.queries = defaultdict(int)              # (route, method)
+        self.serializer_seconds = defaultdict(float)  # (route, method)
+
+    def observe(self, route, method, status, timings, wall):
+        key = (route, method)
+        with self.lock:
+            self.duration[key].observe(wall)
+            self.db_duration[key].observe(timings.db_seconds)
+            self.requests[(route, method, str(status))] += 1
+            self.queries[key] += timings.queries
+            self.serializer_seconds[key] += timings.serializer_seconds
+
+    def render(self):
+        with self.lock:
+            lines = []
+            _histogram(lines, 'feezy_http_request_duration_seconds',
+                       'Wall time per request.', self.duration)
+            _histogram(lines, 'feezy_http_request_db_seconds',
+                       'Time spent executing SQL per request.', self.db_duration)
+            _counter(lines, 'feezy_http_requests_total', 'Requests served.',
+                     self.requests, ('route', 'method', 'status'))
+            _counter(lines, 'feezy_http_db_queries_total', 'SQL statements executed.',
+                     self.queries, ('route', 'method'))
+            _counter(lines, 'feezy_http_serializer_seconds_total', 'Time spent in DRF serializers.',
+                     self.serializer_seconds, ('route', 'method'))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def _labels(names, values, **extra):
+    pairs = [*zip(names, values), *extra.items()]
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in pairs)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _histogram(lines, name, help_text, series):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for key, histogram in sorted(series.items()):
+        cumulative = 0
+        for bound, count in zip((*BUCKETS, '+Inf'), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{_labels(("route", "method"), key, le=bound)}}} {cumulative}')
+        lines.append(f'{name}_sum{{{_labels(("route", "method"), key)}}} {histogram.total}')
+        lines.append(f'{name}_count{{{_labels(("route", "method"), key)}}} {histogram.count}')
+
+
+def _counter(lines, name, help_text, series, label_names):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} counter')
+    for key, value in sorted(series.items()):
+        lines.append(f'{name}{{{_labels(label_names, key)}}} {value}')
+
+
+# -------- Serializer timing --------
+
+def _timed(method):
+    def wrapper(self, *args, **kwargs):
+        timings = current_timings.get()
+        if timings is None or timings.serializer_depth:
+            # Not in a measured request, or already counted by an outer call
+            return method(self, *args, **kwargs)
+
+        timings.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            timings.serializer_seconds += time.perf_counter() - started
+            timings.serializer_depth -= 1
+
+    wrapper.__wrapped__ = method
+    return wrapper
+
+
+def instrument(serializer_timing=True):
+    """
+    Time every SQL statement (on the current thread's open connections and
+    each new one) and, with serializer_timing, DRF validation (is_valid) and
+    representation (.data) for every serializer, against current_timings.
+    Idempotent. Called by the timing middleware when it is loaded, so
+    processes that never serve requests (management commands) are left alone.
+    """
+    for connection in connections.all(initialized_only=True):
+        _install_query_timer(None, connection)
+    connection_created.connect(_install_query_timer, dispatch_uid='adminapp.metrics')
+
+    base = serializers.BaseSerializer
+    if not serializer_timing or hasattr(base.data.fget, '__wrapped__'):
+        return
+
+    base.data = property(_timed(base.data.fget))
+    base.is_valid = _timed(base.is_valid)
+    serializers.ListSerializer.is_valid = _timed(serializers.ListSerializer.is_valid)
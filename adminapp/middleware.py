@@ -0,0 +1,114 @@
+import logging
+import time
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from adminapp.metrics import RequestTimings, current_timings, instrument, registry
+
+
+logger = logging.getLogger(__name__)
+
+
+class _TimingMiddleware:
+    """
+    Base for middleware that runs the request under a RequestTimings
+    (see adminapp.metrics). Works in both WSGI and ASGI chains, so async
+    views are not pushed onto a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        timings, reset = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timings.reset(reset)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings, reset = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timings.reset(reset)
+        return self.finish(request, response, timings)
+
+    def start(self, request):
+        # An outer timing middleware may already have started one
+        timings = current_timings.get() or RequestTimings()
+        return timings, current_timings.set(timings)
+
+    def finish(self, request, response, timings):
+        return response
+
+
+class RepeatedQueryLoggingMiddleware(_TimingMiddleware):
+    """
+    Development aid: logs a warning when one request runs the same SQL
+    (parameters aside) QUERY_REPEAT_THRESHOLD times or more, the usual
+    shape of an N+1. Only installed when DEBUG is on.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DEBUG:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.threshold = getattr(settings, 'QUERY_REPEAT_THRESHOLD', 5)
+        instrument(serializer_timing=False)
+
+    def start(self, request):
+        timings, reset = super().start(request)
+        timings.statements = Counter()
+        return timings, reset
+
+    def finish(self, request, response, timings):
+        seen = timings.statements
+        for sql, count in seen.most_common():
+            if count < self.threshold:
+                break
+            logger.warning(
+                "%s %s ran the same query %d times (%d queries in total): %s",
+                request.method, request.path, count, sum(seen.values()), sql,
+            )
+        return response
+
+
+class RequestMetricsMiddleware(_TimingMiddleware):
+    """
+    Times every request (wall, SQL and DRF serializer time, query count),
+    reports it in a Server-Timing header and adds it to the per-route
+    aggregates served on /metrics. Only installed with METRICS_ENABLED on.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        instrument()
+
+    def finish(self, request, response, timings):
+        wall = time.perf_counter() - timings.started
+        response['Server-Timing'] = (
+            f'db;dur={timings.db_seconds * 1000:.2f};desc="{timings.queries} queries", '
+            f'ser;dur={timings.serializer_seconds * 1000:.2f}, '
+            f'total;dur={wall * 1000:.2f}'
+        )
+
+        match = request.resolver_match
+        route = '/' + match.route if match else '<unmatched>'
+        if match is None or match.url_name != 'metrics':
+            registry.observe(route, request.method, response.status_code, timings, wall)
+        return response
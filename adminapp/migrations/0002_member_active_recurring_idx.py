@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['is_active', 'recurring_date'], name='member_active_recurring_idx'),
+        ),
+    ]
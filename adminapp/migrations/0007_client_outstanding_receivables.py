@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:55
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_outstanding(apps, schema_editor):
+    Bill = apps.get_model('adminapp', 'Bill')
+    Member = apps.get_model('adminapp', 'Member')
+    Client = apps.get_model('adminapp', 'Client')
+
+    def due_sum(**filters):
+        return Coalesce(
+            Subquery(
+                Bill.objects.filter(**filters).order_by().values(*filters)
+                .annotate(total=Sum('due_amount')).values('total')[:1],
+                output_field=DecimalField(max_digits=14, decimal_places=2),
+            ),
+            Value(Decimal('0.00'), output_field=DecimalField(max_digits=14, decimal_places=2)),
+        )
+
+    Member.objects.update(outstanding_fee=due_sum(member=OuterRef('pk')))
+    Client.objects.update(outstanding_receivables=due_sum(member__client=OuterRef('pk')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminapp', '0006_client_subscription_end_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='outstanding_receivables',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14),
+        ),
+        migrations.RunPython(backfill_outstanding, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:59
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def backfill_fee_totals(apps, schema_editor):
+    Subscription = apps.get_model('adminapp', 'Subscription')
+
+    plans = list(Subscription.objects.only('id', 'admission_fee', 'custom_fees'))
+    for plan in plans:
+        recurring = Decimal('0.00')
+        joining = Decimal(plan.admission_fee or 0)
+        for fee in plan.custom_fees or []:
+            if not isinstance(fee, dict):
+                continue
+            value = Decimal(str(fee.get('value', 0) or 0))
+            if fee.get('recurring', False):
+                recurring += value
+            else:
+                joining += value
+        plan.recurring_total = recurring
+        plan.joining_total = joining
+
+    Subscription.objects.bulk_update(plans, ['recurring_total', 'joining_total'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminapp', '0008_attendance_month'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscription',
+            name='joining_total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='subscription',
+            name='recurring_total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=10),
+        ),
+        migrations.RunPython(backfill_fee_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminapp', '0009_subscription_fee_totals'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(condition=models.Q(('due_amount__gt', 0)), fields=['member', 'bill_date', 'due_amount'], name='bill_member_unpaid_idx'),
+        ),
+    ]
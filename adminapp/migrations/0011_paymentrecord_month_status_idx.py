@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminapp', '0010_bill_member_unpaid_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='paymentrecord',
+            index=models.Index(fields=['year', 'month', 'status'], name='paymentrecord_month_status_idx'),
+        ),
+    ]
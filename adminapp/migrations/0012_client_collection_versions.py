@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminapp', '0011_paymentrecord_month_status_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='batches_version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='members_version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='subscriptions_version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_changes(apps, schema_editor):
+    # One entry per existing row, so a first sync returns the current data
+    Change = apps.get_model('adminapp', 'Change')
+    sources = [
+        ('member', apps.get_model('adminapp', 'Member').objects.values_list('client_id', 'id')),
+        ('bill', apps.get_model('adminapp', 'Bill').objects.values_list('member__client_id', 'id')),
+        ('payment', apps.get_model('adminapp', 'Payment').objects.values_list('bill__member__client_id', 'id')),
+        ('attendance', apps.get_model('adminapp', 'Attendance').objects.values_list('client_id', 'id')),
+    ]
+    for kind, rows in sources:
+        batch = []
+        for client_id, object_id in rows.order_by('id').iterator(chunk_size=5000):
+            batch.append(Change(client_id=client_id, kind=kind, object_id=object_id))
+            if len(batch) == 5000:
+                Change.objects.bulk_create(batch)
+                batch = []
+        Change.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminapp', '0012_client_collection_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('member', 'Member'), ('bill', 'Bill'), ('payment', 'Payment'), ('attendance', 'Attendance')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('client', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['client', 'id'], name='change_client_seq_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_changes, migrations.RunPython.noop),
+    ]
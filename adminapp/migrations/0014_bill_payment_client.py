@@ -0,0 +1,62 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_clients(apps, schema_editor):
+    Member = apps.get_model('adminapp', 'Member')
+    Bill = apps.get_model('adminapp', 'Bill')
+    Payment = apps.get_model('adminapp', 'Payment')
+
+    Bill.objects.update(client_id=Subquery(Member.objects.filter(pk=OuterRef('member_id')).values('client_id')))
+    Payment.objects.update(client_id=Subquery(Bill.objects.filter(pk=OuterRef('bill_id')).values('client_id')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminapp', '0013_change_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bill',
+            name='client',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='client',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_clients, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='bill',
+            name='client',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='client',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RemoveIndex(
+            model_name='bill',
+            name='bill_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='payment',
+            name='payment_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['client', 'bill_date', 'id'], name='bill_client_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['client', 'payment_date', 'id'], name='payment_client_date_idx'),
+        ),
+    ]
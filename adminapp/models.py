@@ -1,11 +1,23 @@
+from collections import defaultdict
 from datetime import date, timedelta,timezone
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Case, DecimalField, F, Value, When
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
 
 from django.utils import timezone
 from decimal import Decimal
 
+from adminapp.authentication import invalidate_user_tokens
+
+
+def fields_except(instance, *excluded):
+    return [
+        f.name for f in instance._meta.concrete_fields
+        if not f.primary_key and f.name not in excluded
+    ]
+
 
 # -------- Category --------
 class Category(models.Model):
@@ -57,6 +69,25 @@ class Client(AbstractUser):
     )
     is_active = models.BooleanField(default=True)
 
+    # Sum of members' outstanding fees, maintained with F() updates (see adjust_outstanding)
+    outstanding_receivables = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+
+    # Bumped with F() updates on every write to the collection (see bump_versions);
+    # list endpoints derive their ETags from them
+    batches_version = models.PositiveBigIntegerField(default=0)
+    subscriptions_version = models.PositiveBigIntegerField(default=0)
+    members_version = models.PositiveBigIntegerField(default=0)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # expiry sweep: active clients past subscription_end
+            models.Index(
+                fields=['subscription_end'],
+                condition=models.Q(is_active=True),
+                name='client_active_sub_end_idx',
+            ),
+        ]
+
     # -------- Save Method --------
     def save(self, *args, **kwargs):
         if not self.subscription_start:
@@ -66,8 +97,20 @@ class Client(AbstractUser):
         if not self.subscription_amount:
             self.subscription_amount = 5000.00
         self.is_active = self.subscription_end >= date.today()
+        adding = self._state.adding
+        if not adding and kwargs.get('update_fields') is None:
+            # Never write back possibly stale copies of the maintained counters
+            kwargs['update_fields'] = fields_except(self, 'outstanding_receivables', *VERSION_FIELDS.values())
         super().save(*args, **kwargs)
 
+        # Password / active state may have changed: drop cached token lookups
+        if not adding:
+            invalidate_user_tokens(self.pk)
+
+    def delete(self, *args, **kwargs):
+        invalidate_user_tokens(self.pk)
+        return super().delete(*args, **kwargs)
+
     # -------- Remaining Days --------
     @property
     def remaining_days(self):
@@ -105,6 +148,66 @@ class Client(AbstractUser):
 
 
 
+VERSION_FIELDS = {
+    'batches': 'batches_version',
+    'subscriptions': 'subscriptions_version',
+    'members': 'members_version',
+}
+
+
+def version_bumps(*collections):
+    """
+    update() kwargs that bump the given collection versions of a Client, to
+    fold into a client UPDATE that is run anyway.
+    """
+    return {VERSION_FIELDS[name]: F(VERSION_FIELDS[name]) + 1 for name in collections}
+
+
+def bump_versions(client_ids, *collections):
+    """
+    Mark the given collections of client_ids (ids or a values() subquery)
+    as changed, with one UPDATE.
+    """
+    Client.objects.filter(pk__in=client_ids).update(**version_bumps(*collections))
+
+
+def fee_totals(admission_fee, custom_fees):
+    """
+    (recurring_total, joining_total) for a plan. Joining covers the admission
+    fee and the one-off custom fees; the first bill charges both totals.
+    Raises ValidationError for a fee that isn't an object with a numeric value.
+    """
+    recurring = Decimal('0.00')
+    joining = Decimal(admission_fee or 0)
+    for index, fee in enumerate(custom_fees or []):
+        if not isinstance(fee, dict):
+            raise ValidationError({'custom_fees': f"Fee {index}: expected an object."})
+        try:
+            value = Decimal(str(fee.get('value', 0) or 0))
+        except ArithmeticError:
+            raise ValidationError({'custom_fees': f"Fee {index}: value must be a number."})
+        if fee.get('recurring', False):
+            recurring += value
+        else:
+            joining += value
+    return recurring, joining
+
+
+def validate_fee_totals(recurring, joining):
+    """
+    Raise ValidationError unless both totals fit Subscription's total columns.
+    """
+    for name, total in (('recurring_total', recurring), ('joining_total', joining)):
+        field = Subscription._meta.get_field(name)
+        try:
+            field.run_validators(total)
+        except ValidationError:
+            raise ValidationError({'custom_fees': (
+                f"The {name.replace('_', ' ')} {total} is more than a plan can hold "
+                f"({field.max_digits - field.decimal_places} digits before the point)."
+            )})
+
+
 # -------- Batch --------
 class Batch(models.Model):
     client = models.ForeignKey(
@@ -119,6 +222,22 @@ class Batch(models.Model):
         help_text="e.g. Mon-Fri"
     )
 
+    def save(self, *args, **kwargs):
+        # No savepoint of its own: a failed bump must roll back the write with it
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+            if self.client_id:
+                bump_versions([self.client_id], 'batches')
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(savepoint=False):
+            if self.client_id:
+                # Members' batch_group is set to NULL with it and its attendance is deleted
+                bump_versions([self.client_id], 'batches', 'members')
+                log_changes(Change.MEMBER, self.members.values_list('client_id', 'id'))
+                log_changes(Change.ATTENDANCE, self.attendances.values_list('client_id', 'id'), deleted=True)
+            return super().delete(*args, **kwargs)
+
     def __str__(self):
         return f"{self.name} ({self.client.business_name})" if self.client else self.name
 
@@ -133,6 +252,28 @@ class Subscription(models.Model):
     custom_fees = models.JSONField(default=list, blank=True)
     duration_days = models.PositiveIntegerField(default=30)  # determines cycle length in days
 
+    # Derived from admission_fee / custom_fees on save so billing never re-parses the JSON
+    recurring_total = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'), editable=False)
+    joining_total = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'), editable=False)
+
+    def clean(self):
+        validate_fee_totals(*fee_totals(self.admission_fee, self.custom_fees))
+
+    def save(self, *args, **kwargs):
+        self.recurring_total, self.joining_total = fee_totals(self.admission_fee, self.custom_fees)
+        validate_fee_totals(self.recurring_total, self.joining_total)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'recurring_total', 'joining_total'}
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+            bump_versions([self.client_id], 'subscriptions')
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(savepoint=False):
+            bump_versions([self.client_id], 'subscriptions')
+            return super().delete(*args, **kwargs)
+
     def __str__(self):
         return self.name or "Subscription"
 
@@ -175,11 +316,87 @@ class Member(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)  # record creation time
 
+    class Meta:
+        indexes = [
+            # due-member selection for recurring billing. Partial on is_active because
+            # SQLite can't seek a composite index on a bare boolean predicate.
+            models.Index(
+                fields=['recurring_date'],
+                condition=models.Q(is_active=True),
+                name='member_due_recurring_idx',
+            ),
+            # tenant-scoped member listings filtered by status
+            models.Index(fields=['client', 'is_active'], name='member_client_active_idx'),
+            # cursor pagination of a client's members
+            models.Index(fields=['client', 'created_at'], name='member_client_created_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # outstanding_fee is maintained with F() updates (see adjust_outstanding)
+            kwargs['update_fields'] = fields_except(self, 'outstanding_fee')
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+            bump_versions([self.client_id], 'members')
+            log_changes(Change.MEMBER, [(self.client_id, self.pk)])
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            outstanding = Member.objects.filter(pk=self.pk).values_list('outstanding_fee', flat=True).first()
+            Client.objects.filter(pk=self.client_id).update(
+                outstanding_receivables=F('outstanding_receivables') - (outstanding or 0),
+                **version_bumps('members'),
+            )
+            # Its bills, payments and attendance go with it (cascade) and get no tombstones of their own
+            log_changes(Change.MEMBER, [(self.client_id, self.pk)], deleted=True)
+            return super().delete(*args, **kwargs)
+
     def __str__(self):
         return self.full_name
 
+
+def adjust_outstanding(member_id, client_id, amount):
+    """
+    Add amount to a member's outstanding fee and to their client's receivables.
+    """
+    Member.objects.filter(pk=member_id).update(outstanding_fee=F('outstanding_fee') + amount)
+    Client.objects.filter(pk=client_id).update(
+        outstanding_receivables=F('outstanding_receivables') + amount,
+        **version_bumps('members'),
+    )
+    log_changes(Change.MEMBER, [(client_id, member_id)])
+
+
+def adjust_outstanding_bulk(amounts):
+    """
+    Bulk form of adjust_outstanding for (member_id, client_id, amount) rows:
+    one UPDATE per distinct amount (members on the same plan share it) and
+    one per client.
+    """
+    members_by_amount = defaultdict(list)
+    client_totals = defaultdict(Decimal)
+    changed = []
+    for member_id, client_id, amount in amounts:
+        if amount:
+            members_by_amount[amount].append(member_id)
+            client_totals[client_id] += amount
+            changed.append((client_id, member_id))
+
+    for amount, member_ids in members_by_amount.items():
+        Member.objects.filter(pk__in=member_ids).update(outstanding_fee=F('outstanding_fee') + amount)
+    for client_id, amount in client_totals.items():
+        Client.objects.filter(pk=client_id).update(
+            outstanding_receivables=F('outstanding_receivables') + amount,
+            **version_bumps('members'),
+        )
+    log_changes(Change.MEMBER, changed)
+
+
 class Bill(models.Model):
     member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='bills')
+    # The member's client, kept on the row so tenant listings can seek one
+    # index; covered by the (client, bill_date, id) index below
+    client = models.ForeignKey('Client', on_delete=models.CASCADE, related_name='+', db_index=False)
     subscription = models.ForeignKey(Subscription, on_delete=models.PROTECT)
 
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
@@ -190,17 +407,115 @@ class Bill(models.Model):
     recurring_date = models.DateTimeField(null=True, blank=True)
     is_recurring = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # "already billed for this cycle" checks; covers (member_id, recurring_date) lookups
+            models.Index(fields=['member', 'recurring_date'], name='bill_member_recurring_idx'),
+            # a client's bills in cursor pagination / date-range order
+            models.Index(fields=['client', 'bill_date', 'id'], name='bill_client_date_idx'),
+            # receivables aging: covers the per-member sums over unpaid bills only
+            models.Index(
+                fields=['member', 'bill_date', 'due_amount'],
+                condition=models.Q(due_amount__gt=0),
+                name='bill_member_unpaid_idx',
+            ),
+        ]
+
     def save(self, *args, **kwargs):
+        if self.client_id is None:
+            self.client_id = self.member.client_id
         # Ensure Decimal arithmetic
         self.total_amount = Decimal(self.total_amount)
         self.paid_amount = Decimal(self.paid_amount)
         self.due_amount = self.total_amount - self.paid_amount
-        super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            if self._state.adding:
+                previous_due = Decimal('0.00')
+            else:
+                previous_due = Bill.objects.filter(pk=self.pk).values_list('due_amount', flat=True).first() or Decimal('0.00')
+
+            super().save(*args, **kwargs)
+
+            client_id = self.member.client_id
+            if self.due_amount != previous_due:
+                adjust_outstanding(self.member_id, client_id, self.due_amount - previous_due)
+            elif self.due_amount:
+                # Same dues, maybe a new bill_date: the aging buckets still move
+                bump_versions([client_id], 'members')
+            log_changes(Change.BILL, [(client_id, self.pk)])
 
 
 
 # -------- Payment --------
 
+def apply_payment_to_bill(bill_id, amount):
+    """
+    Apply a payment (negative to reverse one) to a bill, its member's
+    outstanding fee and the client's receivables. Returns the client id.
+    """
+    member_id, client_id = Bill.objects.filter(pk=bill_id).values_list('member_id', 'client_id').get()
+    Bill.objects.filter(pk=bill_id).update(
+        paid_amount=F('paid_amount') + amount,
+        due_amount=F('due_amount') - amount,
+    )
+    Member.objects.filter(pk=member_id).update(outstanding_fee=F('outstanding_fee') - amount)
+    Client.objects.filter(pk=client_id).update(
+        outstanding_receivables=F('outstanding_receivables') - amount,
+        **version_bumps('members'),
+    )
+    Change.objects.bulk_create(
+        change_entries(Change.BILL, [(client_id, bill_id)]) + change_entries(Change.MEMBER, [(client_id, member_id)])
+    )
+    return client_id
+
+
+def _amount_by_pk(amounts):
+    return Case(
+        *[When(pk=pk, then=Value(amount)) for pk, amount in amounts.items()],
+        output_field=DecimalField(max_digits=10, decimal_places=2),
+    )
+
+
+def apply_payments_to_bills(totals):
+    """
+    Bulk form of apply_payment_to_bill for {bill_id: amount}: one select,
+    one UPDATE per table (amounts picked per row with CASE on the id), one
+    per client and one change log insert, however many bills. Returns
+    {bill_id: client_id}.
+    """
+    owners = {
+        bill_id: (member_id, client_id)
+        for bill_id, member_id, client_id in Bill.objects.filter(pk__in=totals)
+        .values_list('pk', 'member_id', 'client_id')
+    }
+    member_totals = defaultdict(Decimal)
+    client_totals = defaultdict(Decimal)
+    for bill_id, amount in totals.items():
+        member_id, client_id = owners[bill_id]
+        member_totals[member_id] += amount
+        client_totals[client_id] += amount
+
+    bill_amounts = _amount_by_pk(totals)
+    Bill.objects.filter(pk__in=totals).update(
+        paid_amount=F('paid_amount') + bill_amounts,
+        due_amount=F('due_amount') - bill_amounts,
+    )
+    Member.objects.filter(pk__in=member_totals).update(
+        outstanding_fee=F('outstanding_fee') - _amount_by_pk(member_totals),
+    )
+    for client_id, amount in client_totals.items():
+        Client.objects.filter(pk=client_id).update(
+            outstanding_receivables=F('outstanding_receivables') - amount,
+            **version_bumps('members'),
+        )
+    Change.objects.bulk_create(
+        change_entries(Change.BILL, [(owners[bill_id][1], bill_id) for bill_id in totals])
+        + change_entries(Change.MEMBER, [(client_id, member_id) for member_id, client_id in dict(owners.values()).items()])
+    )
+    return {bill_id: owners[bill_id][1] for bill_id in totals}
+
+
 class Payment(models.Model):
     PAYMENT_METHODS = [
         ('CASH', 'Cash'),
@@ -208,19 +523,48 @@ class Payment(models.Model):
     ]
 
     bill = models.ForeignKey(Bill, on_delete=models.CASCADE, related_name='payments')
+    # The bill's client (see Bill.client); covered by the (client, payment_date, id) index
+    client = models.ForeignKey('Client', on_delete=models.CASCADE, related_name='+', db_index=False)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     payment_method = models.CharField(max_length=10, choices=PAYMENT_METHODS)
     payment_date = models.DateTimeField(auto_now_add=True)
     partial_payments=models.JSONField(default=list, blank=True)
 
+    class Meta:
+        indexes = [
+            # a client's payments in cursor pagination / date-range order
+            models.Index(fields=['client', 'payment_date', 'id'], name='payment_client_date_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         self.amount = Decimal(self.amount)
-        super().save(*args, **kwargs)
-
-        # Update the related bill
-        bill = self.bill
-        bill.paid_amount += self.amount
-        bill.save()
+        # Follows the bill, including when the payment is moved to another one
+        self.client_id = self.bill.client_id
+
+        with transaction.atomic():
+            if self._state.adding:
+                previous = None
+            else:
+                previous = Payment.objects.filter(pk=self.pk).values_list('bill_id', 'amount').first()
+
+            super().save(*args, **kwargs)
+
+            # Apply to the related bill(s) in single UPDATE statements so concurrent
+            # payments against the same bill can't lose each other's writes
+            if previous:
+                apply_payment_to_bill(previous[0], -previous[1])
+            client_id = apply_payment_to_bill(self.bill_id, self.amount)
+            log_changes(Change.PAYMENT, [(client_id, self.pk)])
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            # Reverse what the stored row applied, not what this instance holds
+            stored = Payment.objects.filter(pk=self.pk).values_list('bill_id', 'amount').first()
+            log_changes(Change.PAYMENT, [(self.client_id, self.pk)], deleted=True)
+            deleted = super().delete(*args, **kwargs)
+            if stored:
+                apply_payment_to_bill(stored[0], -stored[1])
+            return deleted
 
     def __str__(self):
         return f"{self.amount} via {self.payment_method} for {self.bill}"
@@ -251,6 +595,10 @@ class PaymentRecord(models.Model):
     class Meta:
         unique_together = ('customer', 'month', 'year')
         ordering = ['-year', '-month']
+        indexes = [
+            # monthly paid / partial / due reports
+            models.Index(fields=['year', 'month', 'status'], name='paymentrecord_month_status_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         # Update status
@@ -296,9 +644,116 @@ class Attendance(models.Model):
 
     class Meta:
         unique_together = ('batch', 'member', 'date')  # Prevent duplicate attendance for same day
+        indexes = [
+            models.Index(fields=['client', 'date'], name='attendance_client_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.member.full_name} - {self.batch.name} on {self.date} ({'Present' if self.present else 'Absent'})"
    
 
 
+
+
+
+# -------- Email Outbox --------
+class OutboundEmail(models.Model):
+    STATUS_CHOICES = [
+        ('Pending', 'Pending'),
+        ('Sent', 'Sent'),
+        ('Dead', 'Dead'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255)
+    recipients = models.JSONField(default=list)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # worker picks up due pending emails in id order
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
+
+
+
+# -------- Monthly Attendance Bitmap --------
+class AttendanceMonth(models.Model):
+    """
+    Derived, compact form of Attendance: one row per member, batch and month.
+    Bit (day - 1) of marked_bits is set when attendance was taken that day and
+    the same bit of present_bits when the member was present.
+    """
+    client = models.ForeignKey('Client', on_delete=models.CASCADE, related_name='attendance_months')
+    batch = models.ForeignKey('Batch', on_delete=models.CASCADE, related_name='attendance_months')
+    member = models.ForeignKey('Member', on_delete=models.CASCADE, related_name='attendance_months')
+
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+
+    present_bits = models.PositiveIntegerField(default=0)
+    marked_bits = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('batch', 'year', 'month', 'member')
+
+    def __str__(self):
+        return f"{self.member_id} - {self.batch_id} {self.month}/{self.year}"
+
+
+
+# -------- Change log (delta sync) --------
+class Change(models.Model):
+    """
+    Append-only log of writes to a client's members, bills, payments and
+    attendance. The id is the sync sequence: GET /changes/?since=<id> reads
+    a client's entries after it (see adminapp/changes.py). An entry only
+    names the row; its current state is read at sync time. Superseded
+    entries can be dropped with compact_change_log.
+    """
+    MEMBER = 'member'
+    BILL = 'bill'
+    PAYMENT = 'payment'
+    ATTENDANCE = 'attendance'
+    KINDS = [(MEMBER, 'Member'), (BILL, 'Bill'), (PAYMENT, 'Payment'), (ATTENDANCE, 'Attendance')]
+
+    id = models.BigAutoField(primary_key=True)
+    # Covered by the (client, id) index below
+    client = models.ForeignKey('Client', on_delete=models.CASCADE, related_name='+', db_index=False)
+    kind = models.CharField(max_length=10, choices=KINDS)
+    object_id = models.PositiveBigIntegerField()
+    deleted = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            # a client's entries after a cursor, in sequence order
+            models.Index(fields=['client', 'id'], name='change_client_seq_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.kind} {self.object_id}{' deleted' if self.deleted else ''}"
+
+
+def change_entries(kind, rows, deleted=False):
+    return [Change(client_id=client_id, kind=kind, object_id=object_id, deleted=deleted) for client_id, object_id in rows]
+
+
+def log_changes(kind, rows, deleted=False):
+    """
+    Append one Change per (client_id, object_id) row with a single INSERT.
+    Called next to every write, including the bulk ones that skip save().
+    """
+    entries = change_entries(kind, rows, deleted)
+    if entries:
+        Change.objects.bulk_create(entries)
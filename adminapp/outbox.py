@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from adminapp.models import OutboundEmail
+
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 60 * 60
+DEFAULT_BATCH_SIZE = 100
+
+
+def queue_email(subject, message, from_email, recipient_list):
+    """
+    Drop-in for send_mail() that writes to the outbox instead of talking SMTP.
+    Call it inside the same transaction as the change the email announces.
+    """
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipient_list),
+    )
+
+
+def backoff_delay(attempts):
+    return timedelta(seconds=min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS))
+
+
+def _mark_failed(email, error, now):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= MAX_ATTEMPTS:
+        # Final, like Sent: the credentials in the body are never needed again
+        email.status = 'Dead'
+        email.body = ''
+    else:
+        email.next_attempt_at = now + backoff_delay(email.attempts)
+    email.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at', 'body'])
+
+
+def deliver_pending(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Send one batch of due outbox emails over a single reused connection.
+    Meant to be run by a single worker. Returns (sent, failed).
+    """
+    now = timezone.now()
+    batch = list(
+        OutboundEmail.objects
+        .filter(status='Pending', next_attempt_at__lte=now)
+        .order_by('id')[:batch_size]
+    )
+    if not batch:
+        return 0, 0
+
+    sent = failed = 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        # Server unreachable: the whole batch backs off
+        for email in batch:
+            _mark_failed(email, e, now)
+        return 0, len(batch)
+
+    try:
+        for email in batch:
+            message = EmailMessage(
+                email.subject, email.body, email.from_email, email.recipients,
+                connection=connection,
+            )
+            try:
+                message.send()
+            except Exception as e:
+                _mark_failed(email, e, now)
+                failed += 1
+                # The connection may be dead after a failure; start a fresh one.
+                # If that fails too, leave the rest of the batch for the next run.
+                connection.close()
+                try:
+                    connection.open()
+                except Exception:
+                    break
+                continue
+
+            # Credentials travel in these bodies; don't keep them once delivered
+            email.status = 'Sent'
+            email.sent_at = timezone.now()
+            email.body = ''
+            email.attempts += 1
+            email.save(update_fields=['status', 'sent_at', 'body', 'attempts'])
+            sent += 1
+    finally:
+        connection.close()
+
+    return sent, failed
@@ -0,0 +1,138 @@
+from base64 import b64decode, b64encode
+from urllib import parse
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class ListCursorPagination(CursorPagination):
+    """
+    Keyset pagination: the cursor carries the full sort key of the row it
+    stopped at (every ordering column, the last one unique), and the next
+    page is the rows past it on the matching index. Page 1000 costs the
+    same as page 1, also when thousands of rows share a date.
+
+    DRF's CursorPagination only positions on ordering[0] and pages through
+    ties with an OFFSET capped at offset_cutoff, so it can't do that.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.fields = [queryset.model._meta.get_field(field.lstrip('-')) for field in self.ordering]
+
+        position, reverse = self.decode_cursor(request)
+        ordering = [self._flip(field) for field in self.ordering] if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is None:
+            results = list(queryset[:self.page_size + 1])
+        else:
+            results = []
+            for seek in self.seeks(position, reverse):
+                results += queryset.filter(seek)[:self.page_size + 1 - len(results)]
+                if len(results) > self.page_size:
+                    break
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+
+        # A page that came up empty keeps the position it was asked for, so
+        # the way back still works
+        first = self._get_position(self.page[0]) if self.page else position
+        last = self._get_position(self.page[-1]) if self.page else position
+        if reverse:
+            has_next, has_previous = position is not None, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+        self.next_position = last if has_next else None
+        self.previous_position = first if has_previous else None
+
+        if self.template is not None and (has_next or has_previous):
+            self.display_page_controls = True
+        return self.page
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def seeks(self, position, reverse):
+        """
+        The rows past (x, y) in the page's direction, (a < x) OR (a = x AND
+        b < y) for a descending ordering, as one filter per branch, in page
+        order: the rest of the tie on x first, then the rows past it. SQLite
+        only seeks the OR (or the row value (a, b) < (x, y)) on its first
+        column, which pages through a tie row by row; each branch alone is an
+        equality prefix plus one range on the index.
+        """
+        for depth in reversed(range(len(self.ordering))):
+            field = self.ordering[depth]
+            lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+            equal = {name.lstrip('-'): value for name, value in zip(self.ordering[:depth], position)}
+            yield Q(**equal, **{f'{field.lstrip("-")}__{lookup}': position[depth]})
+
+    def _get_position(self, row):
+        if isinstance(row, dict):
+            return [row[field.attname] for field in self.fields]
+        return [getattr(row, field.attname) for field in self.fields]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+
+        try:
+            tokens = parse.parse_qs(b64decode(encoded.encode('ascii')).decode('ascii'), keep_blank_values=True)
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+            raw = tokens.get('p', [])
+            if len(raw) != len(self.fields):
+                raise ValueError(raw)
+            position = [field.to_python(value) for field, value in zip(self.fields, raw)]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if any(value is None for value in position):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, position, reverse):
+        tokens = {'p': [value.isoformat() if hasattr(value, 'isoformat') else str(value) for value in position]}
+        if reverse:
+            tokens['r'] = '1'
+        encoded = b64encode(parse.urlencode(tokens, doseq=True).encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+
+class MemberCursorPagination(ListCursorPagination):
+    # (client, created_at) index, id is the rowid it ends in
+    ordering = ('-created_at', '-id')
+
+
+class BillCursorPagination(ListCursorPagination):
+    # (client, bill_date, id) index
+    ordering = ('-bill_date', '-id')
+
+
+class PaymentCursorPagination(ListCursorPagination):
+    # (client, payment_date, id) index
+    ordering = ('-payment_date', '-id')
@@ -0,0 +1,66 @@
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from adminapp.models import Bill, Change, Client, Member, bump_versions, log_changes
+
+
+# SQLite sums decimals as floats, so allow for rounding noise
+TOLERANCE = Decimal('0.005')
+
+ZERO = Value(Decimal('0.00'), output_field=DecimalField(max_digits=14, decimal_places=2))
+
+
+def _due_sum(**filters):
+    return Coalesce(
+        Subquery(
+            Bill.objects.filter(**filters)
+            .order_by()
+            .values(*filters)
+            .annotate(total=Sum('due_amount'))
+            .values('total')[:1],
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        ),
+        ZERO,
+    )
+
+
+def expected_member_outstanding():
+    return _due_sum(member=OuterRef('pk'))
+
+
+def expected_client_receivables():
+    return _due_sum(member__client=OuterRef('pk'))
+
+
+def _drifted(queryset, field, expected):
+    return (
+        queryset.annotate(expected=expected)
+        .annotate(drift=F(field) - F('expected'))
+        .filter(Q(drift__gt=TOLERANCE) | Q(drift__lt=-TOLERANCE))
+    )
+
+
+def member_drift():
+    return _drifted(Member.objects.all(), 'outstanding_fee', expected_member_outstanding())
+
+
+def client_drift():
+    return _drifted(Client.objects.all(), 'outstanding_receivables', expected_client_receivables())
+
+
+def recompute(member_ids=None, client_ids=None):
+    """
+    Reset the counters from Bill.due_amount with one set-based UPDATE each.
+    None means every row.
+    """
+    members = Member.objects.all() if member_ids is None else Member.objects.filter(pk__in=member_ids)
+    clients = Client.objects.all() if client_ids is None else Client.objects.filter(pk__in=client_ids)
+
+    bump_versions(members.values('client_id'), 'members')
+    log_changes(Change.MEMBER, members.values_list('client_id', 'id'))
+    return (
+        members.update(outstanding_fee=expected_member_outstanding()),
+        clients.update(outstanding_receivables=expected_client_receivables()),
+    )
@@ -1,10 +1,13 @@
 import random,pytz
 import string
-import requests
 from datetime import date, timedelta
 from rest_framework import serializers
-from adminapp.models import Client,Category,Batch,Subscription,Member,Bill,Payment
-from django.core.mail import send_mail
+from collections import defaultdict
+from adminapp.models import Client,Category,Batch,Subscription,Member,Bill,Payment,Attendance,Change,apply_payments_to_bills,log_changes
+from django.db import transaction
+from adminapp.outbox import queue_email
+from adminapp.currency import currency_for_country, currency_symbol
+from adminapp.attendance import mark_bitmaps
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from decimal import Decimal
@@ -62,27 +65,15 @@ class ClientCreateSerializer(serializers.ModelSerializer):
         client.subscription_amount = 5000.00  # base price
         client.subscription_currency = "INR"  # default
 
-        # --- Fetch currency from API (based on country_code) ---
-        try:
-            api_url = f"https://restcountries.com/v3.1/alpha/{country_code}"
-            response = requests.get(api_url, timeout=5)
-            if response.status_code == 200:
-                data = response.json()[0]
-                currency_code = list(data["currencies"].keys())[0]
-                client.subscription_currency = currency_code
-            else:
-                client.subscription_currency = "INR"
-        except Exception as e:
-            print("Currency fetch failed:", e)
-            client.subscription_currency = "INR"
-
-        # 🔹 Save the client (includes manually entered emoji)
-        client.save()
+        # --- Currency from the bundled dataset (based on country_code) ---
+        client.subscription_currency = currency_for_country(country_code)
+        if not client.currency_emoji:
+            client.currency_emoji = currency_symbol(client.subscription_currency)
 
         # Attach generated password for API response
         client.generated_password = password
 
-        # --- Send email with credentials ---
+        # --- Queue email with credentials ---
         subject = "Your Account Credentials"
         message = (
             f"Hello {client.username},\n\n"
@@ -96,7 +87,11 @@ class ClientCreateSerializer(serializers.ModelSerializer):
             f"Please change your password after your first login.\n\n"
             f"Regards,\nAdmin Team"
         )
-        send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [client.email], fail_silently=False)
+
+        # 🔹 Save the client (includes manually entered emoji) together with its outbox email
+        with transaction.atomic():
+            client.save()
+            queue_email(subject, message, settings.DEFAULT_FROM_EMAIL, [client.email])
 
         return client
 
@@ -173,14 +168,16 @@ class ForgotPasswordSerializer(serializers.Serializer):
         
         # --- Set the new password (hashed automatically) ---
         user.set_password(new_password)
-        user.save()
 
-        # --- Send email to the user ---
+        # --- Queue email to the user ---
         subject = "Your New Password"
         message = f"Hello {user.username},\n\nYour new password is: {new_password}\n\nPlease log in and change it immediately."
         from_email = settings.DEFAULT_FROM_EMAIL
         recipient_list = [email]
-        send_mail(subject, message, from_email, recipient_list, fail_silently=False)
+
+        with transaction.atomic():
+            user.save()
+            queue_email(subject, message, from_email, recipient_list)
 
 
 
@@ -204,20 +201,15 @@ KOLKATA = pytz.timezone("Asia/Kolkata")
 
 
 def calculate_fees(subscription, include_joining=False):
-    total = Decimal("0.00")
+    # Totals are precomputed on Subscription.save()
+    total = subscription.recurring_total
     if include_joining:
-        total += Decimal(subscription.admission_fee or 0)
-        for fee in subscription.custom_fees:
-            if not fee.get("recurring", False):
-                total += Decimal(fee.get("value", 0))
-    for fee in subscription.custom_fees:
-        if fee.get("recurring", False):
-            total += Decimal(fee.get("value", 0))
+        total += subscription.joining_total
     return total
 
 
 from rest_framework import serializers
-from .models import Subscription
+from .models import Subscription, fee_totals, validate_fee_totals
 
 class SubscriptionSerializer(serializers.ModelSerializer):
 
@@ -227,7 +219,39 @@ class SubscriptionSerializer(serializers.ModelSerializer):
 
         fields = '__all__'
 
-        read_only_fields=['id']
+        read_only_fields=['id', 'recurring_total', 'joining_total']
+
+    def validate_custom_fees(self, value):
+        if not isinstance(value, list):
+            raise serializers.ValidationError("Expected a list of fees.")
+
+        for index, fee in enumerate(value):
+            if not isinstance(fee, dict):
+                raise serializers.ValidationError(f"Fee {index}: expected an object.")
+            try:
+                amount = Decimal(str(fee.get("value", 0)))
+            except ArithmeticError:
+                raise serializers.ValidationError(f"Fee {index}: value must be a number.")
+            if not amount.is_finite() or amount < 0:
+                raise serializers.ValidationError(f"Fee {index}: value must be a non-negative number.")
+            try:
+                cents = amount.quantize(Decimal("0.01"))
+            except ArithmeticError:
+                raise serializers.ValidationError(f"Fee {index}: value is too large.")
+            if cents != amount:
+                raise serializers.ValidationError(f"Fee {index}: value can have at most 2 decimal places.")
+            if not isinstance(fee.get("recurring", False), bool):
+                raise serializers.ValidationError(f"Fee {index}: recurring must be true or false.")
+
+        return value
+
+    def validate(self, attrs):
+        # The totals Subscription.save() stores must fit their columns; the
+        # ValidationError from the model comes back as a 400 on custom_fees
+        admission_fee = attrs.get("admission_fee", getattr(self.instance, "admission_fee", 0))
+        custom_fees = attrs.get("custom_fees", getattr(self.instance, "custom_fees", []))
+        validate_fee_totals(*fee_totals(admission_fee, custom_fees))
+        return attrs
 
 
 
@@ -235,7 +259,7 @@ class MemberSerializer(serializers.ModelSerializer):
     class Meta:
         model = Member
         fields = "__all__"
-        read_only_fields = ['is_active']
+        read_only_fields = ['is_active', 'outstanding_fee']
 
     def create(self, validated_data):
 
@@ -286,11 +310,43 @@ class MemberSerializer(serializers.ModelSerializer):
 
 
 
+class MemberImportSerializer(serializers.ModelSerializer):
+    """
+    Validates one CSV row of a member import. One instance is reused for
+    every row (see adminapp.member_import), with the client's subscriptions
+    and batches preloaded into the context as {id or lower-cased name: obj}.
+    """
+    subscription = serializers.CharField()
+    batch_group = serializers.CharField(required=False)
+
+    class Meta:
+        model = Member
+        fields = [
+            'full_name', 'date_of_birth', 'age', 'place', 'gender', 'nationality',
+            'contact_number', 'whatsapp_number', 'email', 'parent_name',
+            'subscription', 'batch_group', 'recurring_date',
+        ]
+
+    def _lookup(self, lookups, value, label):
+        key = value.strip()
+        found = lookups.get(key) or lookups.get(key.lower())
+        if found is None:
+            raise serializers.ValidationError(f"Unknown {label} '{value}'.")
+        return found
+
+    def validate_subscription(self, value):
+        return self._lookup(self.context['subscriptions'], value, 'subscription')
+
+    def validate_batch_group(self, value):
+        return self._lookup(self.context['batches'], value, 'batch')
+
+
+
 class BillSerializer(serializers.ModelSerializer):
     class Meta:
         model = Bill
-        # optionally, you can exclude fields or set read_only_fields
-        fields = '__all__'
+        # client mirrors member.client for tenant listings; it isn't part of the API
+        exclude = ('client',)
         read_only_fields = ('paid_amount', 'due_amount', 'bill_date')
 
     # Optionally, if you want to show member details nested:
@@ -300,10 +356,61 @@ class BillSerializer(serializers.ModelSerializer):
 
 
 
+class BillPrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """
+    Looks bills up in a preloaded {id: Bill} map from the serializer context
+    when one is given (bulk ingestion), instead of one query per row.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        request = self.context.get('request')
+        if request is not None and request.user.is_authenticated:
+            queryset = queryset.filter(client=request.user)
+        return queryset
+
+    def to_internal_value(self, data):
+        bills = self.context.get('bills')
+        if bills is None:
+            return super().to_internal_value(data)
+
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return bills[int(data)]
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+
+
+class PaymentListSerializer(serializers.ListSerializer):
+
+    def create(self, validated_data):
+        # bulk_create skips Payment.save(), so the tenant column is copied here
+        payments = [Payment(**item, client_id=item['bill'].client_id) for item in validated_data]
+
+        with transaction.atomic():
+            Payment.objects.bulk_create(payments)
+
+            # bulk_create skips Payment.save(), so apply the per-bill totals in bulk
+            totals = defaultdict(Decimal)
+            for payment in payments:
+                totals[payment.bill_id] += payment.amount
+            clients = apply_payments_to_bills(totals)
+            log_changes(Change.PAYMENT, [(clients[payment.bill_id], payment.pk) for payment in payments])
+
+        return payments
+
+
 class PaymentSerializer(serializers.ModelSerializer):
+    bill = BillPrimaryKeyField(queryset=Bill.objects.all())
+
     class Meta:
         model = Payment
-        fields = '__all__'
+        # client mirrors bill.client for tenant listings; it isn't part of the API
+        exclude = ('client',)
+        list_serializer_class = PaymentListSerializer
 
     def create(self, validated_data):
         payment = super().create(validated_data)
@@ -311,3 +418,70 @@ class PaymentSerializer(serializers.ModelSerializer):
         return payment
     
 
+
+
+class AttendanceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Attendance
+        fields = '__all__'
+
+
+class RollCallSerializer(serializers.Serializer):
+    """
+    Attendance for a whole batch session: validated with one membership
+    query and written with a single upsert on (batch, member, date).
+    """
+    batch = serializers.PrimaryKeyRelatedField(queryset=Batch.objects.all())
+    date = serializers.DateField()
+    present = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+    absent = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # Only the logged-in client's batches
+        fields['batch'].queryset = Batch.objects.filter(client=self.context['request'].user)
+        return fields
+
+    def validate(self, attrs):
+        present = set(attrs['present'])
+        absent = set(attrs['absent'])
+
+        if present & absent:
+            raise serializers.ValidationError({"absent": f"Members marked both present and absent: {sorted(present & absent)}"})
+        if not present and not absent:
+            raise serializers.ValidationError("Roll call is empty")
+
+        members = set(
+            Member.objects.filter(batch_group=attrs['batch'], id__in=present | absent)
+            .values_list('id', flat=True)
+        )
+        unknown = (present | absent) - members
+        if unknown:
+            raise serializers.ValidationError({"members": f"Not members of this batch: {sorted(unknown)}"})
+
+        attrs['present'] = present
+        attrs['absent'] = absent
+        return attrs
+
+    def create(self, validated_data):
+        batch = validated_data['batch']
+        day = validated_data['date']
+
+        rows = [
+            Attendance(client_id=batch.client_id, batch=batch, member_id=member_id, date=day, present=is_present)
+            for ids, is_present in ((validated_data['present'], True), (validated_data['absent'], False))
+            for member_id in sorted(ids)
+        ]
+
+        with transaction.atomic():
+            # Re-submitting the same roll call simply overwrites the rows
+            Attendance.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['batch', 'member', 'date'],
+                update_fields=['present'],
+            )
+            # The upsert sets the ids of inserted and updated rows alike
+            log_changes(Change.ATTENDANCE, [(batch.client_id, row.pk) for row in rows])
+            mark_bitmaps(batch, day, validated_data['present'], validated_data['absent'])
+        return rows
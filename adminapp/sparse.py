@@ -0,0 +1,148 @@
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+from functools import lru_cache, partial
+
+from django.utils import timezone
+from rest_framework import fields as drf_fields
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField, RelatedField
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+# Fields whose representation of a .values() column is the value itself
+PLAIN_FIELDS = (
+    drf_fields.CharField, drf_fields.IntegerField, drf_fields.BooleanField,
+    drf_fields.ChoiceField, PrimaryKeyRelatedField,
+)
+
+
+class UnsupportedField(Exception):
+    """
+    The serializer has a field that can't be read from a single column.
+    """
+
+
+def _iso_datetime(value, tz):
+    value = value.astimezone(tz).isoformat()
+    return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+
+def _formatter(field):
+    """
+    A to_representation() equivalent for a column value that isn't None, or
+    None when the value is returned as is. Non-default options fall back to
+    the field's own to_representation().
+    """
+    if isinstance(field, drf_fields.DecimalField):
+        coerce = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+        if field.localize or field.normalize_output or not coerce:
+            return field.to_representation
+        exponent = Decimal(1).scaleb(-field.decimal_places)
+        return lambda value: f'{value.quantize(exponent, rounding=ROUND_HALF_UP):f}'
+
+    if isinstance(field, drf_fields.DateTimeField):
+        output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        if output_format != drf_fields.ISO_8601 or hasattr(field, 'timezone'):
+            return field.to_representation
+        return _iso_datetime
+
+    if isinstance(field, drf_fields.DateField):
+        if getattr(field, 'format', api_settings.DATE_FORMAT) != drf_fields.ISO_8601:
+            return field.to_representation
+        return date.isoformat
+
+    if isinstance(field, drf_fields.JSONField) and not field.binary:
+        return None
+    if isinstance(field, PLAIN_FIELDS):
+        return None
+    if isinstance(field, (RelatedField, ManyRelatedField, drf_fields.SerializerMethodField, serializers.BaseSerializer)):
+        raise UnsupportedField(field.field_name)
+    return field.to_representation
+
+
+@lru_cache(maxsize=64)
+def values_plan(serializer_class, names=None):
+    """
+    [(output name, .values() column, formatter)] for the readable fields of
+    serializer_class, limited to names (a tuple) when given. Built from one
+    serializer instance and cached, so requests don't rebuild the fields.
+    Raises ValidationError for unknown names and UnsupportedField for fields
+    that don't map onto a column.
+    """
+    readable = {name: field for name, field in serializer_class().fields.items() if not field.write_only}
+
+    if names is not None:
+        unknown = [name for name in names if name not in readable]
+        if unknown:
+            raise ValidationError({'fields': f"Unknown fields: {', '.join(unknown)}."})
+        readable = {name: readable[name] for name in names}
+
+    plan = []
+    for name, field in readable.items():
+        if field.source == '*' or '.' in field.source:
+            raise UnsupportedField(name)
+        plan.append((name, field.source, _formatter(field)))
+    return plan
+
+
+class RowSerializer(serializers.BaseSerializer):
+    """
+    Read-only representation of .values() rows following a values_plan():
+    one dict lookup and at most one formatting call per column, instead of
+    ModelSerializer's per-field attribute access and to_representation
+    dispatch. Output matches the serializer the plan was built from.
+    """
+
+    def __init__(self, *args, plan, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Resolve the active time zone once, not per datetime value
+        tz = timezone.get_current_timezone()
+        self.plan = [
+            (name, column, partial(formatter, tz=tz) if formatter is _iso_datetime else formatter)
+            for name, column, formatter in plan
+        ]
+
+    def to_representation(self, row):
+        data = {}
+        for name, column, formatter in self.plan:
+            value = row[column]
+            data[name] = value if formatter is None or value is None else formatter(value)
+        return data
+
+
+class SparseFieldsMixin:
+    """
+    GET list for a ModelSerializer view that reads only the columns it
+    returns: ?fields=a,b limits both the selected columns (.values()) and the
+    output, and rows are represented with RowSerializer. Other methods, and
+    serializers with fields that don't map onto a column, use the regular
+    path.
+    """
+
+    def requested_fields(self, request):
+        fields = request.query_params.get('fields')
+        if not fields:
+            return None
+        return tuple(dict.fromkeys(name.strip() for name in fields.split(',') if name.strip()))
+
+    def list(self, request, *args, **kwargs):
+        try:
+            plan = values_plan(self.get_serializer_class(), self.requested_fields(request))
+        except UnsupportedField:
+            return super().list(request, *args, **kwargs)
+
+        columns = {column for _, column, _ in plan}
+        # Cursor pagination reads its position from the ordering columns
+        ordering = getattr(self.paginator, 'ordering', None) or ()
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        columns.update(field.lstrip('-') for field in ordering)
+
+        queryset = self.filter_queryset(self.get_queryset()).values(*columns)
+        page = self.paginate_queryset(queryset)
+        serializer = RowSerializer(queryset if page is None else page, many=True, plan=plan)
+        if page is None:
+            return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
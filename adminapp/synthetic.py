@@ -0,0 +1,201 @@
+import random
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from adminapp.attendance import day_bit
+from adminapp.models import (Attendance, AttendanceMonth, Batch, Bill, Change, Client, Member,
+                             Payment, Subscription, change_entries, fee_totals)
+
+
+PREFIX = 'synthetic'
+
+PASSWORD = 'synthetic-pass'
+
+BATCH_SIZE = 5000
+
+FEE_NAMES = ('Tuition', 'Equipment', 'Locker', 'Coaching')
+
+
+@dataclass
+class Spec:
+    clients: int = 10
+    members: int = 200          # per client
+    subscriptions: int = 3      # per client
+    batches: int = 5            # per client
+    bills: int = 3              # monthly bills per member
+    attendance_days: int = 30
+    seed: int = 42
+
+
+def generate(spec, tag=None):
+    """
+    Bulk-insert a synthetic data set described by spec. Maintained columns
+    (fee totals, outstanding fees and receivables, attendance bitmaps) are
+    filled in directly, as bulk_create bypasses the model save() logic.
+    Returns a summary with the tag, row counts and the clients' token keys.
+    """
+    rng = random.Random(spec.seed)
+    tag = tag or uuid.uuid4().hex[:8]
+    now = timezone.now()
+    today = timezone.localdate()
+
+    # Hash once, every client shares the password
+    template = Client()
+    template.set_password(PASSWORD)
+
+    with transaction.atomic():
+        clients = Client.objects.bulk_create([
+            Client(
+                username=f'{PREFIX}-{tag}-{c}', email=f'{PREFIX}-{tag}-{c}@example.com',
+                business_name=f'Synthetic {tag} {c}', password=template.password,
+                subscription_end=today + timedelta(days=365),
+            )
+            for c in range(spec.clients)
+        ])
+        tokens = Token.objects.bulk_create([
+            Token(key=Token.generate_key(), user=client) for client in clients
+        ])
+
+        subscriptions = []
+        for client in clients:
+            for s in range(spec.subscriptions):
+                fees = [
+                    {'name': name, 'value': rng.randrange(200, 3000, 50), 'recurring': rng.random() < 0.8}
+                    for name in rng.sample(FEE_NAMES, rng.randint(1, len(FEE_NAMES)))
+                ]
+                subscription = Subscription(client=client, name=f'Plan {s}', admission_fee=rng.choice((0, 500, 1000)),
+                                            custom_fees=fees)
+                subscription.recurring_total, subscription.joining_total = fee_totals(
+                    subscription.admission_fee, subscription.custom_fees
+                )
+                subscriptions.append(subscription)
+        Subscription.objects.bulk_create(subscriptions)
+
+        batches = Batch.objects.bulk_create([
+            Batch(client=client, name=f'Batch {b}', days='Mon-Fri')
+            for client in clients
+            for b in range(spec.batches)
+        ])
+
+        # Plan members with their bills and payments first, so outstanding_fee
+        # can be set on insert
+        members, bill_plans = [], []
+        for c, client in enumerate(clients):
+            plans = subscriptions[c * spec.subscriptions:(c + 1) * spec.subscriptions]
+            groups = batches[c * spec.batches:(c + 1) * spec.batches]
+            for m in range(spec.members):
+                subscription = rng.choice(plans)
+                first_cycle = now - relativedelta(months=spec.bills) + timedelta(days=rng.randrange(28))
+                member = Member(
+                    client=client, full_name=f'Member {c}-{m}', subscription=subscription,
+                    batch_group=rng.choice(groups), gender=rng.choice('MFO'),
+                    contact_number=f'9{rng.randrange(10 ** 9):09d}',
+                    recurring_date=first_cycle + relativedelta(months=spec.bills),
+                    outstanding_fee=Decimal('0.00'),
+                )
+
+                bills = []
+                for cycle in range(spec.bills):
+                    total = subscription.recurring_total
+                    paid = rng.choice((total, total, total / 2, Decimal('0.00'))).quantize(Decimal('0.01'))
+                    bills.append((first_cycle + relativedelta(months=cycle), total, paid))
+                    member.outstanding_fee += total - paid
+
+                client.outstanding_receivables += member.outstanding_fee
+                members.append(member)
+                bill_plans.append(bills)
+
+        Member.objects.bulk_create(members, batch_size=BATCH_SIZE)
+        Client.objects.bulk_update(clients, ['outstanding_receivables'])
+
+        bills = Bill.objects.bulk_create(
+            [
+                Bill(member=member, client_id=member.client_id, subscription=member.subscription, total_amount=total,
+                     paid_amount=paid, due_amount=total - paid, bill_date=cycle_date,
+                     recurring_date=cycle_date, is_recurring=True)
+                for member, plan in zip(members, bill_plans)
+                for cycle_date, total, paid in plan
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        payments = Payment.objects.bulk_create(
+            (
+                Payment(bill=bill, client_id=bill.client_id, amount=bill.paid_amount,
+                        payment_method=rng.choice(('CASH', 'CARD')))
+                for bill in bills if bill.paid_amount
+            ),
+            batch_size=BATCH_SIZE,
+        )
+
+        attendance, months = _attendance(members, spec.attendance_days, today, rng)
+        Attendance.objects.bulk_create(attendance, batch_size=BATCH_SIZE)
+        AttendanceMonth.objects.bulk_create(months.values(), batch_size=BATCH_SIZE)
+
+        # So a first sync (changes?since=0) returns the whole data set
+        Change.objects.bulk_create(
+            change_entries(Change.MEMBER, [(m.client_id, m.pk) for m in members])
+            + change_entries(Change.BILL, [(b.member.client_id, b.pk) for b in bills])
+            + change_entries(Change.PAYMENT, [(p.bill.member.client_id, p.pk) for p in payments])
+            + change_entries(Change.ATTENDANCE, [(a.client_id, a.pk) for a in attendance]),
+            batch_size=BATCH_SIZE,
+        )
+
+    return {
+        'tag': tag,
+        'spec': asdict(spec),
+        'rows': {
+            'clients': len(clients),
+            'subscriptions': len(subscriptions),
+            'batches': len(batches),
+            'members': len(members),
+            'bills': len(bills),
+            'payments': len(payments),
+            'attendance': len(attendance),
+        },
+        'tokens': [token.key for token in tokens],
+    }
+
+
+def _attendance(members, days, today, rng):
+    attendance, months = [], {}
+    for member in members:
+        for offset in range(days):
+            day = today - timedelta(days=offset)
+            present = rng.random() < 0.8
+            attendance.append(Attendance(client=member.client, batch=member.batch_group, member=member,
+                                         date=day, present=present))
+
+            key = (member.batch_group_id, member.pk, day.year, day.month)
+            row = months.get(key)
+            if row is None:
+                row = months[key] = AttendanceMonth(client=member.client, batch=member.batch_group, member=member,
+                                                    year=day.year, month=day.month)
+            row.marked_bits |= day_bit(day)
+            if present:
+                row.present_bits |= day_bit(day)
+    return attendance, months
+
+
+def delete(tag=None):
+    """
+    Remove synthetic clients (one tag, or all of them) and everything they own.
+    Returns the number of clients deleted.
+    """
+    prefix = f'{PREFIX}-{tag}-' if tag else f'{PREFIX}-'
+    clients = Client.objects.filter(username__startswith=prefix)
+
+    with transaction.atomic():
+        # Members (and their bills) first: Subscription is a protected FK
+        Member.objects.filter(client__in=clients).delete()
+        count = 0
+        for client in clients:
+            client.delete()
+            count += 1
+    return count
@@ -1,3 +1,1309 @@
+import base64
+import io
+import random
+import re
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from smtplib import SMTPRecipientsRefused
+from unittest import mock
+
+from django.core import mail
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.core.mail.backends import locmem
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import connection, transaction
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from adminapp.aging import REPORT_CACHE_ALIAS, aging_queryset
+from adminapp.attendance import ALL_DAYS, batch_month_summary, consecutive_absences, day_bit
+from adminapp.authentication import TOKEN_CACHE_ALIAS, CachedTokenAuthentication
+from adminapp.billing import due_members, run_recurring_billing
+from adminapp.currency import DEFAULT_CURRENCY, _remote_currencies, currency_for_country, currency_symbol
+from adminapp.expiry import expire_subscriptions, expired_clients
+from adminapp.ledger import close_month, month_bounds
+from adminapp.metrics import registry
+from adminapp.outbox import BACKOFF_BASE_SECONDS, MAX_ATTEMPTS, backoff_delay, deliver_pending, queue_email
+from adminapp.pagination import BillCursorPagination, MemberCursorPagination, PaymentCursorPagination
+from adminapp.serializers import BillSerializer, MemberSerializer, PaymentSerializer
+from adminapp.models import (Attendance, AttendanceMonth, Batch, Bill, Change, Client, Member, OutboundEmail,
+                             Payment, PaymentRecord, Subscription)
+
+
+class QueryPlanTests(TestCase):
+    """
+    Runs EXPLAIN QUERY PLAN on the hot tenant-scoped querysets against
+    100k+ rows and fails if any of them falls back to a full table scan.
+    """
+
+    ROWS = 100_000
+    CLIENTS = 50
+
+    @classmethod
+    def setUpTestData(cls):
+        clients = Client.objects.bulk_create([
+            Client(username=f"client{i}", email=f"client{i}@example.com", business_name=f"Gym {i}")
+            for i in range(cls.CLIENTS)
+        ])
+        subscriptions = Subscription.objects.bulk_create([
+            Subscription(client=client, name="Monthly", custom_fees=[{"name": "Tuition", "value": 1000, "recurring": True}])
+            for client in clients
+        ])
+        batches = Batch.objects.bulk_create([
+            Batch(client=client, name="Morning")
+            for client in clients
+        ])
+
+        now = timezone.now()
+        members = Member.objects.bulk_create([
+            Member(
+                client=clients[i % cls.CLIENTS],
+                full_name=f"Member {i}",
+                subscription=subscriptions[i % cls.CLIENTS],
+                batch_group=batches[i % cls.CLIENTS],
+                recurring_date=now + timedelta(days=i % 60 - 30),
+                is_active=i % 10 != 0,
+            )
+            for i in range(cls.ROWS)
+        ], batch_size=5000)
+
+        Bill.objects.bulk_create([
+            Bill(
+                member=member,
+                client=member.client,
+                subscription=subscriptions[i % cls.CLIENTS],
+                total_amount=Decimal("1000.00"),
+                due_amount=Decimal("1000.00"),
+                recurring_date=member.recurring_date,
+            )
+            for i, member in enumerate(members)
+        ], batch_size=5000)
+        Payment.objects.bulk_create([
+            Payment(bill=bill, client_id=bill.client_id, amount=Decimal("100.00"), payment_method="CASH")
+            for bill in Bill.objects.all()
+        ], batch_size=5000)
+
+        today = date.today()
+        Attendance.objects.bulk_create([
+            Attendance(
+                client=clients[i % cls.CLIENTS],
+                batch=batches[i % cls.CLIENTS],
+                member=member,
+                date=today - timedelta(days=i % 30),
+                present=bool(i % 2),
+            )
+            for i, member in enumerate(members)
+        ], batch_size=5000)
+
+        cls.client_obj = clients[0]
+        cls.member = members[0]
+
+    def assertNoFullScan(self, queryset):
+        self.assertEqual(connection.vendor, "sqlite")
+        plan = queryset.explain()
+        table = queryset.model._meta.db_table
+        self.assertIsNone(
+            re.search(rf"\bSCAN {table}\b", plan),
+            f"Full scan of {table}:\n{plan}",
+        )
+
+    def test_member_list_by_client(self):
+        self.assertNoFullScan(Member.objects.filter(client=self.client_obj))
+
+    def test_member_list_by_client_and_status(self):
+        self.assertNoFullScan(Member.objects.filter(client=self.client_obj, is_active=True))
+
+    def assertSeeksPage(self, queryset):
+        # A deep cursor page reads its rows straight off one index: no scan and
+        # no sort of everything the client has
+        self.assertNoFullScan(queryset)
+        plan = queryset.explain()
+        self.assertNotIn("TEMP B-TREE", plan)
+        self.assertEqual(len(re.findall(r"\b(SEARCH|SCAN)\b", plan)), 1, plan)
+
+    def assertSeeksCursorPages(self, pagination_class, queryset):
+        # Both directions of a keyset cursor, every query the page may run
+        paginator = pagination_class()
+        position = [timezone.now(), 1000]
+        for reverse in (False, True):
+            ordering = [paginator._flip(field) for field in paginator.ordering] if reverse else paginator.ordering
+            for seek in paginator.seeks(position, reverse):
+                self.assertSeeksPage(queryset.filter(seek).order_by(*ordering)[:50])
+
+    def test_member_cursor_page(self):
+        self.assertSeeksCursorPages(MemberCursorPagination, Member.objects.filter(client=self.client_obj))
+
+    def test_bill_cursor_page(self):
+        self.assertSeeksCursorPages(BillCursorPagination, Bill.objects.filter(client=self.client_obj))
+
+    def test_payment_cursor_page(self):
+        self.assertSeeksCursorPages(PaymentCursorPagination, Payment.objects.filter(client=self.client_obj))
+
+    def test_batch_list_by_client(self):
+        self.assertNoFullScan(Batch.objects.filter(client=self.client_obj))
+
+    def test_subscription_list_by_client(self):
+        self.assertNoFullScan(Subscription.objects.filter(client=self.client_obj))
+
+    def test_due_member_selection(self):
+        self.assertNoFullScan(due_members(timezone.now()))
+
+    def test_expired_client_selection(self):
+        self.assertNoFullScan(expired_clients())
+
+    def test_bill_already_generated_check(self):
+        self.assertNoFullScan(
+            Bill.objects.filter(member=self.member, recurring_date=self.member.recurring_date)
+        )
+
+    def test_bill_already_billed_chunk_lookup(self):
+        self.assertNoFullScan(
+            Bill.objects.filter(
+                member_id__in=[self.member.id, self.member.id + 1],
+                recurring_date__lte=timezone.now(),
+            ).values_list("member_id", "recurring_date")
+        )
+
+    def test_attendance_by_client_and_date(self):
+        self.assertNoFullScan(Attendance.objects.filter(client=self.client_obj, date=date.today()))
+
+    def test_receivables_aging(self):
+        self.assertNoFullScan(aging_queryset(self.client_obj.id, date.today()))
+
+    def test_change_log_page(self):
+        self.assertNoFullScan(Change.objects.filter(client=self.client_obj, id__gt=1000).order_by("id")[:500])
+
+
+API = "/feezy/"
+
+
+class QueryBudgetTests(APITestCase):
+    """
+    Each endpoint runs a fixed number of queries: the count is measured
+    with a small and a larger data set and must be equal (no N+1) and
+    within the endpoint's budget. Token lookups are measured cold.
+    """
+
+    SMALL = 5
+    LARGE = 40
+
+    def setUp(self):
+        self.owner = Client.objects.create_user(username="owner", email="owner@example.com", password="s3cret-pass")
+        self.token = Token.objects.create(user=self.owner)
+        self.subscription = Subscription.objects.create(
+            client=self.owner, name="Monthly",
+            custom_fees=[{"name": "Tuition", "value": 1000, "recurring": True}],
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def seed(self, count, recurring_date=None):
+        batches = Batch.objects.bulk_create(
+            Batch(client=self.owner, name=f"Batch {i}") for i in range(count)
+        )
+        members = Member.objects.bulk_create(
+            Member(client=self.owner, full_name=f"Member {i}", subscription=self.subscription,
+                   batch_group=batches[i], recurring_date=recurring_date)
+            for i in range(count)
+        )
+        bills = Bill.objects.bulk_create(
+            Bill(member=member, client=self.owner, subscription=self.subscription,
+                 total_amount=Decimal("1000.00"), due_amount=Decimal("1000.00"))
+            for member in members
+        )
+        Payment.objects.bulk_create(
+            Payment(bill=bill, client=self.owner, amount=Decimal("100.00"), payment_method="CASH") for bill in bills
+        )
+        return members
+
+    def count_queries(self, request, expected_status=200):
+        caches[TOKEN_CACHE_ALIAS].clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = request()
+        self.assertEqual(response.status_code, expected_status, getattr(response, "data", None))
+        return len(queries)
+
+    def assertFlatBudget(self, budget, request, expected_status=200, **seed_kwargs):
+        self.seed(self.SMALL, **seed_kwargs)
+        small = self.count_queries(request, expected_status)
+        self.seed(self.LARGE - self.SMALL, **seed_kwargs)
+        large = self.count_queries(request, expected_status)
+
+        self.assertEqual(small, large, f"Query count grows with rows: {small} for {self.SMALL}, {large} for {self.LARGE}")
+        self.assertLessEqual(large, budget)
+
+    def test_member_list(self):
+        # token + collection version (ETag) + page
+        self.assertFlatBudget(3, lambda: self.client.get(API + "members/"))
+
+    def test_batch_list(self):
+        self.assertFlatBudget(3, lambda: self.client.get(API + "batch/"))
+
+    def test_subscription_list(self):
+        self.assertFlatBudget(3, lambda: self.client.get(API + "subscriptions/"))
+
+    def test_payment_list(self):
+        self.assertFlatBudget(2, lambda: self.client.get(API + "payments/"))
+
+    def test_bill_list(self):
+        self.assertFlatBudget(2, lambda: self.client.get(API + "bills/"))
+
+    def test_recurring_bill_run(self):
+        admin = Client.objects.create_superuser(username="admin", email="admin@example.com", password="x")
+        self.client.force_authenticate(admin)
+        self.assertFlatBudget(
+            12, lambda: self.client.post(API + "recurring-bill/run/", {}, format="json"),
+            recurring_date=timezone.now() - timedelta(days=1),
+        )
+
+    def test_recurring_bill_single_member(self):
+        member = self.seed(1, recurring_date=timezone.now() - timedelta(days=1))[0]
+        queries = self.count_queries(lambda: self.client.post(API + f"recurring-bill/{member.id}/"), expected_status=201)
+        # includes the savepoint pair from Bill.save() nested in bill_member()'s transaction
+        # and the members version bump and change log inserts of Bill.save() / Member.save()
+        self.assertLessEqual(queries, 14)
+
+    def test_async_recurring_bill_single_member(self):
+        member = self.seed(1, recurring_date=timezone.now() - timedelta(days=1))[0]
+        queries = self.count_queries(lambda: self.client.post(API + f"async/recurring-bill/{member.id}/"), expected_status=201)
+        # includes the savepoint pair from Bill.save() nested in bill_member()'s transaction
+        # and the members version bump and change log inserts of Bill.save() / Member.save()
+        self.assertLessEqual(queries, 14)
+
+    def test_member_import(self):
+        def upload(rows):
+            lines = ["full_name,subscription,recurring_date"]
+            lines += [f"Member {i},Monthly,{timezone.now().isoformat()}" for i in range(rows)]
+            lines.append("Broken,No such plan,")
+            csv_file = SimpleUploadedFile("members.csv", "\n".join(lines).encode())
+            return lambda: self.client.post(API + "members/import/", {"file": csv_file}, format="multipart")
+
+        small = self.count_queries(upload(self.SMALL))
+        large = self.count_queries(upload(self.LARGE))
+        self.assertEqual(small, large)
+
+        self.assertEqual(Member.objects.filter(client=self.owner).count(), self.SMALL + self.LARGE)
+        self.assertEqual(Bill.objects.filter(member__client=self.owner).count(), self.SMALL + self.LARGE)
+        self.owner.refresh_from_db()
+        self.assertEqual(self.owner.outstanding_receivables, Decimal("1000.00") * (self.SMALL + self.LARGE))
+
+    def bulk_payments(self, amounts):
+        # Every amount is paid against every bill of the owner, spread through the list
+        bills = list(Bill.objects.filter(member__client=self.owner).values_list("id", flat=True))
+        payload = [{"bill": bill_id, "amount": amount, "payment_method": "CASH"} for amount in amounts for bill_id in bills]
+        return self.client.post(API + "payments/bulk/", payload, format="json")
+
+    def test_bulk_payments(self):
+        # the payload's bill ids, then token, bills, savepoint pair, the payment
+        # insert, one select and one UPDATE per table for the per-bill totals and
+        # two change log inserts, however many payments and bills
+        self.assertFlatBudget(12, lambda: self.bulk_payments(["100.00", "50.25", "0.75"]), expected_status=201)
+
+    def test_bulk_payment_totals(self):
+        first, second = self.seed(2)
+        Bill.objects.create(member=first, subscription=self.subscription, total_amount=Decimal("200.00"),
+                            due_amount=Decimal("200.00"))
+        Member.objects.filter(pk__in=[first.pk, second.pk]).update(outstanding_fee=Decimal("1000.00"))
+        Member.objects.filter(pk=first.pk).update(outstanding_fee=Decimal("1200.00"))
+        Client.objects.filter(pk=self.owner.pk).update(outstanding_receivables=Decimal("2200.00"))
+
+        response = self.bulk_payments(["100.00", "50.25", "0.75"])
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(len(response.data["payments"]), 9)
+
+        # Each bill gets the sum of its own payments, each member the sum over their bills
+        self.assertEqual(
+            sorted(Bill.objects.filter(member__client=self.owner).values_list("total_amount", "paid_amount", "due_amount")),
+            [(Decimal("200.00"), Decimal("151.00"), Decimal("49.00"))]
+            + [(Decimal("1000.00"), Decimal("151.00"), Decimal("849.00"))] * 2,
+        )
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.outstanding_fee, second.outstanding_fee), (Decimal("898.00"), Decimal("849.00")))
+        self.owner.refresh_from_db()
+        self.assertEqual(self.owner.outstanding_receivables, Decimal("1747.00"))
+
+    def test_roll_call(self):
+        def roll_call(batch, present, absent, expected_status=200):
+            return lambda: self.client.post(API + "attendance/roll-call/", {
+                "batch": batch.id, "date": "2026-10-01",
+                "present": [member.id for member in present], "absent": [member.id for member in absent],
+            }, format="json")
+
+        def roster(size):
+            batch = Batch.objects.create(client=self.owner, name=f"Roll call {size}")
+            members = Member.objects.bulk_create(
+                Member(client=self.owner, full_name=f"Member {i}", subscription=self.subscription, batch_group=batch)
+                for i in range(size)
+            )
+            return batch, members
+
+        counts = []
+        for size in (self.SMALL, self.LARGE):
+            batch, members = roster(size)
+            counts.append(self.count_queries(roll_call(batch, members, [])))
+            rows = Attendance.objects.filter(batch=batch).count()
+
+            # Re-submitting with one member flipped overwrites in place
+            counts.append(self.count_queries(roll_call(batch, members[1:], members[:1])))
+            self.assertEqual(Attendance.objects.filter(batch=batch).count(), rows)
+            self.assertEqual(rows, size)
+            self.assertEqual(
+                dict(Attendance.objects.filter(batch=batch, member__in=members[:2]).values_list("member_id", "present")),
+                {members[0].id: False, members[1].id: True},
+            )
+
+        # token, batch, one membership select, savepoint pair, one upsert, the change
+        # log and the bitmap statements (one more with absentees), however many members
+        first, again = counts[0::2], counts[1::2]
+        self.assertEqual(len(set(first)), 1, counts)
+        self.assertEqual(len(set(again)), 1, counts)
+        self.assertLessEqual(max(counts), 10)
+
+        # Members of another batch or another client are rejected, and nothing is written
+        batch, members = roster(2)
+        other_batch, other_members = roster(1)
+        other = Client.objects.create(username="other", email="other@example.com")
+        stranger = Member.objects.create(client=other, full_name="Not mine",
+                                         subscription=Subscription.objects.create(client=other, name="Other"))
+        for outsider in (other_members[0], stranger):
+            self.count_queries(roll_call(batch, members + [outsider], []), expected_status=400)
+        self.assertFalse(Attendance.objects.filter(batch=batch).exists())
+
+    def test_csv_export(self):
+        other = Client.objects.create(username="other", email="other@example.com")
+        other_subscription = Subscription.objects.create(client=other, name="Other")
+        Member.objects.create(client=other, full_name="Not mine", subscription=other_subscription)
+
+        for kind in ("bills", "payments", "members"):
+            self.seed(self.SMALL)
+            caches[TOKEN_CACHE_ALIAS].clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(API + f"export/{kind}/")
+                lines = b"".join(response.streaming_content).decode().splitlines()
+
+            # token + one streamed select, however many rows
+            self.assertEqual(len(queries), 2, kind)
+            self.assertEqual(len(lines) - 1, Member.objects.filter(client=self.owner).count(), kind)
+            self.assertNotIn("Not mine", "\n".join(lines))
+
+    def test_invalid_date_filters(self):
+        self.seed(1)
+        for path in ("members/", "payments/", "bills/", "export/bills/", "export/payments/", "export/members/"):
+            for params in ({"date_from": "2024-02-30"}, {"date_to": "2024-13-01"}, {"date_to": "9999-12-31"},
+                           {"date_from": "0001-01-01"}, {"date_from": "yesterday"}):
+                response = self.client.get(API + path, params)
+                self.assertEqual(response.status_code, 400, (path, params))
+                self.assertIn(next(iter(params)), response.json(), (path, params))
+
+            response = self.client.get(API + path, {"date_from": "2024-02-29", "date_to": "9999-12-30"})
+            self.assertEqual(response.status_code, 200, path)
+
+    def test_conditional_list(self):
+        self.seed(self.SMALL)
+        writes = {
+            "batch/": lambda: self.client.post(API + "batch/", {"name": "Evening"}, format="json"),
+            "subscriptions/": lambda: self.client.post(API + "subscriptions/", {"client": self.owner.id, "name": "Yearly"},
+                                                       format="json"),
+            "members/": lambda: self.client.post(API + "payments/", {
+                "bill": Bill.objects.filter(member__client=self.owner).first().id,
+                "amount": "10.00", "payment_method": "CASH",
+            }, format="json"),
+        }
+        for path, write in writes.items():
+            etag = self.client.get(API + path)["ETag"]
+
+            # token + version lookup; the list query and serializer never run
+            queries = self.count_queries(
+                lambda: self.client.get(API + path, HTTP_IF_NONE_MATCH=etag), expected_status=304
+            )
+            self.assertEqual(queries, 2, path)
+            self.assertNotEqual(self.client.get(API + path + "?page_size=1")["ETag"], etag, path)
+
+            self.assertIn(write().status_code, (200, 201), path)
+            response = self.client.get(API + path, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200, path)
+            self.assertNotEqual(response["ETag"], etag, path)
+
+    def test_changes(self):
+        def sync(since=0, limit=None):
+            params = {"since": since, **({"limit": limit} if limit else {})}
+            response = self.client.get(API + "changes/", params)
+            self.assertEqual(response.status_code, 200, response.data)
+            return response.data
+
+        members = self.seed(2)
+        cursor = sync()["cursor"]
+        batch = members[0].batch_group
+
+        # A payment (bill, member and payment), a roll call and two deletions
+        payment = self.client.post(API + "payments/", {"bill": members[0].bills.first().id, "amount": "10.00",
+                                                      "payment_method": "CASH"}, format="json").data
+        self.client.post(API + "attendance/roll-call/", {"batch": batch.id, "date": "2026-10-01",
+                                                        "present": [members[0].id]}, format="json")
+        self.client.delete(API + f"payments/{payment['id']}/")
+        self.client.delete(API + f"member/{members[1].id}/")
+
+        page = sync(cursor)
+        self.assertFalse(page["has_more"])
+        changes = page["changes"]
+        self.assertEqual([row["id"] for row in changes["members"]["updated"]], [members[0].id])
+        self.assertEqual(changes["members"]["deleted"], [members[1].id])
+        # the deletion reversed the payment
+        self.assertEqual(changes["bills"]["updated"][0]["paid_amount"], "0.00")
+        self.assertEqual(changes["bills"]["updated"][0]["due_amount"], "1000.00")
+        self.assertEqual(changes["payments"], {"updated": [], "deleted": [payment["id"]]})
+        self.assertEqual(len(changes["attendance"]["updated"]), 1)
+        self.assertEqual(sync(page["cursor"])["changes"]["members"], {"updated": [], "deleted": []})
+
+        # Paging walks the same entries
+        seen, cursor, pages = set(), cursor, 0
+        while True:
+            page = sync(cursor, limit=2)
+            for name, feed in page["changes"].items():
+                seen |= {(name, row["id"]) for row in feed["updated"]} | {(name, pk) for pk in feed["deleted"]}
+            cursor, pages = page["cursor"], pages + 1
+            if not page["has_more"]:
+                break
+        self.assertGreater(pages, 1)
+        self.assertIn(("payments", payment["id"]), seen)
+
+        for limit in (0, -1, 100_000):
+            self.assertEqual(self.client.get(API + "changes/", {"limit": limit}).status_code, 400, limit)
+
+        # token + log page + one fetch per kind, however long the log
+        queries = self.count_queries(lambda: self.client.get(API + "changes/"))
+        self.assertLessEqual(queries, 6)
+
+    def test_sparse_fields(self):
+        members = self.seed(3)
+        Member.objects.filter(pk=members[0].pk).update(date_of_birth=date(1990, 5, 17), email="a@example.com")
+        lists = {
+            "members/": (MemberSerializer, Member.objects.filter(client=self.owner).order_by("-created_at", "-id")),
+            "bills/": (BillSerializer, Bill.objects.filter(member__client=self.owner).order_by("-bill_date", "-id")),
+            "payments/": (PaymentSerializer, Payment.objects.filter(bill__member__client=self.owner)
+                          .order_by("-payment_date", "-id")),
+        }
+        for path, (serializer_class, queryset) in lists.items():
+            # The row path renders exactly what the ModelSerializer would
+            response = self.client.get(API + path)
+            self.assertEqual(response.data["results"], serializer_class(queryset, many=True).data, path)
+
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(API + path, {"fields": "id,amount" if path == "payments/" else "id"})
+            self.assertEqual(set(response.data["results"][0]), {"id", "amount"} if path == "payments/" else {"id"})
+            self.assertNotIn("payment_method", queries[-1]["sql"])
+            self.assertNotIn("full_name", queries[-1]["sql"])
+
+            response = self.client.get(API + path, {"fields": "id,nope"})
+            self.assertEqual(response.status_code, 400, path)
+
+    def test_receivables_aging(self):
+        caches[REPORT_CACHE_ALIAS].clear()
+        member = self.seed(1)[0]
+        now = timezone.now()
+        for days in (45, 75, 120):
+            Bill.objects.create(member=member, subscription=self.subscription, total_amount=Decimal("100.00"),
+                                bill_date=now - timedelta(days=days))
+
+        def cold():
+            caches[REPORT_CACHE_ALIAS].clear()
+            return self.client.get(API + "receivables/aging/")
+
+        # token + version + one grouped select; a cached report skips the select
+        self.assertFlatBudget(3, cold)
+        self.assertEqual(self.count_queries(lambda: self.client.get(API + "receivables/aging/")), 2)
+
+        response = self.client.get(API + "receivables/aging/")
+        self.assertEqual(response["X-Cache"], "HIT")
+        row = next(row for row in response.json()["members"] if row["member"] == member.id)
+        self.assertEqual(
+            [row[key] for key in ("days_0_30", "days_31_60", "days_61_90", "days_90_plus", "total")],
+            ["1000.00", "100.00", "100.00", "100.00", "1300.00"],
+        )
+
+        # A payment or a rename moves the version: nothing is deleted from the
+        # cache, so a worker that didn't make the write misses just the same
+        with mock.patch.object(type(caches[REPORT_CACHE_ALIAS]), "delete_many") as delete_many:
+            self.client.post(API + "payments/", {"bill": member.bills.first().id, "amount": "50.00",
+                                                 "payment_method": "CASH"}, format="json")
+            response = self.client.get(API + "receivables/aging/")
+            self.assertEqual(response["X-Cache"], "MISS")
+            self.assertEqual(response.json()["totals"]["total"], "41250.00")
+
+            self.client.patch(API + f"member/{member.id}/", {"full_name": "Renamed"}, format="json")
+            response = self.client.get(API + "receivables/aging/")
+            self.assertEqual(response["X-Cache"], "MISS")
+            row = next(row for row in response.json()["members"] if row["member"] == member.id)
+            self.assertEqual(row["full_name"], "Renamed")
+        delete_many.assert_not_called()
+
+        # A new bill_date with the same dues moves the buckets
+        bill = member.bills.filter(total_amount=Decimal("100.00")).first()
+        bill.bill_date = now
+        bill.save()
+        response = self.client.get(API + "receivables/aging/")
+        self.assertEqual(response["X-Cache"], "MISS")
+
+    def test_month_close(self):
+        now = timezone.localtime()
+        members = self.seed(3)  # a 1000.00 bill and a 100.00 payment each, both this month
+        Payment.objects.create(bill=members[0].bills.get(), amount=Decimal("900.00"), payment_method="CASH")
+        Payment.objects.create(bill=members[1].bills.get(), amount=Decimal("300.00"), payment_method="CASH")
+        Bill.objects.filter(member=members[2]).update(bill_date=now - timedelta(days=40))
+
+        def records():
+            return {
+                member_id: (paid, status) for member_id, paid, status in
+                PaymentRecord.objects.filter(month=now.month, year=now.year)
+                .values_list("customer_id", "amount_paid", "status")
+            }
+
+        # per chunk, whatever its size: two grouped selects, the upsert, the
+        # status UPDATE and the status count (and one empty select to finish)
+        with CaptureQueriesContext(connection) as queries:
+            summary = close_month(now.year, now.month, chunk_size=2)
+        self.assertEqual(summary["records"], 3)
+        self.assertEqual(summary["statuses"], {"Paid": 2, "Partial": 1, "Due": 0})
+        self.assertEqual(len([q for q in queries if not q["sql"].startswith(("SAVEPOINT", "RELEASE"))]), 2 * 5 + 1)
+        closed = {members[0].id: (Decimal("1000.00"), "Paid"), members[1].id: (Decimal("400.00"), "Partial"),
+                  members[2].id: (Decimal("100.00"), "Paid")}
+        self.assertEqual(records(), closed)
+
+        # A payment made after the month ended leaves the month's ledger alone
+        late = Payment.objects.create(bill=members[1].bills.get(), amount=Decimal("600.00"), payment_method="CASH")
+        Payment.objects.filter(pk=late.pk).update(payment_date=month_bounds(now.year, now.month)[1])
+        close_month(now.year, now.month)
+        self.assertEqual(records(), closed)
+
+        # Rerunning updates the existing rows in place
+        Payment.objects.filter(bill__member=members[1]).update(payment_date=now - timedelta(days=40))
+        close_month(now.year, now.month)
+        self.assertEqual(PaymentRecord.objects.count(), 3)
+        self.assertEqual(records()[members[1].id], (Decimal("0.00"), "Due"))
+
+    def test_login(self):
+        queries = self.count_queries(
+            lambda: self.client.post(API + "token/", {"username": "owner", "password": "s3cret-pass"}, format="json")
+        )
+        self.assertLessEqual(queries, 2)
+
+    def test_async_login(self):
+        queries = self.count_queries(
+            lambda: self.client.post(API + "async/token/", {"username": "owner", "password": "s3cret-pass"}, format="json")
+        )
+        self.assertLessEqual(queries, 2)
+
+
+class CursorPaginationTests(APITestCase):
+    """
+    A recurring run stamps every bill with the same bill_date: the cursor
+    has to page through the tie on (bill_date, id), not an offset.
+    """
+
+    BILLS = 1300
+
+    def setUp(self):
+        self.owner = Client.objects.create_user(username="owner", email="owner@example.com", password="s3cret-pass")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.owner).key}")
+        subscription = Subscription.objects.create(client=self.owner, name="Monthly")
+        members = Member.objects.bulk_create(
+            Member(client=self.owner, full_name=f"Member {i}", subscription=subscription) for i in range(self.BILLS)
+        )
+        run_date = timezone.now()
+        Bill.objects.bulk_create(
+            Bill(member=member, client=self.owner, subscription=subscription, bill_date=run_date,
+                 total_amount=Decimal("1000.00"), due_amount=Decimal("1000.00"))
+            for member in members
+        )
+
+    def walk(self, url, link, **params):
+        pages, queries = [], []
+        while url:
+            with CaptureQueriesContext(connection) as captured:
+                data = self.client.get(url, params).json()
+            pages.append([row["id"] for row in data["results"]])
+            queries.append(len(captured))
+            url, params = data[link], {}
+            self.assertLessEqual(len(pages), self.BILLS // 100, "the cursor never runs out")
+        return pages, queries
+
+    def test_pages_through_one_bill_date(self):
+        for fields in ({}, {"fields": "id,due_amount"}):
+            pages, queries = self.walk(API + "bills/", "next", page_size=200, **fields)
+            ids = [bill_id for page in pages for bill_id in page]
+
+            self.assertEqual(len(pages), 7)
+            self.assertEqual(ids, sorted(Bill.objects.values_list("id", flat=True), reverse=True))
+            # a cursor page is at most one more index seek than the first page,
+            # the deepest included
+            self.assertLessEqual(max(queries), queries[0] + 1, queries)
+
+    def test_previous_walks_back(self):
+        pages, _ = self.walk(API + "bills/", "next", page_size=200)
+        last = self.client.get(API + "bills/", {"page_size": 200}).json()
+        while last["next"]:
+            last = self.client.get(last["next"]).json()
+
+        back, _ = self.walk(last["previous"], "previous")
+        self.assertEqual(back, pages[-2::-1])
+
+    def test_invalid_cursor(self):
+        for cursor in ("not-base64", base64.b64encode(b"p=2026-01-01").decode(), base64.b64encode(b"p=x&p=1").decode()):
+            response = self.client.get(API + "bills/", {"cursor": cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+
+
+class SubscriptionExpiryTests(TestCase):
+
+    def setUp(self):
+        self.expired = Client.objects.create(username="expired", email="expired@example.com")
+        self.renewing = Client.objects.create(username="renewing", email="renewing@example.com")
+        # save() derives is_active from subscription_end; lapse them behind its back
+        Client.objects.update(subscription_end=date.today() - timedelta(days=1))
+        self.tokens = {client.pk: Token.objects.create(user=client) for client in (self.expired, self.renewing)}
+
+    def test_expired_client_is_deactivated_and_logged_out(self):
+        summary = expire_subscriptions()
+
+        self.assertEqual(summary["clients_deactivated"], 2)
+        self.assertEqual(summary["tokens_revoked"], 2)
+        self.assertFalse(Client.objects.filter(is_active=True).exists())
+        self.assertFalse(Token.objects.exists())
+
+    def test_client_renewed_mid_sweep_keeps_its_token(self):
+        renewing = self.renewing
+
+        class RenewBeforeTransaction:
+            # Stands in for the transaction module: the renewal commits after
+            # the sweep selected the chunk's ids but before it deactivates them
+            @staticmethod
+            def atomic():
+                Client.objects.filter(pk=renewing.pk).update(subscription_end=date.today() + timedelta(days=30))
+                return transaction.atomic()
+
+        with mock.patch("adminapp.expiry.transaction", RenewBeforeTransaction):
+            summary = expire_subscriptions()
+
+        self.assertEqual(summary["clients_deactivated"], 1)
+        self.assertEqual(summary["tokens_revoked"], 1)
+        self.renewing.refresh_from_db()
+        self.assertTrue(self.renewing.is_active)
+        self.assertTrue(Token.objects.filter(key=self.tokens[renewing.pk].key).exists())
+        self.assertFalse(Token.objects.filter(user=self.expired).exists())
+
+        response = APIClient().get(API + "batch/", HTTP_AUTHORIZATION=f"Token {self.tokens[renewing.pk].key}")
+        self.assertEqual(response.status_code, 200)
+
+
+class UnreachableSMTPBackend(BaseEmailBackend):
+    def open(self):
+        raise ConnectionRefusedError("SMTP server unreachable")
+
+    def send_messages(self, email_messages):
+        raise ConnectionRefusedError("SMTP server unreachable")
+
+
+class RejectingSMTPBackend(locmem.EmailBackend):
+    # Connects, but refuses mail for one address
+    def send_messages(self, messages):
+        if any("bounce@example.com" in message.to for message in messages):
+            raise SMTPRecipientsRefused({"bounce@example.com": (550, b"No such user")})
+        return super().send_messages(messages)
+
+
+UNREACHABLE_SMTP = "adminapp.tests.UnreachableSMTPBackend"
+REJECTING_SMTP = "adminapp.tests.RejectingSMTPBackend"
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class OutboxTests(APITestCase):
+
+    def queue(self, recipient="client@example.com"):
+        return queue_email("Your Account Credentials", "Password: hunter2", None, [recipient])
+
+    def make_due(self):
+        OutboundEmail.objects.filter(status="Pending").update(next_attempt_at=timezone.now())
+
+    def test_drain(self):
+        for i in range(3):
+            self.queue(f"client{i}@example.com")
+
+        self.assertEqual(deliver_pending(), (3, 0))
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox),
+                         ["client0@example.com", "client1@example.com", "client2@example.com"])
+        self.assertEqual(mail.outbox[0].body, "Password: hunter2")
+        self.assertEqual(set(OutboundEmail.objects.values_list("status", "body", "attempts")), {("Sent", "", 1)})
+        self.assertEqual(deliver_pending(), (0, 0))
+
+    def test_retry_with_backoff(self):
+        email = self.queue()
+
+        with override_settings(EMAIL_BACKEND=UNREACHABLE_SMTP):
+            before = timezone.now()
+            self.assertEqual(deliver_pending(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts, email.body), ("Pending", 1, "Password: hunter2"))
+        self.assertIn("unreachable", email.last_error)
+        self.assertGreaterEqual(email.next_attempt_at, before + timedelta(seconds=BACKOFF_BASE_SECONDS))
+
+        # Not due yet, then delivered once the backoff has passed
+        self.assertEqual(deliver_pending(), (0, 0))
+        self.make_due()
+        self.assertEqual(deliver_pending(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ("Sent", 2))
+
+        self.assertEqual([backoff_delay(n).total_seconds() for n in (1, 2, 3)], [30, 60, 120])
+
+    def test_one_rejected_recipient_doesnt_hold_up_the_batch(self):
+        bounced, delivered = self.queue("bounce@example.com"), self.queue()
+
+        with override_settings(EMAIL_BACKEND=REJECTING_SMTP):
+            self.assertEqual(deliver_pending(), (1, 1))
+        self.assertEqual([message.to for message in mail.outbox], [["client@example.com"]])
+        bounced.refresh_from_db()
+        delivered.refresh_from_db()
+        self.assertEqual((bounced.status, bounced.attempts), ("Pending", 1))
+        self.assertEqual(delivered.status, "Sent")
+
+    def test_dead_letter_after_max_attempts(self):
+        email = self.queue()
+
+        with override_settings(EMAIL_BACKEND=UNREACHABLE_SMTP):
+            for _ in range(MAX_ATTEMPTS):
+                self.make_due()
+                self.assertEqual(deliver_pending(), (0, 1))
+            self.make_due()
+            self.assertEqual(deliver_pending(), (0, 0))
+
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ("Dead", MAX_ATTEMPTS))
+        # The generated password doesn't outlive the row's last attempt
+        self.assertEqual(email.body, "")
+        self.assertEqual(mail.outbox, [])
+
+    @override_settings(EMAIL_BACKEND=UNREACHABLE_SMTP)
+    def test_registration_while_smtp_is_down(self):
+        admin = Client.objects.create_superuser(username="admin", email="admin@example.com", password="x")
+        self.client.force_authenticate(admin)
+
+        response = self.client.post(API + "user/", {"username": "newgym", "email": "newgym@example.com"}, format="json")
+
+        self.assertEqual(response.status_code, 201, response.data)
+        email = OutboundEmail.objects.get()
+        self.assertEqual((email.status, email.recipients), ("Pending", ["newgym@example.com"]))
+        self.assertIn(f"Password: {response.data['client']['generated_password']}", email.body)
+        self.assertEqual(deliver_pending(), (0, 1))
+
+
+class TokenCacheTests(APITestCase):
+    """
+    A cached token lookup must not outlive the client state it was cached
+    with: each event below has to drop it.
+    """
+
+    def setUp(self):
+        caches[TOKEN_CACHE_ALIAS].clear()
+        self.owner = Client.objects.create_user(username="owner", email="owner@example.com", password="s3cret-pass")
+        self.token = Token.objects.create(user=self.owner)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        # Warm the cache
+        self.assertEqual(self.client.get(API + "batch/").status_code, 200)
+
+    def cached_user(self):
+        # What the next request would see as request.user
+        user, _ = CachedTokenAuthentication().authenticate_credentials(self.token.key)
+        return user
+
+    def test_cache_is_used(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(self.cached_user().pk, self.owner.pk)
+
+    def test_password_update(self):
+        # The view authenticates with the default (session / basic) classes
+        response = APIClient().post(API + "update-password/", {
+            "old_password": "s3cret-pass", "new_password": "n3w-pass!", "confirm_password": "n3w-pass!",
+        }, format="json", HTTP_AUTHORIZATION="Basic " + base64.b64encode(b"owner:s3cret-pass").decode())
+        self.assertEqual(response.status_code, 200, response.data)
+
+        self.assertTrue(self.cached_user().check_password("n3w-pass!"))
+
+    @override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+    def test_forgot_password(self):
+        response = self.client.post(API + "forgot-password/", {"email": "owner@example.com"}, format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+
+        self.assertFalse(self.cached_user().check_password("s3cret-pass"))
+
+    def test_expiry_at_login(self):
+        # Lapses without Client.save(), so only the login's save can invalidate
+        Client.objects.filter(pk=self.owner.pk).update(subscription_end=date.today() - timedelta(days=1))
+        self.assertEqual(self.client.get(API + "batch/").status_code, 200)
+
+        response = APIClient().post(API + "token/", {"username": "owner", "password": "s3cret-pass"}, format="json")
+        self.assertEqual(response.status_code, 403)
+
+        self.assertEqual(self.client.get(API + "batch/").status_code, 401)
+
+    def test_client_delete(self):
+        self.owner.delete()
+
+        self.assertEqual(self.client.get(API + "batch/").status_code, 401)
+
+
+class AttendanceBitmapTests(APITestCase):
+    """
+    The monthly bitmaps, fed roll call by roll call through the API, must
+    give the same answers as the raw Attendance rows they summarise.
+    """
+
+    def setUp(self):
+        self.owner = Client.objects.create_user(username="owner", email="owner@example.com", password="x")
+        self.client.force_authenticate(self.owner)
+        subscription = Subscription.objects.create(client=self.owner, name="Monthly")
+        self.batch = Batch.objects.create(client=self.owner, name="Morning")
+        self.members = [
+            Member.objects.create(client=self.owner, full_name=f"Member {i}", subscription=subscription,
+                                  batch_group=self.batch)
+            for i in range(4)
+        ]
+
+        # The 1st and 31st (lowest and highest bits), across a month boundary,
+        # with gaps: some days have no roll call, some members aren't marked
+        rng = random.Random(7)
+        days = [date(2026, 1, 1), *(date(2026, 1, 20) + timedelta(days=n) for n in range(24))]
+        for day in days:
+            if day.day in (23, 3):
+                continue
+            marked = [member.id for member in self.members if rng.random() < 0.9]
+            present = [member_id for member_id in marked if rng.random() < 0.6]
+            self.roll_call(day, present, [member_id for member_id in marked if member_id not in present])
+
+        # Re-submitted roll calls overwrite the day, in both directions
+        first, second = self.members[0].id, self.members[1].id
+        self.roll_call(date(2026, 1, 31), [first], [second])
+        self.roll_call(date(2026, 1, 31), [second], [first])
+        self.roll_call(date(2026, 2, 1), [first, second], [])
+
+        # One run of absences across the month boundary, and only that
+        third = self.members[2].id
+        for day in days:
+            absent = date(2026, 1, 30) <= day <= date(2026, 2, 1)
+            self.roll_call(day, [] if absent else [third], [third] if absent else [])
+
+    def roll_call(self, day, present, absent):
+        if present or absent:
+            response = self.client.post(API + "attendance/roll-call/", {
+                "batch": self.batch.id, "date": day.isoformat(), "present": present, "absent": absent,
+            }, format="json")
+            self.assertEqual(response.status_code, 200, response.data)
+
+    def expected_summary(self, year, month, absent_run=3):
+        # Recomputed from the Attendance rows, day by day; an absence run
+        # counts in the month it ends in, wherever it started
+        summary = []
+        for member in self.members:
+            recorded = dict(Attendance.objects.filter(member=member).values_list("date", "present"))
+            days = {day: present for day, present in recorded.items() if (day.year, day.month) == (year, month)}
+            if not days:
+                continue
+
+            longest = current = 0
+            for day in sorted(days):
+                current = current + 1 if days[day] else 0
+                longest = max(longest, current)
+
+            present = sum(days.values())
+            summary.append({
+                "member": member.id,
+                "days_marked": len(days),
+                "days_present": present,
+                "percentage": round(present * 100 / len(days), 1),
+                "longest_streak": longest,
+                f"absent_{absent_run}_in_a_row": any(
+                    all(recorded.get(end - timedelta(days=n)) is False for n in range(absent_run))
+                    for end in days
+                ),
+            })
+        return summary
+
+    def test_day_bits(self):
+        self.assertEqual(day_bit(date(2026, 1, 1)), 1)
+        self.assertEqual(day_bit(date(2026, 1, 31)), 1 << 30)
+        self.assertEqual(ALL_DAYS, sum(day_bit(date(2026, 1, day)) for day in range(1, 32)))
+
+    def test_bitmaps_match_attendance(self):
+        row = AttendanceMonth.objects.get(member=self.members[0], year=2026, month=1)
+        self.assertEqual(row.present_bits & day_bit(date(2026, 1, 31)), 0)
+        self.assertTrue(row.marked_bits & day_bit(date(2026, 1, 31)))
+
+        for year, month in ((2026, 1), (2026, 2)):
+            expected = self.expected_summary(year, month)
+            self.assertEqual(batch_month_summary(self.batch, year, month), expected, (year, month))
+            self.assertEqual(batch_month_summary(self.batch, year, month, absent_run=2),
+                             self.expected_summary(year, month, absent_run=2), (year, month))
+
+            response = self.client.get(API + "attendance/summary/", {"batch": self.batch.id, "year": year,
+                                                                     "month": month})
+            self.assertEqual(response.data["members"], expected)
+
+        # The fixture exercises both outcomes of every answer
+        rows = self.expected_summary(2026, 1) + self.expected_summary(2026, 2)
+        self.assertEqual({row["absent_3_in_a_row"] for row in rows}, {True, False})
+        self.assertGreater(len({row["longest_streak"] for row in rows}), 1)
+
+    def test_absence_run_across_month_boundary(self):
+        # Absent Jan 30, Jan 31 and Feb 1: the run ends in February
+        def alert(year, month, absent_run=3):
+            rows = batch_month_summary(self.batch, year, month, absent_run=absent_run)
+            return next(row for row in rows if row["member"] == self.members[2].id)[f"absent_{absent_run}_in_a_row"]
+
+        self.assertTrue(alert(2026, 2))
+        self.assertFalse(alert(2026, 1))
+        self.assertTrue(alert(2026, 1, absent_run=2))
+        self.assertFalse(alert(2026, 2, absent_run=4))
+
+        # The SQL filter agrees with the summary
+        for year, month, absent_run in ((2026, 1, 3), (2026, 2, 3), (2026, 1, 2), (2026, 2, 2)):
+            rows = batch_month_summary(self.batch, year, month, absent_run=absent_run)
+            self.assertEqual(
+                set(consecutive_absences(AttendanceMonth.objects.filter(batch=self.batch), year, month, absent_run)
+                    .values_list("member_id", flat=True)),
+                {row["member"] for row in rows if row[f"absent_{absent_run}_in_a_row"]},
+            )
+
+    def test_rebuild_matches_incremental(self):
+        def bitmaps():
+            return set(AttendanceMonth.objects.values_list(
+                "client_id", "batch_id", "member_id", "year", "month", "present_bits", "marked_bits"
+            ))
+
+        incremental = bitmaps()
+        self.assertEqual(len({(row[2], row[4]) for row in incremental}), len(incremental))
+
+        call_command("rebuild_attendance_bitmaps", chunk_size=2, stdout=io.StringIO())
+        self.assertEqual(bitmaps(), incremental)
+
+
+class PaymentAccountingTests(APITestCase):
+    """
+    Payments keep the bill, the member's outstanding fee and the client's
+    receivables in step through F() updates, including edits, moves and
+    deletes.
+    """
+
+    def setUp(self):
+        self.owner = Client.objects.create_user(username="owner", email="owner@example.com", password="x")
+        self.client.force_authenticate(self.owner)
+        subscription = Subscription.objects.create(client=self.owner, name="Monthly")
+        self.first = Member.objects.create(client=self.owner, full_name="First", subscription=subscription)
+        self.second = Member.objects.create(client=self.owner, full_name="Second", subscription=subscription)
+        self.bills = {
+            name: Bill.objects.create(member=member, subscription=subscription, total_amount=Decimal(total))
+            for name, member, total in (("a1", self.first, "1000.00"), ("a2", self.first, "300.00"),
+                                        ("b1", self.second, "500.00"))
+        }
+
+    def assertBalances(self, paid, first_fee, second_fee, receivables):
+        for name, bill in self.bills.items():
+            bill.refresh_from_db()
+            expected = Decimal(paid[name])
+            self.assertEqual((bill.paid_amount, bill.due_amount), (expected, bill.total_amount - expected), name)
+        for member, fee in ((self.first, first_fee), (self.second, second_fee)):
+            member.refresh_from_db()
+            self.assertEqual(member.outstanding_fee, Decimal(fee), member.full_name)
+        self.owner.refresh_from_db()
+        self.assertEqual(self.owner.outstanding_receivables, Decimal(receivables))
+
+    def test_bills_are_receivable(self):
+        self.assertBalances({"a1": "0", "a2": "0", "b1": "0"}, "1300.00", "500.00", "1800.00")
+
+    def test_payment_edit_and_move(self):
+        response = self.client.post(API + "payments/", {"bill": self.bills["a1"].id, "amount": "250.50",
+                                                         "payment_method": "CASH"}, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+        payment = API + f"payments/{response.data['id']}/"
+        self.assertBalances({"a1": "250.50", "a2": "0", "b1": "0"}, "1049.50", "500.00", "1549.50")
+
+        # A new amount reverses the old one before applying
+        self.assertEqual(self.client.patch(payment, {"amount": "400.00"}, format="json").status_code, 200)
+        self.assertBalances({"a1": "400.00", "a2": "0", "b1": "0"}, "900.00", "500.00", "1400.00")
+
+        # Moving it to another member's bill
+        self.assertEqual(self.client.patch(payment, {"bill": self.bills["b1"].id}, format="json").status_code, 200)
+        self.assertBalances({"a1": "0", "a2": "0", "b1": "400.00"}, "1300.00", "100.00", "1400.00")
+
+        # Moving and changing the amount at once
+        response = self.client.patch(payment, {"bill": self.bills["a2"].id, "amount": "300.00"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertBalances({"a1": "0", "a2": "300.00", "b1": "0"}, "1000.00", "500.00", "1500.00")
+
+    def test_stale_instance_edit(self):
+        # The reversal reads the stored amount, not the instance's copy
+        payment = Payment.objects.create(bill=self.bills["a1"], amount=Decimal("100.00"), payment_method="CASH")
+        stale = Payment.objects.get(pk=payment.pk)
+        payment.amount = Decimal("150.00")
+        payment.save()
+
+        stale.amount = Decimal("120.00")
+        stale.save()
+        self.assertBalances({"a1": "120.00", "a2": "0", "b1": "0"}, "1180.00", "500.00", "1680.00")
+
+
+    def test_payment_delete(self):
+        response = self.client.post(API + "payments/", {"bill": self.bills["a1"].id, "amount": "300.00",
+                                                         "payment_method": "CASH"}, format="json")
+        Payment.objects.create(bill=self.bills["a1"], amount=Decimal("50.00"), payment_method="CARD")
+        self.assertBalances({"a1": "350.00", "a2": "0", "b1": "0"}, "950.00", "500.00", "1450.00")
+
+        self.assertEqual(self.client.delete(API + f"payments/{response.data['id']}/").status_code, 204)
+        self.assertBalances({"a1": "50.00", "a2": "0", "b1": "0"}, "1250.00", "500.00", "1750.00")
+
+    def test_stale_instance_delete(self):
+        # Deleting reverses the stored amount and bill, not the instance's copy
+        payment = Payment.objects.create(bill=self.bills["a1"], amount=Decimal("100.00"), payment_method="CASH")
+        stale = Payment.objects.get(pk=payment.pk)
+        payment.bill, payment.amount = self.bills["b1"], Decimal("150.00")
+        payment.save()
+
+        stale.delete()
+        self.assertBalances({"a1": "0", "a2": "0", "b1": "0"}, "1300.00", "500.00", "1800.00")
+
+
+class SubscriptionFeeTests(APITestCase):
+    """
+    custom_fees are validated up front so the totals Subscription.save()
+    derives from them always fit their columns.
+    """
+
+    def setUp(self):
+        self.owner = Client.objects.create_user(username="owner", email="owner@example.com", password="x")
+        self.client.force_authenticate(self.owner)
+
+    def create(self, custom_fees, admission_fee=0):
+        return self.client.post(API + "subscriptions/", {
+            "client": self.owner.id, "name": "Monthly", "admission_fee": admission_fee, "custom_fees": custom_fees,
+        }, format="json")
+
+    def test_totals(self):
+        response = self.create([{"name": "Tuition", "value": "1249.50", "recurring": True},
+                                {"name": "Kit", "value": "0.10"}, {"name": "Locker", "value": 5}], admission_fee=500)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual((response.data["recurring_total"], response.data["joining_total"]), ("1249.50", "505.10"))
+
+    def test_invalid_fees(self):
+        for custom_fees, admission_fee in (
+            ([{"name": "Tuition", "value": "99999999999", "recurring": True}], 0),
+            ([{"name": "Tuition", "value": "60000000", "recurring": True},
+              {"name": "Coaching", "value": "60000000", "recurring": True}], 0),
+            ([{"name": "Kit", "value": "0.001"}], 0),
+            ([{"name": "Kit", "value": "1e40"}], 0),
+            ([{"name": "Kit", "value": "-1"}], 0),
+            ([{"name": "Kit", "value": "ten"}], 0),
+            (["Kit"], 0),
+            ([], 2_000_000_000),
+        ):
+            response = self.create(custom_fees, admission_fee)
+            self.assertEqual(response.status_code, 400, custom_fees)
+            self.assertIn("custom_fees", response.data, custom_fees)
+        self.assertFalse(Subscription.objects.exists())
+
+    def test_update_keeps_totals_in_range(self):
+        plan = API + f"subscription/{self.create([{'name': 'Tuition', 'value': '99999999'}]).data['id']}/"
+        self.assertEqual(self.client.patch(plan, {"admission_fee": 1}, format="json").status_code, 400)
+        fees = [{"name": "Tuition", "value": "99999999"}, {"name": "Kit", "value": "1.00"}]
+        self.assertEqual(self.client.patch(plan, {"custom_fees": fees}, format="json").status_code, 400)
+        self.assertEqual(Subscription.objects.get().joining_total, Decimal("99999999.00"))
+
+    def test_orm_save_rejects_malformed_fees(self):
+        for custom_fees in (["Tuition"], [{"value": "ten"}], [{"value": "99999999999"}]):
+            with self.assertRaises(ValidationError):
+                Subscription.objects.create(client=self.owner, custom_fees=custom_fees)
+            with self.assertRaises(ValidationError):
+                Subscription(client=self.owner, custom_fees=custom_fees).full_clean()
+
+
+class RecurringBillingTests(TestCase):
+
+    def setUp(self):
+        self.now = timezone.make_aware(datetime(2026, 3, 15, 9, 0))
+        self.owner = Client.objects.create(username="owner", email="owner@example.com")
+        monthly = Subscription.objects.create(client=self.owner, name="Monthly", admission_fee=Decimal("500.00"),
+                                              custom_fees=[{"name": "Tuition", "value": 1000, "recurring": True},
+                                                           {"name": "Locker", "value": "249.50", "recurring": True},
+                                                           {"name": "Kit", "value": 300, "recurring": False}])
+        free = Subscription.objects.create(client=self.owner, name="Free")
+
+        def member(name, recurring_date, subscription=monthly, **kwargs):
+            return Member.objects.create(client=self.owner, full_name=name, subscription=subscription,
+                                         recurring_date=timezone.make_aware(recurring_date), **kwargs)
+
+        self.due = member("Due", datetime(2026, 3, 1, 8, 0))
+        # Two cycles behind: one bill per run, never two for the same cycle
+        self.lapsed = member("Lapsed", datetime(2026, 1, 31, 8, 0))
+        self.free = member("Free", datetime(2026, 3, 14, 8, 0), subscription=free)
+        self.future = member("Future", datetime(2026, 3, 16, 8, 0))
+        self.inactive = member("Inactive", datetime(2026, 3, 1, 8, 0), is_active=False)
+        # Already billed for its current cycle (bill_member() ran but the date was edited back)
+        self.billed = member("Billed", datetime(2026, 3, 10, 8, 0))
+        Bill.objects.create(member=self.billed, subscription=monthly, total_amount=Decimal("1249.50"),
+                            recurring_date=self.billed.recurring_date, is_recurring=True)
+
+    def bills(self, member):
+        return list(Bill.objects.filter(member=member, is_recurring=True).order_by("recurring_date")
+                    .values_list("recurring_date", "total_amount", "due_amount", "bill_date"))
+
+    def recurring_date(self, member):
+        member.refresh_from_db()
+        return timezone.localtime(member.recurring_date).replace(tzinfo=None)
+
+    def test_runs_bill_each_cycle_once(self):
+        first = run_recurring_billing(self.now, chunk_size=2)
+        self.assertEqual((first["members_due"], first["bills_created"], first["skipped_already_billed"]), (4, 3, 1))
+
+        recurring = Decimal("1249.50")
+        self.assertEqual(self.bills(self.due), [(self.due.recurring_date, recurring, recurring, self.now)])
+        self.assertEqual(self.bills(self.lapsed), [(self.lapsed.recurring_date, recurring, recurring, self.now)])
+        self.assertEqual(self.bills(self.free), [(self.free.recurring_date, Decimal("0.00"), Decimal("0.00"), self.now)])
+        self.assertEqual(len(self.bills(self.billed)), 1)
+        self.assertEqual(self.bills(self.future), [])
+        self.assertEqual(self.bills(self.inactive), [])
+
+        # Exactly one cycle forward, clamped at month end; the skipped member moves on too
+        self.assertEqual(self.recurring_date(self.due), datetime(2026, 4, 1, 8, 0))
+        self.assertEqual(self.recurring_date(self.lapsed), datetime(2026, 2, 28, 8, 0))
+        self.assertEqual(self.recurring_date(self.billed), datetime(2026, 4, 10, 8, 0))
+        self.assertEqual(self.recurring_date(self.future), datetime(2026, 3, 16, 8, 0))
+        self.assertEqual(self.recurring_date(self.inactive), datetime(2026, 3, 1, 8, 0))
+
+        # Re-running only catches up the member still a cycle behind
+        second = run_recurring_billing(self.now)
+        self.assertEqual((second["members_due"], second["bills_created"]), (1, 1))
+        self.assertEqual([timezone.localtime(row[0]).replace(tzinfo=None) for row in self.bills(self.lapsed)],
+                         [datetime(2026, 1, 31, 8, 0), datetime(2026, 2, 28, 8, 0)])
+        self.assertEqual(self.recurring_date(self.lapsed), datetime(2026, 3, 28, 8, 0))
+
+        third = run_recurring_billing(self.now)
+        self.assertEqual((third["members_due"], third["bills_created"]), (0, 0))
+        self.assertEqual(Bill.objects.filter(is_recurring=True).count(), 5)
+
+        # Each charge reached the member and the client
+        self.due.refresh_from_db()
+        self.lapsed.refresh_from_db()
+        self.assertEqual((self.due.outstanding_fee, self.lapsed.outstanding_fee), (recurring, recurring * 2))
+        self.owner.refresh_from_db()
+        # the three charged here and the bill that was already there
+        self.assertEqual(self.owner.outstanding_receivables, recurring * 4)
+
+
+PROMETHEUS_SAMPLE = re.compile(
+    r'^[a-zA-Z_:][a-zA-Z0-9_:]*\{(?:[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*",?)*\} -?[0-9.e+-]+$'
+)
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_TOKEN="scrape-secret")
+class RequestMetricsTests(APITestCase):
+
+    def setUp(self):
+        registry.reset()
+        owner = Client.objects.create_user(username="owner", email="owner@example.com", password="x")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=owner).key}")
+
+    def scrape(self, token="scrape-secret"):
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"} if token else {}
+        return APIClient().get("/metrics", **headers)
+
+    def test_server_timing(self):
+        response = self.client.get(API + "batch/")
+
+        match = re.fullmatch(
+            r'db;dur=[\d.]+;desc="(\d+) queries", ser;dur=[\d.]+, total;dur=[\d.]+', response["Server-Timing"]
+        )
+        self.assertIsNotNone(match, response["Server-Timing"])
+        self.assertGreaterEqual(int(match[1]), 1)
+
+    def test_prometheus_text(self):
+        for _ in range(2):
+            self.client.get(API + "batch/")
+        self.client.get(API + "members/")
+
+        response = self.scrape()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+
+        text = response.content.decode()
+        self.assertTrue(text.endswith("\n"))
+        for line in text.splitlines():
+            if line.startswith("#"):
+                self.assertRegex(line, r"^# (HELP [a-z_]+ .+|TYPE [a-z_]+ (counter|histogram))$")
+            else:
+                self.assertRegex(line, PROMETHEUS_SAMPLE)
+
+        self.assertIn('feezy_http_requests_total{route="/feezy/batch/",method="GET",status="200"} 2', text)
+        self.assertIn('feezy_http_request_duration_seconds_count{route="/feezy/members/",method="GET"} 1', text)
+        buckets = re.findall(
+            r'feezy_http_request_duration_seconds_bucket\{route="/feezy/batch/",method="GET",le="[^"]+"\} (\d+)', text
+        )
+        self.assertEqual(buckets, sorted(buckets, key=int))
+        self.assertEqual(buckets[-1], "2")
+        # Scrapes aren't counted as traffic
+        self.assertNotIn('route="/metrics"', self.scrape().content.decode())
+
+    def test_scrape_requires_token(self):
+        self.assertEqual(self.scrape(token=None).status_code, 401)
+        self.assertEqual(self.scrape(token="guess").status_code, 401)
+
+        with override_settings(METRICS_TOKEN=None):
+            self.assertEqual(self.scrape(token=None).status_code, 404)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self):
+        self.assertNotIn("Server-Timing", self.client.get(API + "batch/"))
+        self.assertEqual(self.scrape().status_code, 404)
+
+
+class CurrencyLookupTests(TestCase):
+
+    def setUp(self):
+        _remote_currencies.clear()
+
+    def test_bundled_codes(self):
+        self.assertEqual(currency_for_country("US"), "USD")
+        self.assertEqual(currency_for_country(" gb "), "GBP")
+        self.assertEqual(currency_for_country("DEU"), "EUR")
+        self.assertEqual(currency_for_country("jpn"), "JPY")
+        self.assertEqual(currency_symbol("inr"), "₹")
+
+    def test_unknown_code_falls_back_to_default(self):
+        for code in ("ZZ", "ZZZ", "", None):
+            self.assertEqual(currency_for_country(code), DEFAULT_CURRENCY, code)
+        self.assertEqual(currency_for_country("ZZ", default="USD"), "USD")
+        self.assertIsNone(currency_symbol("XXX"))
+
+    @override_settings(CURRENCY_REMOTE_LOOKUP=True)
+    def test_failed_remote_lookup_is_not_cached(self):
+        found = mock.Mock(status_code=200)
+        found.json.return_value = [{"currencies": {"XTS": {"name": "Test"}}}]
+
+        with mock.patch("adminapp.currency.requests.get", side_effect=ConnectionError("offline")) as get, \
+                self.assertLogs("adminapp.currency", "WARNING"):
+            self.assertEqual(currency_for_country("ZZ"), DEFAULT_CURRENCY)
+        self.assertEqual(get.call_count, 1)
+
+        with mock.patch("adminapp.currency.requests.get", return_value=found) as get:
+            self.assertEqual(currency_for_country("ZZ"), "XTS")
+            self.assertEqual(currency_for_country("ZZ"), "XTS")
+        # Successes are kept
+        self.assertEqual(get.call_count, 1)
 
-# Create your tests here.
+        # Bundled codes never go remote
+        with mock.patch("adminapp.currency.requests.get") as get:
+            self.assertEqual(currency_for_country("IN"), "INR")
+        get.assert_not_called()
@@ -28,14 +28,38 @@ urlpatterns = [
 
     path("members/",views.MemberListCreateApiView.as_view()),
 
+    path("members/import/",views.MemberImportApiView.as_view()),
+
     path("member/<int:pk>/",views.MemberRetrieveUpdateDestroyAPIView.as_view()),
 
+    path('receivables/', views.ReceivablesApiView.as_view(), name='receivables'),
+
+    path('bills/', views.BillListApiView.as_view(), name='bill-list'),
+
+    path('export/<str:kind>/', views.CsvExportApiView.as_view(), name='csv-export'),
+
+    path('receivables/aging/', views.ReceivablesAgingApiView.as_view(), name='receivables-aging'),
+
+    path('changes/', views.ChangesApiView.as_view(), name='changes'),
+
     path('payments/', views.PaymentListCreateView.as_view(), name='payment-list-create'),
     
+    path('payments/bulk/', views.PaymentBulkCreateView.as_view(), name='payment-bulk-create'),
+
     path('payments/<int:pk>/', views.PaymentDetailView.as_view(), name='payment-detail'),
     
    path("recurring-bill/<int:member_id>/", views.RecurringBillView.as_view()),
 
+    path("recurring-bill/run/", views.RecurringBillRunApiView.as_view()),
+
+    path("async/token/", views.AsyncGetTokenView.as_view()),
+
+    path("async/recurring-bill/<int:member_id>/", views.AsyncRecurringBillView.as_view()),
+
+    path("attendance/roll-call/", views.RollCallApiView.as_view()),
+
+    path("attendance/summary/", views.AttendanceSummaryApiView.as_view()),
+
 
 
 
@@ -3,7 +3,7 @@ from django.shortcuts import render
 from adminapp.serializers import (CategorySerializer,LoginSerializer,
                                   ClientCreateSerializer,PasswordUpdateSerializer,
                                   ForgotPasswordSerializer,BatchSerializer,SubscriptionSerializer,
-                                  MemberSerializer,PaymentSerializer,BillSerializer)
+                                  MemberSerializer,PaymentSerializer,BillSerializer,RollCallSerializer)
 
 from rest_framework import generics
 
@@ -11,6 +11,8 @@ from adminapp.models import Category,Client,Batch,Subscription,Member,Payment,Bi
 
 from rest_framework import authentication,permissions,status
 
+from adminapp.authentication import CachedTokenAuthentication
+
 from rest_framework.authtoken.models import Token
 
 from django.shortcuts import get_object_or_404
@@ -27,7 +29,49 @@ from datetime import date, timedelta
 
 from django.utils import timezone
 
-from decimal import Decimal
+from adminapp.attendance import batch_month_summary
+
+from adminapp.billing import DEFAULT_CHUNK_SIZE, bill_member, run_recurring_billing
+
+from adminapp.metrics import registry
+
+from django.conf import settings
+
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+
+import hmac
+
+import json
+
+from asgiref.sync import sync_to_async
+
+from django.utils.decorators import method_decorator
+
+from django.views import View
+
+from django.views.decorators.csrf import csrf_exempt
+
+from adminapp.hashing import aauthenticate
+
+from adminapp.member_import import MemberImportError, import_members
+
+from rest_framework.parsers import MultiPartParser
+
+from adminapp.exports import EXPORTS, stream_csv
+
+from adminapp.aging import cached_aging_report
+
+from adminapp.conditional import CollectionETagMixin
+
+from adminapp.sparse import SparseFieldsMixin
+
+from adminapp.changes import DEFAULT_LIMIT, MAX_LIMIT, changes_since
+
+from rest_framework.exceptions import ValidationError
+
+from adminapp.filters import filter_date_range, filter_exact, parse_bool, parse_id
+
+from adminapp.pagination import BillCursorPagination, MemberCursorPagination, PaymentCursorPagination
 
 
 class GetTokenApiView(APIView):
@@ -223,11 +267,13 @@ class ForgotPasswordApiView(APIView):
 
 
 
-class BatchCreateListApiView(generics.ListCreateAPIView):
+class BatchCreateListApiView(CollectionETagMixin, generics.ListCreateAPIView):
 
     serializer_class = BatchSerializer
 
-    authentication_classes = [authentication.TokenAuthentication]
+    etag_collection = 'batches'
+
+    authentication_classes = [CachedTokenAuthentication]
 
     # authentication_classes=[authentication.BasicAuthentication]
 
@@ -246,7 +292,7 @@ class BatchUpdateRetriveDeleteApiView(generics.RetrieveUpdateDestroyAPIView):
 
     serializer_class=BatchSerializer
 
-    authentication_classes=[authentication.TokenAuthentication]
+    authentication_classes=[CachedTokenAuthentication]
 
     # authentication_classes=[authentication.BasicAuthentication]
 
@@ -260,10 +306,11 @@ class BatchUpdateRetriveDeleteApiView(generics.RetrieveUpdateDestroyAPIView):
 
 
 
-class SubscriptionListCreateAPIView(generics.ListCreateAPIView):
+class SubscriptionListCreateAPIView(CollectionETagMixin, generics.ListCreateAPIView):
     serializer_class = SubscriptionSerializer
+    etag_collection = 'subscriptions'
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes=[authentication.TokenAuthentication]
+    authentication_classes=[CachedTokenAuthentication]
 
     # authentication_classes=[authentication.BasicAuthentication]
 
@@ -277,7 +324,7 @@ class SubscriptionListCreateAPIView(generics.ListCreateAPIView):
 
 
 class SubscriptionRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
 
     serializer_class = SubscriptionSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -288,15 +335,29 @@ class SubscriptionRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPI
 
 
 
-class MemberListCreateApiView(generics.ListCreateAPIView):
+class MemberListCreateApiView(CollectionETagMixin, SparseFieldsMixin, generics.ListCreateAPIView):
     serializer_class = MemberSerializer
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
+    etag_collection = 'members'
 
 
+    pagination_class = MemberCursorPagination
+
     def get_queryset(self):
         # request.user IS Client
-        return Member.objects.filter(client=self.request.user)
+        queryset = Member.objects.filter(client=self.request.user)
+
+        if self.request.method != 'GET':
+            return queryset
+
+        params = self.request.query_params
+        queryset = filter_exact(queryset, params, {
+            'is_active': ('is_active', parse_bool),
+            'batch_group': ('batch_group_id', parse_id),
+            'subscription': ('subscription_id', parse_id),
+        })
+        return filter_date_range(queryset, params, 'created_at')
 
     def perform_create(self, serializer):
         # auto-assign logged-in client
@@ -305,10 +366,36 @@ class MemberListCreateApiView(generics.ListCreateAPIView):
 
 
 
+class MemberImportApiView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [CachedTokenAuthentication]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, *args, **kwargs):
+        """
+        Bulk-create members from an uploaded CSV ("file"). Columns are the
+        member fields; subscription and batch_group take an id or a name.
+        ?dry_run=true validates without saving.
+        """
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"file": "Upload a CSV file as 'file'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = bool(parse_bool(request.query_params, 'dry_run'))
+        try:
+            summary = import_members(request.user, upload.file, dry_run=dry_run)
+        except MemberImportError as e:
+            return Response({"file": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({"dry_run": dry_run, **summary}, status=status.HTTP_200_OK)
+
+
+
+
 class MemberRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = MemberSerializer
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
 
 
 
@@ -320,16 +407,169 @@ class MemberRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
 
 
    
-class PaymentListCreateView(generics.ListCreateAPIView):
-    queryset = Payment.objects.all()
+class PaymentListCreateView(SparseFieldsMixin, generics.ListCreateAPIView):
     serializer_class = PaymentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [CachedTokenAuthentication]
+    pagination_class = PaymentCursorPagination
+
+    def get_queryset(self):
+        queryset = Payment.objects.filter(client=self.request.user)
+
+        if self.request.method != 'GET':
+            return queryset
+
+        params = self.request.query_params
+        queryset = filter_exact(queryset, params, {
+            'bill': ('bill_id', parse_id),
+            'member': ('bill__member_id', parse_id),
+        })
+        if params.get('payment_method'):
+            queryset = queryset.filter(payment_method=params['payment_method'].upper())
+        return filter_date_range(queryset, params, 'payment_date')
+
+class PaymentBulkCreateView(APIView):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    MAX_PAYMENTS = 1000
+
+    def post(self, request, *args, **kwargs):
+        """
+        Ingest a list of payments (front-desk offline sync) in one transaction.
+        """
+        if not isinstance(request.data, list):
+            return Response({"error": "Expected a list of payments"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Resolve every referenced bill with one query, scoped to this client
+        bill_ids = set()
+        for item in request.data:
+            try:
+                bill_ids.add(int(item.get("bill")))
+            except (AttributeError, TypeError, ValueError):
+                continue
+        bills = Bill.objects.filter(client=request.user).in_bulk(bill_ids)
+
+        serializer = PaymentSerializer(
+            data=request.data,
+            many=True,
+            max_length=self.MAX_PAYMENTS,
+            context={"request": request, "bills": bills},
+        )
+        serializer.is_valid(raise_exception=True)
+        payments = serializer.save()
+
+        return Response({
+            "message": f"{len(payments)} payments recorded",
+            "payments": PaymentSerializer(payments, many=True).data,
+        }, status=status.HTTP_201_CREATED)
+
 
 class PaymentDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [CachedTokenAuthentication]
+
+    def get_queryset(self):
+        return Payment.objects.filter(client=self.request.user)
+
+
+
+class ReceivablesApiView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [CachedTokenAuthentication]
+
+    def get(self, request, *args, **kwargs):
+        """
+        Total dues for the dashboard: a single-row read of the maintained counter.
+        """
+        # Read from the DB, request.user may be a cached copy
+        total = Client.objects.filter(pk=request.user.pk).values_list('outstanding_receivables', flat=True).first()
+
+        return Response({"total_dues": str(total)}, status=status.HTTP_200_OK)
+
+
+
+class BillListApiView(SparseFieldsMixin, generics.ListAPIView):
+    serializer_class = BillSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [CachedTokenAuthentication]
+    pagination_class = BillCursorPagination
+
+    def get_queryset(self):
+        queryset = Bill.objects.filter(client=self.request.user)
+
+        params = self.request.query_params
+        queryset = filter_exact(queryset, params, {
+            'member': ('member_id', parse_id),
+            'subscription': ('subscription_id', parse_id),
+            'is_recurring': ('is_recurring', parse_bool),
+        })
+        return filter_date_range(queryset, params, 'bill_date')
 
 
 
+class CsvExportApiView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [CachedTokenAuthentication]
+
+    def get(self, request, kind, *args, **kwargs):
+        """
+        Stream this client's bills, payments or members as CSV, optionally
+        limited with ?date_from / ?date_to (YYYY-MM-DD, inclusive).
+        """
+        export = EXPORTS.get(kind)
+        if export is None:
+            raise Http404
+
+        queryset = filter_date_range(export.queryset(request.user), request.query_params, export.date_field)
+
+        params = request.query_params
+        period = "-".join(filter(None, [params.get("date_from"), params.get("date_to")])) or "all"
+        response = StreamingHttpResponse(stream_csv(export, queryset), content_type="text/csv; charset=utf-8")
+        response["Content-Disposition"] = f'attachment; filename="{kind}-{period}.csv"'
+        return response
+
+
+class ReceivablesAgingApiView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [CachedTokenAuthentication]
+
+    def get(self, request, *args, **kwargs):
+        """
+        This client's unpaid bill amounts per member in 0-30, 31-60, 61-90
+        and 90+ day buckets, with totals. Served from cache until a bill or
+        payment of the client changes.
+        """
+        body, hit = cached_aging_report(request.user.id)
+        response = HttpResponse(body, content_type="application/json")
+        response["X-Cache"] = "HIT" if hit else "MISS"
+        return response
+
+class ChangesApiView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [CachedTokenAuthentication]
+
+    def get(self, request, *args, **kwargs):
+        """
+        Members, bills, payments and attendance created, updated or deleted
+        since ?since=<cursor> (0 or omitted: everything), up to ?limit
+        entries per page. Call again with the returned cursor while has_more
+        is true.
+        """
+        params = request.query_params
+        since = parse_id(params, 'since') or 0
+        limit = parse_id(params, 'limit')
+        if limit is None:
+            limit = DEFAULT_LIMIT
+        if since < 0:
+            raise ValidationError({'since': "Expected a cursor returned by this endpoint."})
+        if not 0 < limit <= MAX_LIMIT:
+            raise ValidationError({'limit': f"Expected 1 to {MAX_LIMIT}."})
+
+        return Response(changes_since(request.user, since, limit))
+
+
 import pytz
 KOLKATA = pytz.timezone("Asia/Kolkata")
 
@@ -341,7 +581,7 @@ class RecurringBillView(APIView):
         Generate recurring bill for a specific member.
         """
         try:
-            member = Member.objects.get(id=member_id,is_active=True)
+            member = Member.objects.select_related('subscription').get(id=member_id,is_active=True)
         except Member.DoesNotExist:
             return Response({"error": "Member not found"}, status=404)
 
@@ -356,26 +596,9 @@ class RecurringBillView(APIView):
         if Bill.objects.filter(member=member, recurring_date=member.recurring_date).exists():
             return Response({"message": "Bill already generated for this cycle"}, status=200)
 
-        # 3️⃣ Generate recurring bill
-        # Only recurring fees for recurring bills
-        total = Decimal("0.00")
-        for fee in member.subscription.custom_fees:
-            if fee.get("recurring", False):
-                total += Decimal(fee.get("value", 0))
-
-        bill = Bill.objects.create(
-            member=member,
-            subscription=member.subscription,
-            total_amount=total,
-            due_amount=total,
-            bill_date=now,
-            recurring_date=member.recurring_date,
-            is_recurring=True
-        )
-
-        # 4️⃣ Move recurring date forward (next month)
-        member.recurring_date += relativedelta(months=1)
-        member.save(update_fields=['recurring_date'])
+        # 3️⃣ Generate recurring bill (recurring fees only) and
+        # 4️⃣ move recurring date forward (next month)
+        bill = bill_member(member, now)
 
         return Response({
             "message": "Recurring bill generated",
@@ -384,4 +607,171 @@ class RecurringBillView(APIView):
             "bill_date": bill.bill_date,
             "total_amount": str(bill.total_amount),
             "recurring_date_next": member.recurring_date
-        }, status=201)
\ No newline at end of file
+        }, status=201)
+
+
+
+class RecurringBillRunApiView(APIView):
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request, *args, **kwargs):
+        """
+        Generate recurring bills for every due member across all clients.
+        """
+        try:
+            chunk_size = int(request.data.get("chunk_size", DEFAULT_CHUNK_SIZE))
+        except (TypeError, ValueError):
+            chunk_size = 0
+
+        if chunk_size < 1:
+            return Response(
+                {"error": "chunk_size must be a positive integer"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        summary = run_recurring_billing(chunk_size=chunk_size)
+
+        return Response({"message": "Recurring billing run completed", **summary}, status=status.HTTP_200_OK)
+
+
+
+class RollCallApiView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [CachedTokenAuthentication]
+
+    def post(self, request, *args, **kwargs):
+        """
+        Mark attendance for a whole batch session in one request.
+        """
+        serializer = RollCallSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        return Response({
+            "message": "Attendance recorded",
+            "batch": serializer.validated_data["batch"].id,
+            "date": serializer.validated_data["date"],
+            "present": len(serializer.validated_data["present"]),
+            "absent": len(serializer.validated_data["absent"]),
+        }, status=status.HTTP_200_OK)
+
+
+
+class AttendanceSummaryApiView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [CachedTokenAuthentication]
+
+    def get(self, request, *args, **kwargs):
+        """
+        Per-member attendance percentage, longest streak and absence alert
+        for one batch and month, answered from the monthly bitmaps.
+        """
+        params = request.query_params
+        batch = get_object_or_404(Batch, pk=parse_id(params, 'batch'), client=request.user)
+
+        today = date.today()
+        year = parse_id(params, 'year') or today.year
+        month = parse_id(params, 'month') or today.month
+        if not 1 <= month <= 12:
+            return Response({"month": "Expected 1-12."}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "batch": batch.id,
+            "year": year,
+            "month": month,
+            "members": batch_month_summary(batch, year, month),
+        }, status=status.HTTP_200_OK)
+
+
+
+# -------- Async variants (served natively under ASGI) --------
+# Same request/response contract as the DRF views above, written against
+# Django's async ORM. Under WSGI they still work, one request per thread.
+
+def _json_body(request):
+    if request.content_type == 'application/json':
+        return json.loads(request.body or b'{}')
+    return request.POST
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncGetTokenView(View):
+    http_method_names = ['post']
+
+    async def post(self, request, *args, **kwargs):
+        try:
+            data = _json_body(request)
+        except ValueError:
+            return JsonResponse({"detail": "JSON parse error"}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = LoginSerializer(data=data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        # Password hashing runs on a bounded pool, not the event loop
+        user = await aauthenticate(serializer.validated_data["username"], serializer.validated_data["password"])
+        if user is None:
+            return JsonResponse({"message": "Invalid username or password"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        if user.subscription_end and user.subscription_end < date.today():
+            user.is_active = False
+            await user.asave()
+            return JsonResponse(
+                {"message": "Your subscription has expired. Please contact admin to renew."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        token, created = await Token.objects.aget_or_create(user=user)
+
+        return JsonResponse({
+            "token": token.key,
+            "username": user.username,
+            "message": "Login successful",
+            "currency_emoji": user.currency_emoji,
+        }, status=status.HTTP_200_OK)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncRecurringBillView(View):
+    http_method_names = ['post']
+
+    async def post(self, request, member_id):
+        member = await Member.objects.select_related('subscription').filter(id=member_id, is_active=True).afirst()
+        if member is None:
+            return JsonResponse({"error": "Member not found"}, status=404)
+
+        now = timezone.now().astimezone(KOLKATA)
+        if now < member.recurring_date.astimezone(KOLKATA):
+            return JsonResponse({"message": "No bill to generate yet"}, status=200)
+
+        if await Bill.objects.filter(member=member, recurring_date=member.recurring_date).aexists():
+            return JsonResponse({"message": "Bill already generated for this cycle"}, status=200)
+
+        # The writes share one transaction, which needs a single sync thread
+        bill = await sync_to_async(bill_member)(member, now)
+
+        return JsonResponse({
+            "message": "Recurring bill generated",
+            "bill_id": bill.id,
+            "member_id": member.id,
+            "bill_date": bill.bill_date,
+            "total_amount": str(bill.total_amount),
+            "recurring_date_next": member.recurring_date,
+        }, status=201)
+
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint for this process's request metrics. Served
+    only with METRICS_ENABLED on and a METRICS_TOKEN set, which scrapers
+    must send as a bearer token: per-route traffic isn't public.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if not getattr(settings, 'METRICS_ENABLED', False) or not token:
+        raise Http404
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
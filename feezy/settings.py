@@ -44,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'adminapp.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     "corsheaders.middleware.CorsMiddleware",
@@ -52,8 +53,18 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'adminapp.middleware.RepeatedQueryLoggingMiddleware',
 ]
 
+# With DEBUG on, warn when a request runs the same SQL this many times
+QUERY_REPEAT_THRESHOLD = 5
+
+# Server-Timing headers and per-route metrics on /metrics, off by default.
+# /metrics is only served once METRICS_TOKEN is set too, and scrapers must
+# send "Authorization: Bearer <token>".
+METRICS_ENABLED = False
+METRICS_TOKEN = None
+
 ROOT_URLCONF = 'feezy.urls'
 
 TEMPLATES = [
@@ -77,14 +88,68 @@ WSGI_APPLICATION = 'feezy.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# High-concurrency SQLite mode for several gunicorn workers:
+# - WAL lets readers run alongside the single writer
+# - synchronous=NORMAL is durable across app crashes in WAL mode and avoids an fsync per commit
+# - writers wait up to `timeout` seconds (busy_timeout) instead of failing with "database is locked"
+# - IMMEDIATE takes the write lock at BEGIN, so transactions never fail mid-way upgrading a read lock
+SQLITE_OPTIONS = {
+    'transaction_mode': 'IMMEDIATE',
+    'timeout': 20,
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'
+        'PRAGMA synchronous=NORMAL;'
+        'PRAGMA mmap_size=134217728;'
+        'PRAGMA journal_size_limit=67108864;'
+        'PRAGMA cache_size=-20000;'
+    ),
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': SQLITE_OPTIONS,
+        # Keep connections open between requests so the PRAGMAs run once per worker
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# "tokens" backs CachedTokenAuthentication. LocMem is per process: a password
+# change, expiry or deletion only invalidates the worker that handled it, and
+# the others serve the stale user for up to TIMEOUT, so keep it short. Point
+# it at a shared cache (Redis/Memcached) for immediate cross-worker
+# invalidation, and the TIMEOUT can go up.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'tokens': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'auth-tokens',
+        'TIMEOUT': 30,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    # Per-client reports (receivables aging), keyed on the client's members_version:
+    # a write in any worker moves the key, so a per-process cache is never stale
+    'reports': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'reports',
+        'TIMEOUT': 3600,
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -142,3 +207,10 @@ EMAIL_HOST_USER = 'jesinprakash79@gmail.com'
 EMAIL_HOST_PASSWORD = 'xjnvcpghwabadcfe'  # not your regular password
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
+
+# Country -> currency comes from adminapp/data/currencies.json. Set this to
+# True to fall back to restcountries.com for codes missing from the bundle.
+CURRENCY_REMOTE_LOOKUP = False
+
+# Threads for password hashing in the async login view (default: CPU count)
+PASSWORD_HASH_WORKERS = None
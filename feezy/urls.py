@@ -17,8 +17,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path,include
 
+from adminapp.views import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
 
-    path('feezy/',include('adminapp.urls'))
+    path('feezy/',include('adminapp.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]